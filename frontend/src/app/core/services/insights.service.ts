@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
-import { tap, catchError } from 'rxjs/operators';
+import { tap, catchError, map } from 'rxjs/operators';
 
 const API_URL = '/api'; // Proxied by Nginx to Insights Service
 
@@ -21,6 +21,18 @@ export interface Insight {
     createdAt: string;
 }
 
+export interface InsightPage {
+    items: Insight[];
+    nextCursor: string | null;
+    total: number | null;
+}
+
+export interface InsightAggregates {
+    groupBy: string[];
+    total: number;
+    buckets: Array<{ [dimension: string]: string | number | null; count: number }>;
+}
+
 @Injectable({
     providedIn: 'root'
 })
@@ -37,6 +49,25 @@ export class InsightsService {
         );
     }
 
+    // One keyset page; pass nextCursor back as params.cursor for the next one
+    getInsightsPage(params: any = {}): Observable<InsightPage> {
+        return this.http.get<Insight[]>(`${API_URL}/insights`, { params, observe: 'response' }).pipe(
+            map(res => {
+                const total = res.headers.get('X-Total-Count');
+                return {
+                    items: res.body || [],
+                    nextCursor: res.headers.get('X-Next-Cursor'),
+                    total: total === null ? null : Number(total)
+                };
+            })
+        );
+    }
+
+    // Counts from the rollup table; params.groupBy: week,therapeuticArea,competitorId,impactLevel
+    getAggregates(params: any = {}): Observable<InsightAggregates> {
+        return this.http.get<InsightAggregates>(`${API_URL}/insights/aggregates`, { params });
+    }
+
     getInsight(id: string): Observable<Insight> {
         return this.http.get<Insight>(`${API_URL}/insights/${id}`);
     }
@@ -5,7 +5,7 @@ import { MatCardModule } from '@angular/material/card';
 import { MatIconModule } from '@angular/material/icon';
 import { MatButtonModule } from '@angular/material/button';
 import { forkJoin } from 'rxjs';
-import { catchError, of } from 'rxjs';
+import { catchError, map, of } from 'rxjs';
 import { HttpClient } from '@angular/common/http';
 import { InsightsService, Insight } from '../../core/services/insights.service';
 import { MatDialog, MatDialogModule } from '@angular/material/dialog';
@@ -56,21 +56,23 @@ export class DashboardComponent implements OnInit {
     this.loading = true;
     forkJoin({
       competitors: this.http.get<any[]>('/api/competitors').pipe(catchError(() => of([]))),
-      insights: this.insightsService.getInsights().pipe(catchError(() => of([]))),
-      documents: this.http.get<any[]>('/api/crawl/documents').pipe(catchError(() => of([]))),
+      insights: this.insightsService.getInsightsPage({ limit: 5 }).pipe(
+        catchError(() => of({ items: [], nextCursor: null, total: null }))
+      ),
+      insightCount: this.insightsService.getAggregates().pipe(map(r => r.total), catchError(() => of(null))),
+      documentCount: this.http.get<{ count: number }>('/api/crawl/documents/count').pipe(map(r => r.count), catchError(() => of(0))),
       notifications: this.http.get<any[]>('/api/notifications/me').pipe(catchError(() => of([])))
-    }).subscribe(({ competitors, insights, documents, notifications }) => {
+    }).subscribe(({ competitors, insights, insightCount, documentCount, notifications }) => {
       this.zone.run(() => {
         this.stats = [
           { label: 'Total Competitors', value: String(competitors.length), icon: 'business', color: 'text-blue-600', bg: 'bg-blue-100' },
-          { label: 'Active Insights', value: String(insights.length), icon: 'lightbulb', color: 'text-yellow-600', bg: 'bg-yellow-100' },
-          { label: 'Documents Ingested', value: String(documents.length), icon: 'article', color: 'text-purple-600', bg: 'bg-purple-100' },
+          { label: 'Active Insights', value: String(insightCount ?? insights.items.length), icon: 'lightbulb', color: 'text-yellow-600', bg: 'bg-yellow-100' },
+          { label: 'Documents Ingested', value: String(documentCount), icon: 'article', color: 'text-purple-600', bg: 'bg-purple-100' },
           { label: 'Notifications', value: String(notifications.length), icon: 'notifications', color: 'text-green-600', bg: 'bg-green-100' }
         ];
 
-        this.recentInsights = insights
-          .sort((a: Insight, b: Insight) => new Date(b.createdAt).getTime() - new Date(a.createdAt).getTime())
-          .slice(0, 5);
+        // Newest first from the server
+        this.recentInsights = insights.items;
 
         this.loading = false;
         this.cdr.detectChanges();
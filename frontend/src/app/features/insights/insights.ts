@@ -33,6 +33,8 @@ export class InsightsComponent implements OnInit {
   displayedColumns: string[] = ['title', 'area', 'score', 'date', 'actions'];
   dataSource: Insight[] = [];
   loading = true;
+  nextCursor: string | null = null;
+  readonly pageSize = 100;
 
   constructor(
     private insightsService: InsightsService,
@@ -53,10 +55,11 @@ export class InsightsComponent implements OnInit {
   }
 
   loadInsights() {
-    this.insightsService.getInsights().subscribe({
-      next: (data) => {
+    this.insightsService.getInsightsPage({ limit: this.pageSize }).subscribe({
+      next: (page) => {
         this.zone.run(() => {
-          this.dataSource = data;
+          this.dataSource = page.items;
+          this.nextCursor = page.nextCursor;
           this.loading = false;
           this.cdr.detectChanges();
 
@@ -79,6 +82,20 @@ export class InsightsComponent implements OnInit {
     });
   }
 
+  loadMore() {
+    if (!this.nextCursor) return;
+    this.insightsService.getInsightsPage({ limit: this.pageSize, cursor: this.nextCursor }).subscribe({
+      next: (page) => {
+        this.zone.run(() => {
+          this.dataSource = [...this.dataSource, ...page.items];
+          this.nextCursor = page.nextCursor;
+          this.cdr.detectChanges();
+        });
+      },
+      error: (err) => console.error('InsightsComponent: Error loading more', err)
+    });
+  }
+
   openInsightById(id: string) {
     const found = this.dataSource.find(i => i.id === id);
     if (found) {
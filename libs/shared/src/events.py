@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger("events")
+
+# Channels
+DOCUMENT_INGESTED = "document_ingested"
+COMPETITORS_CHANGED = "competitors_changed"
+CACHE_INVALIDATED = "cache_invalidated"
+
+# Postgres NOTIFY payloads are capped at 8000 bytes
+MAX_IDS_PER_EVENT = 200
+
+Handler = Callable[[dict], Awaitable[None]]
+
+class EventBus(ABC):
+    """Minimal publish/subscribe abstraction shared by the services."""
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: dict):
+        pass
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: Handler):
+        pass
+
+    async def close(self):
+        pass
+
+    async def publish_ids(self, channel: str, ids: List[str], **extra):
+        """Publish a list of IDs, split into NOTIFY-sized chunks."""
+        for i in range(0, len(ids), MAX_IDS_PER_EVENT):
+            await self.publish(channel, {"ids": ids[i:i + MAX_IDS_PER_EVENT], **extra})
+
+class InMemoryEventBus(EventBus):
+    """
+    In-process stand-in for local development and tests. Only delivers to
+    subscribers living in the same process.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+    async def publish(self, channel: str, payload: dict):
+        for handler in list(self._handlers[channel]):
+            try:
+                await handler(payload)
+            except Exception as e:
+                logger.error(f"Event handler for {channel} failed: {e}")
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+class PostgresEventBus(EventBus):
+    """
+    LISTEN/NOTIFY based bus. Publishing uses a short-lived connection; each
+    subscribed channel holds one dedicated connection, shared by all of its
+    handlers, and is re-established if the connection drops.
+    """
+
+    def __init__(self, dsn: str, reconnect_seconds: float = 5.0):
+        # SQLAlchemy URLs carry the driver name, asyncpg wants a plain DSN
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://")
+        self.reconnect_seconds = reconnect_seconds
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._listeners: Dict[str, asyncio.Task] = {}
+        # Running handler calls; the event loop only keeps weak references
+        self._handler_tasks: Set[asyncio.Task] = set()
+
+    async def publish(self, channel: str, payload: dict):
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        try:
+            await conn.execute("SELECT pg_notify($1, $2)", channel, json.dumps(payload))
+        finally:
+            await conn.close()
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+        if channel not in self._listeners:
+            self._listeners[channel] = asyncio.create_task(self._listen(channel))
+
+    async def _dispatch(self, channel: str, handler: Handler, payload: dict):
+        try:
+            await handler(payload)
+        except Exception as e:
+            logger.error(f"Event handler for {channel} failed: {e}")
+
+    def _on_notify(self, conn, pid, channel, raw):
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            logger.error(f"Dropping malformed event on {channel}: {raw}")
+            return
+        for handler in list(self._handlers[channel]):
+            task = asyncio.create_task(self._dispatch(channel, handler, payload))
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._handler_tasks.discard)
+
+    async def _listen(self, channel: str):
+        import asyncpg
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                await conn.add_listener(channel, self._on_notify)
+                logger.info(f"Listening on channel {channel}")
+                while not conn.is_closed():
+                    await asyncio.sleep(self.reconnect_seconds)
+                logger.warning(f"Listener connection for {channel} closed, reconnecting")
+            except asyncio.CancelledError:
+                if conn and not conn.is_closed():
+                    await conn.close()
+                raise
+            except Exception as e:
+                logger.error(f"Listener for {channel} failed: {e}")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def close(self):
+        for task in [*self._listeners.values(), *self._handler_tasks]:
+            task.cancel()
+        self._listeners.clear()
+        self._handler_tasks.clear()
+        self._handlers.clear()
+
+def get_event_bus(database_url: Optional[str] = None) -> EventBus:
+    """
+    Build the bus configured by EVENT_BUS_BACKEND ("postgres" or "memory").
+    """
+    backend = os.getenv("EVENT_BUS_BACKEND", "postgres").lower()
+    database_url = database_url or os.getenv("DATABASE_URL")
+    if backend == "memory" or not database_url:
+        return InMemoryEventBus()
+    return PostgresEventBus(database_url)
@@ -0,0 +1,161 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from .logger import correlation_id_ctx
+
+logger = logging.getLogger("http-client")
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError, httpx.PoolTimeout)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class ServiceClient:
+    """
+    Pooled HTTP client for calls to other services and upstream APIs.
+
+    Create one per target (or per service) at startup and close it on
+    shutdown, so connections are kept alive across requests instead of being
+    set up for every call. On top of httpx it adds:
+
+    - HTTP/2 when the `h2` package is installed (negotiated on HTTPS targets)
+    - a per-host concurrency cap (`max_per_host`)
+    - retries with full-jitter exponential backoff on connection errors,
+      timeouts and 429/502/503/504; non-idempotent methods only retry when
+      the caller passes `retry=True`
+    - the current X-Correlation-Id and, via `auth_provider`, an Authorization
+      header on every request that does not already carry one
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        max_per_host: Optional[int] = None,
+        retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 5.0,
+        http2: Optional[bool] = None,
+        headers: Optional[Dict[str, str]] = None,
+        auth_provider: Optional[Callable[[], Optional[str]]] = None,
+        follow_redirects: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_per_host = max_per_host
+        self.auth_provider = auth_provider
+        self.http2 = HTTP2_AVAILABLE if http2 is None else (http2 and HTTP2_AVAILABLE)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+            http2=self.http2,
+            headers=headers,
+            follow_redirects=follow_redirects,
+            transport=transport
+        )
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.status_counts: Dict[int, int] = defaultdict(int)
+
+    def _slot(self, host: str) -> Optional[asyncio.Semaphore]:
+        if not self.max_per_host:
+            return None
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_slots[host]
+
+    def _outgoing_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        merged = dict(headers or {})
+        names = {k.lower() for k in merged}
+        correlation_id = correlation_id_ctx.get()
+        if "x-correlation-id" not in names and correlation_id != "unknown":
+            merged["X-Correlation-Id"] = correlation_id
+        if "authorization" not in names and self.auth_provider:
+            token = self.auth_provider()
+            if token:
+                merged["Authorization"] = f"Bearer {token}"
+        return merged
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        return max(delay, min(retry_after or 0.0, self.backoff_cap * 6))
+
+    async def request(
+        self, method: str, url: str, *, headers: Optional[Dict[str, str]] = None, retry: Optional[bool] = None, **kwargs
+    ) -> httpx.Response:
+        method = method.upper()
+        can_retry = retry if retry is not None else method in IDEMPOTENT_METHODS
+        request = self._client.build_request(method, url, headers=self._outgoing_headers(headers), **kwargs)
+        slot = self._slot(request.url.host)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                if slot:
+                    async with slot:
+                        response = await self._client.send(request)
+                else:
+                    response = await self._client.send(request)
+            except RETRY_EXCEPTIONS as e:
+                self.total_seconds += time.perf_counter() - started
+                if not can_retry or attempt >= self.retries:
+                    self.failures += 1
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{method} {request.url} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            else:
+                self.total_seconds += time.perf_counter() - started
+                self.requests += 1
+                self.status_counts[response.status_code] += 1
+                if response.status_code not in RETRY_STATUSES or not can_retry or attempt >= self.retries:
+                    return response
+                retry_after = response.headers.get("retry-after")
+                await response.aclose()
+                delay = self.backoff(attempt, float(retry_after) if retry_after and retry_after.isdigit() else None)
+                logger.warning(f"{method} {request.url} returned {response.status_code}, retrying in {delay:.2f}s")
+            attempt += 1
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retried,
+            "failures": self.failures,
+            "http2": self.http2,
+            "avgLatencyMs": round(self.total_seconds / self.requests * 1000, 2) if self.requests else None,
+            "statusCounts": dict(self.status_counts)
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,326 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .events import EventBus, CACHE_INVALIDATED
+
+logger = logging.getLogger("response-cache")
+
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+# Clients may reuse a response but must revalidate it (ETag) every time
+CACHE_CONTROL = "private, no-cache"
+
+Loader = Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether the request's If-None-Match / If-Modified-Since validators still match."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0, tzinfo=None) <= since
+    return False
+
+class CachedResponse(NamedTuple):
+    body: bytes # Rendered JSON
+    headers: Dict[str, str] # Including ETag
+
+    @classmethod
+    def render(cls, content: Any, headers: Optional[Dict[str, str]] = None) -> "CachedResponse":
+        body = JSONResponse(jsonable_encoder(content)).body
+        headers = dict(headers or {})
+        # Handlers with a cheaper validator (the competitor list) pass their own
+        headers.setdefault("ETag", '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"')
+        headers["Cache-Control"] = CACHE_CONTROL
+        return cls(body, headers)
+
+class InMemoryRemoteCache:
+    """
+    Stand-in for Redis (RESPONSE_CACHE_REDIS_URL=memory://) implementing the
+    few redis.asyncio commands the cache uses. Process-local, like
+    InMemoryEventBus.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def _live(self, key: str):
+        value, expires_at = self._values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            self._values.pop(key, None)
+            return None
+        return value
+
+    async def get(self, key: str):
+        value = self._live(key)
+        return value if isinstance(value, str) else None
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None):
+        self._values[key] = (value, time.time() + ex if ex else None)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._values.pop(key, None)
+
+    async def sadd(self, key: str, *members: str):
+        members_set = self._live(key) or set()
+        members_set.update(members)
+        self._values[key] = (members_set, self._values.get(key, (None, None))[1])
+
+    async def smembers(self, key: str):
+        return set(self._live(key) or ())
+
+    async def expire(self, key: str, seconds: int):
+        if self._live(key) is not None:
+            self._values[key] = (self._values[key][0], time.time() + seconds)
+
+    async def aclose(self):
+        pass
+
+class ResponseCache:
+    """
+    Read-through cache of rendered JSON GET responses with ETag/304 support.
+
+    Entries live in an in-process LRU (`max_entries`) and, with a `remote`
+    (redis.asyncio client or InMemoryRemoteCache), in a tier shared by all
+    replicas; both expire after `ttl_seconds`. Each entry carries tags
+    ("insights", "insight:<id>"), and write handlers call invalidate() with
+    the tags they affect. With an `event_bus` the invalidation is also
+    published, so other replicas drop their in-process copies; the TTL bounds
+    staleness if an event is lost.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 1024,
+        ttl_seconds: float = 60.0,
+        remote=None,
+        event_bus: Optional[EventBus] = None
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.remote = remote
+        self.event_bus = event_bus
+        self.origin = uuid.uuid4().hex
+        self._memory: "OrderedDict[str, Tuple[float, CachedResponse, Tuple[str, ...]]]" = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = defaultdict(set)
+        # Bumped by invalidate(): a response loaded across an invalidation is not stored
+        self._generations: Dict[str, int] = defaultdict(int)
+        self.memory_hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.remote_errors = 0
+
+    def key(self, request: Request) -> str:
+        query = urlencode(sorted(request.query_params.multi_items()))
+        return f"{request.url.path}?{query}"
+
+    def _remote_key(self, kind: str, name: str) -> str:
+        return f"response-cache:{self.namespace}:{kind}:{name}"
+
+    def _forget(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry:
+            for tag in entry[2]:
+                self._tagged[tag].discard(key)
+                if not self._tagged[tag]:
+                    del self._tagged[tag]
+
+    def _remember(self, key: str, cached: CachedResponse, tags: Tuple[str, ...], expires_at: Optional[float] = None):
+        self._forget(key)
+        self._memory[key] = (expires_at or time.time() + self.ttl_seconds, cached, tags)
+        for tag in tags:
+            self._tagged[tag].add(key)
+        while len(self._memory) > self.max_entries:
+            self._forget(next(iter(self._memory)))
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._memory.get(key)
+        if entry:
+            expires_at, cached, _ = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return cached
+            self._forget(key)
+
+        if self.remote is not None:
+            try:
+                raw = await self.remote.get(self._remote_key("entry", key))
+            except Exception as e:
+                logger.error(f"Response cache lookup failed: {e}")
+                self.remote_errors += 1
+                raw = None
+            if raw:
+                stored = json.loads(raw)
+                cached = CachedResponse(stored["body"].encode("utf-8"), stored["headers"])
+                self.remote_hits += 1
+                # Keeps the remote expiry, so a copy is never older than the TTL
+                self._remember(key, cached, tuple(stored["tags"]), stored["expiresAt"])
+                return cached
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, cached: CachedResponse, tags: Iterable[str]):
+        tags = tuple(tags)
+        self._remember(key, cached, tags)
+        self.stores += 1
+        if self.remote is None:
+            return
+        ttl = max(1, int(self.ttl_seconds))
+        try:
+            await self.remote.set(
+                self._remote_key("entry", key), json.dumps({
+                    "body": cached.body.decode("utf-8"),
+                    "headers": cached.headers,
+                    "tags": tags,
+                    "expiresAt": time.time() + ttl
+                }),
+                ex=ttl
+            )
+            for tag in tags:
+                tag_key = self._remote_key("tag", tag)
+                await self.remote.sadd(tag_key, key)
+                await self.remote.expire(tag_key, ttl)
+        except Exception as e:
+            logger.error(f"Response cache store failed: {e}")
+            self.remote_errors += 1
+
+    def _drop_local(self, tags: Iterable[str]):
+        for tag in tags:
+            self._generations[tag] += 1
+            for key in list(self._tagged.get(tag, ())):
+                self._forget(key)
+
+    async def invalidate(self, *tags: str):
+        """Drop every response tagged with any of `tags`, here, in the remote tier and in other replicas."""
+        self._drop_local(tags)
+        self.invalidations += 1
+        if self.remote is not None:
+            try:
+                for tag in tags:
+                    tag_key = self._remote_key("tag", tag)
+                    keys = [self._remote_key("entry", key) for key in await self.remote.smembers(tag_key)]
+                    await self.remote.delete(*keys, tag_key)
+            except Exception as e:
+                logger.error(f"Response cache invalidation failed: {e}")
+                self.remote_errors += 1
+        if self.event_bus is not None:
+            try:
+                await self.event_bus.publish(
+                    CACHE_INVALIDATED, {"namespace": self.namespace, "tags": list(tags), "origin": self.origin}
+                )
+            except Exception as e:
+                logger.error(f"Failed to publish cache invalidation: {e}")
+
+    async def subscribe(self):
+        """Follow invalidations published by other replicas of the service."""
+        if self.event_bus is None:
+            return
+
+        async def on_invalidated(payload: dict):
+            if payload.get("namespace") == self.namespace and payload.get("origin") != self.origin:
+                self._drop_local(payload.get("tags", []))
+
+        await self.event_bus.subscribe(CACHE_INVALIDATED, on_invalidated)
+
+    async def respond(self, request: Request, tags: Iterable[str], load: Loader) -> Response:
+        """
+        The cached response for `request`, or the one built from `load()`
+        (JSON-able content, extra headers) and stored under `tags`. Answers
+        304 when the client's validators match.
+        """
+        key = self.key(request)
+        tags = tuple(tags)
+        cached = await self.get(key)
+        if cached is None:
+            generations = [self._generations[tag] for tag in tags]
+            content, headers = await load()
+            cached = CachedResponse.render(content, headers)
+            if generations == [self._generations[tag] for tag in tags]:
+                await self.set(key, cached, tags)
+
+        last_modified = cached.headers.get("Last-Modified")
+        try:
+            last_modified = parsedate_to_datetime(last_modified) if last_modified else None
+        except (TypeError, ValueError):
+            last_modified = None
+        if not_modified(request, cached.headers["ETag"], last_modified):
+            self.not_modified += 1
+            validators = {k: v for k, v in cached.headers.items() if k in ("ETag", "Last-Modified", "Cache-Control")}
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+        return Response(content=cached.body, media_type="application/json", headers=cached.headers)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.remote_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "memoryHits": self.memory_hits,
+            "remoteHits": self.remote_hits,
+            "misses": self.misses,
+            "hitRate": round((self.memory_hits + self.remote_hits) / lookups, 4) if lookups else None,
+            "notModified": self.not_modified,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "remoteErrors": self.remote_errors,
+            "remote": self.remote is not None
+        }
+
+    async def close(self):
+        if self.remote is not None and hasattr(self.remote, "aclose"):
+            await self.remote.aclose()
+
+def get_remote_cache(url: Optional[str]):
+    """redis.asyncio client for `url`, the in-memory stand-in for memory://, or None."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return InMemoryRemoteCache()
+    if not REDIS_AVAILABLE:
+        logger.warning("RESPONSE_CACHE_REDIS_URL is set but the redis package is not installed; caching in memory only")
+        return None
+    import redis.asyncio as redis
+
+    return redis.from_url(url, decode_responses=True)
+
+def get_response_cache(namespace: str, event_bus: Optional[EventBus] = None) -> ResponseCache:
+    """
+    Build the cache configured by RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS and RESPONSE_CACHE_REDIS_URL (optional).
+    """
+    return ResponseCache(
+        namespace,
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60")),
+        remote=get_remote_cache(os.getenv("RESPONSE_CACHE_REDIS_URL")),
+        event_bus=event_bus
+    )
@@ -0,0 +1,91 @@
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Match = Tuple[int, int, str, Any] # start, end, keyword, value
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton: finds every occurrence of any number of keywords
+    in a single pass over the text, independent of how many keywords there
+    are. Matching is case-insensitive and, by default, only accepts matches
+    that start and end on word boundaries.
+    """
+
+    def __init__(self, keywords: Optional[Iterable[Tuple[str, Any]]] = None, word_boundary: bool = True):
+        self.word_boundary = word_boundary
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, Any]]] = [[]]
+        self._built = False
+        for keyword, value in keywords or []:
+            self.add(keyword, value)
+
+    def add(self, keyword: str, value: Any = None):
+        keyword = keyword.strip().lower()
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, keyword if value is None else value))
+        self._built = False
+
+    def build(self) -> "KeywordAutomaton":
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def __len__(self) -> int:
+        return sum(1 for out in self._out for _ in out)
+
+    def iter_matches(self, text: str) -> Iterator[Match]:
+        if not self._built:
+            self.build()
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for keyword, value in out[state]:
+                start = end - len(keyword)
+                if self.word_boundary and not _on_word_boundary(text, start, end):
+                    continue
+                yield start, end, keyword, value
+
+    def find_all(self, text: str) -> List[Match]:
+        return list(self.iter_matches(text))
+
+    def matched_values(self, text: str) -> set:
+        return {value for _, _, _, value in self.iter_matches(text)}
+
+    def contains_any(self, text: str) -> bool:
+        return next(self.iter_matches(text), None) is not None
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    before_ok = start == 0 or not text[start - 1].isalnum()
+    after_ok = end == len(text) or not text[end].isalnum()
+    return before_ok and after_ok
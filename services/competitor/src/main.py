@@ -1,19 +1,24 @@
 import sys
 sys.path.append("/app")
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func
 from typing import List
+from datetime import timezone
+from email.utils import format_datetime
 import uuid
 import logging
 
 from libs.shared.src.logger import setup_logger
 from libs.shared.src.middleware import CorrelationIdMiddleware
 from .database import get_db, engine, Base
+from .migrations import upgrade_schema
 from . import models, schemas
 from libs.shared.src.exceptions import setup_exception_handlers
 from libs.shared.src.auth import get_current_user, require_role, ROLE_ADMIN, ROLE_ANALYST, ROLE_EXECUTIVE, User
+from libs.shared.src.events import get_event_bus, COMPETITORS_CHANGED
+from libs.shared.src.response_cache import CACHE_CONTROL, get_response_cache, not_modified
 
 logger = setup_logger("competitor-service")
 
@@ -22,11 +27,41 @@ app = FastAPI(title="Competitor Service")
 app.add_middleware(CorrelationIdMiddleware)
 setup_exception_handlers(app)
 
+event_bus = get_event_bus()
+# GET /api/competitors and /api/competitors/{id}/trials, tagged "competitors" and "trials:<id>"
+response_cache = get_response_cache("competitors", event_bus)
+
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await upgrade_schema(conn)
     logger.info("Database initialized")
+    await response_cache.subscribe()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await response_cache.close()
+    await event_bus.close()
+
+async def publish_change(competitor_id: str, action: str):
+    """Drop cached responses and tell cached readers (the orchestrator) that the competitor list changed."""
+    tags = ["competitors"] + ([f"trials:{competitor_id}"] if action == "deleted" else [])
+    await response_cache.invalidate(*tags)
+    try:
+        await event_bus.publish(COMPETITORS_CHANGED, {"id": competitor_id, "action": action})
+    except Exception as e:
+        logger.error(f"Failed to publish competitor change event: {e}")
+
+async def list_validators(db: AsyncSession):
+    """
+    ETag and Last-Modified for the competitor list, derived from the row count
+    and the newest updated_at so every replica hands out the same validators.
+    """
+    result = await db.execute(select(func.count(models.Competitor.id), func.max(models.Competitor.updated_at)))
+    count, last_modified = result.one()
+    version = int(last_modified.timestamp() * 1_000_000) if last_modified else 0
+    return f'W/"{count}-{version}"', last_modified
 
 @app.get("/health")
 async def health():
@@ -51,16 +86,34 @@ async def create_competitor(
     await db.commit()
     await db.refresh(db_competitor)
     logger.info(f"Created competitor {new_id}")
+    await publish_change(new_id, "created")
     return db_competitor
 
 @app.get("/api/competitors", response_model=List[schemas.CompetitorResponse])
 async def list_competitors(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(require_role([ROLE_ADMIN, ROLE_ANALYST, ROLE_EXECUTIVE]))
 ):
-    result = await db.execute(select(models.Competitor))
-    competitors = result.scalars().all()
-    return competitors
+    # Revalidation costs one aggregate query, not a load of every row
+    etag, last_modified = await list_validators(db)
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+    if not_modified(request, etag, last_modified):
+        response_cache.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**headers, "Cache-Control": CACHE_CONTROL})
+
+    async def load():
+        result = await db.execute(select(models.Competitor))
+        competitors = [schemas.CompetitorResponse.model_validate(c).model_dump(mode="json", by_alias=True) for c in result.scalars()]
+        return competitors, headers
+
+    return await response_cache.respond(request, ["competitors"], load)
+
+@app.get("/api/competitors/cache")
+async def response_cache_stats(user: User = Depends(require_role([ROLE_ADMIN]))):
+    return response_cache.stats()
 
 @app.get("/api/competitors/{id}", response_model=schemas.CompetitorResponse)
 async def get_competitor(
@@ -95,6 +148,7 @@ async def update_competitor(
     await db.commit()
     await db.refresh(db_competitor)
     logger.info(f"Updated competitor {id}")
+    await publish_change(id, "updated")
     return db_competitor
 
 @app.delete("/api/competitors/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -117,19 +171,24 @@ async def delete_competitor(
     await db.delete(db_competitor)
     await db.commit()
     logger.info(f"Deleted competitor {id} and associated trials")
+    await publish_change(id, "deleted")
     return None
 
 @app.get("/api/competitors/{id}/trials", response_model=List[schemas.ClinicalTrialResponse])
 async def list_trials(
     id: str, 
+    request: Request,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(require_role([ROLE_ADMIN, ROLE_ANALYST, ROLE_EXECUTIVE]))
 ):
-    result = await db.execute(select(models.Competitor).where(models.Competitor.id == id))
-    if not result.scalar_one_or_none():
-        raise HTTPException(status_code=404, detail="Competitor not found")
-    trials = await db.execute(select(models.ClinicalTrial).where(models.ClinicalTrial.competitor_id == id))
-    return trials.scalars().all()
+    async def load():
+        result = await db.execute(select(models.Competitor).where(models.Competitor.id == id))
+        if not result.scalar_one_or_none():
+            raise HTTPException(status_code=404, detail="Competitor not found")
+        trials = await db.execute(select(models.ClinicalTrial).where(models.ClinicalTrial.competitor_id == id))
+        return [schemas.ClinicalTrialResponse.model_validate(t).model_dump(mode="json", by_alias=True) for t in trials.scalars()], {}
+
+    return await response_cache.respond(request, [f"trials:{id}"], load)
 
 @app.post("/api/competitors/{id}/trials", response_model=schemas.ClinicalTrialResponse, status_code=status.HTTP_201_CREATED)
 async def add_clinical_trial(
@@ -165,6 +224,7 @@ async def add_clinical_trial(
         await db.commit()
         await db.refresh(existing_trial)
         logger.info(f"Updated existing trial {trial.trialId} for competitor {id}")
+        await response_cache.invalidate(f"trials:{id}")
         return existing_trial
     else:
         # Create new
@@ -185,4 +245,5 @@ async def add_clinical_trial(
         await db.commit()
         await db.refresh(db_trial)
         logger.info(f"Added trial {new_trial_id} to competitor {id}")
+        await response_cache.invalidate(f"trials:{id}")
         return db_trial
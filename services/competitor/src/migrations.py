@@ -0,0 +1,13 @@
+from sqlalchemy import text
+
+# create_all only creates missing tables, so columns and indexes added to
+# existing tables are listed here. Every statement must be idempotent.
+SCHEMA_UPGRADES = [
+    # Drives the ETag/Last-Modified validators on GET /api/competitors
+    "ALTER TABLE competitors ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP",
+    "UPDATE competitors SET updated_at = COALESCE(created_at::timestamp, now()) WHERE updated_at IS NULL",
+]
+
+async def upgrade_schema(conn):
+    for statement in SCHEMA_UPGRADES:
+        await conn.execute(text(statement))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, ARRAY, Integer
+from sqlalchemy import Column, String, Date, DateTime, ARRAY, Integer
 from sqlalchemy.orm import relationship
 from src.database import Base
 from datetime import datetime
@@ -13,5 +13,6 @@ class Competitor(Base):
     active_drugs = Column(Integer, default=0)
     pipeline_drugs = Column(Integer, default=0)
     created_at = Column(Date, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     trials = relationship("ClinicalTrial", back_populates="competitor")
@@ -78,3 +78,20 @@ async def test_add_clinical_trial():
     assert response.json()["trialId"] == trial_id
     assert response.json()["competitorId"] == comp_id
 
+
+@pytest.mark.asyncio
+async def test_list_competitors_revalidates_with_etag():
+    token = create_test_token("ANALYST")
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = await ac.get("/api/competitors", headers=headers)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        cached = await ac.get("/api/competitors", headers={**headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+
+        await ac.post("/api/competitors", json={"name": f"Test Pharma {uuid.uuid4()}"}, headers=headers)
+        changed = await ac.get("/api/competitors", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
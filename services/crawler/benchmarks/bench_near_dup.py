@@ -0,0 +1,72 @@
+"""
+Measure near-duplicate clustering on a labelled fixture corpus: how many
+syndicated copies are folded into an earlier story (and so skip the LLM), how
+many distinct stories are wrongly merged, and what a lookup costs as the
+index grows.
+
+Run from services/crawler:
+    PYTHONPATH=../..:. python -m benchmarks.bench_near_dup [--corpus path] [--index-size 50000]
+
+Articles sharing a "story" label in the fixture are copies of one story. The
+index is padded with `--index-size` random hashes, standing in for the
+articles of the dedup window, before the corpus is assigned.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from src.near_dup import HASH_BITS, StoryIndex
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "near_dup_corpus.json")
+
+def evaluate(articles, max_distance: int, index_size: int):
+    index = StoryIndex(max_distance)
+    rng = random.Random(0)
+    for i in range(index_size):
+        index.add(rng.getrandbits(HASH_BITS) - (1 << (HASH_BITS - 1)), f"pad-{i}")
+
+    rows = [
+        {"id": f"doc-{i}", "title": article["title"], "body_text": article["content"]}
+        for i, article in enumerate(articles)
+    ]
+    started = time.perf_counter()
+    duplicates = index.assign(rows)
+    elapsed = time.perf_counter() - started
+
+    labels = {row["id"]: article["story"] for row, article in zip(rows, articles)}
+    first_of_story = {}
+    for row, article in zip(rows, articles):
+        first_of_story.setdefault(article["story"], row["id"])
+    expected = len(articles) - len(first_of_story)
+    correct = sum(
+        1 for row in rows
+        if row["processing_status"] == "DUPLICATE" and labels.get(row["story_id"]) == labels[row["id"]]
+    )
+    precision = correct / duplicates if duplicates else 1.0
+    recall = correct / expected if expected else 1.0
+    print(
+        f"{max_distance:>12} {index_size:>10} {duplicates:>5}/{expected:<5} {precision:>9.2f} {recall:>7.2f} "
+        f"{duplicates / len(articles):>10.0%} {elapsed / len(articles) * 1e6:>12.1f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--max-distance", type=int, nargs="+", default=[0, 3, 5, 7])
+    parser.add_argument("--index-size", type=int, nargs="+", default=[0, 10000, 50000])
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        articles = json.load(f)["articles"]
+    stories = len({a["story"] for a in articles})
+    print(f"{len(articles)} articles, {stories} stories; exact-link dedup removes 0")
+    print(f"{'max distance':>12} {'index size':>10} {'dups':>11} {'precision':>9} {'recall':>7} {'dedup rate':>10} {'us/article':>12}")
+
+    for max_distance in args.max_distance:
+        for index_size in args.index_size:
+            evaluate(articles, max_distance, index_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the compiled query filter with the substring scan it replaced, over
+synthetic feed entries and comma-separated keyword queries of growing size.
+"find" and "automaton" are the compiled filter's two matching strategies;
+the crossover between them sets query_filter.SCAN_MAX_TERMS.
+
+Run from services/crawler:
+    PYTHONPATH=../..:. python -m benchmarks.bench_query_filter [--entries 5000] [--keywords 10 100 300 1000]
+
+Entries are built from the words of the near-duplicate fixture corpus plus
+random filler words, so most keywords miss, as they do on real feeds.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import time
+
+from src.query_filter import QueryFilter
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "near_dup_corpus.json")
+
+def legacy_filter(entries, query):
+    # The pre-compilation filter from article_rows()
+    keywords = [kw.strip().lower() for kw in query.split(",")]
+    return [
+        entry for entry in entries
+        if any(kw in (entry.get('title', '') + ' ' + entry.get('content', '')).lower() for kw in keywords)
+    ]
+
+def compiled_filter(scan_max_terms: int):
+    def run(entries, query):
+        query_filter = QueryFilter(query, scan_max_terms=scan_max_terms)
+        return [entry for entry in entries if query_filter.matches(f"{entry['title']} {entry['content']}")]
+    return run
+
+def make_entries(count: int, vocabulary, rng):
+    return [
+        {
+            "title": " ".join(rng.choices(vocabulary, k=10)),
+            "content": " ".join(rng.choices(vocabulary, k=120)),
+        }
+        for _ in range(count)
+    ]
+
+def make_query(count: int, vocabulary, rng):
+    keywords = []
+    for i in range(count):
+        if i % 4 == 0:
+            keywords.append(" ".join(rng.sample(vocabulary, 2)))
+        else:
+            keywords.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))))
+    # One common word so some entries are kept
+    keywords[-1] = vocabulary[0]
+    return ", ".join(keywords)
+
+def timed(fn, entries, query):
+    started = time.perf_counter()
+    kept = fn(entries, query)
+    return len(kept), time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--keywords", type=int, nargs="+", default=[10, 100, 300, 1000])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with open(CORPUS) as f:
+        words = sorted({w.lower() for a in json.load(f)["articles"] for w in a["content"].split() if w.isalpha()})
+    vocabulary = words + ["".join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(2000)]
+    rng.shuffle(vocabulary)
+    entries = make_entries(args.entries, vocabulary, rng)
+
+    print(f"{args.entries} entries, ~{sum(len(e['content']) for e in entries) // args.entries} chars each")
+    print(f"{'keywords':>8} {'variant':<10} {'kept':>6} {'total ms':>10} {'us/entry':>10}")
+    for count in args.keywords:
+        query = make_query(count, vocabulary, rng)
+        variants = (
+            ("substring", legacy_filter),
+            ("find", compiled_filter(scan_max_terms=count)),
+            ("automaton", compiled_filter(scan_max_terms=0)),
+        )
+        for name, fn in variants:
+            kept, elapsed = timed(fn, entries, query)
+            print(f"{count:>8} {name:<10} {kept:>6} {elapsed * 1e3:>10.1f} {elapsed / len(entries) * 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,31 @@
-import httpx
 import logging
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
+
+from libs.shared.src.http_client import ServiceClient
 
 logger = logging.getLogger("crawler-service")
 
 class ClinicalTrialsFetcher:
     BASE_URL = "https://clinicaltrials.gov/api/v2/studies"
+    # Everything parse_studies() reads, so sync pages stay small
+    SYNC_FIELDS = "NCTId,BriefTitle,BriefSummary,OverallStatus,LastUpdatePostDate,LeadSponsorName"
+
+    def __init__(self, http_client: Optional[ServiceClient] = None):
+        self.http_client = http_client or ServiceClient(timeout=30)
 
     async def fetch_recent_studies(self, query: str = None, limit: int = 10) -> List[Dict]:
         """
         Fetch recent studies from ClinicalTrials.gov API v2.
         If query is provided, it filters studies by the search term.
         """
+        try:
+            return await self.fetch_studies(query=query, limit=limit)
+        except Exception as e:
+            logger.error(f"Error fetching clinical trials: {e}")
+            return []
+
+    async def fetch_studies(self, query: str = None, limit: int = 10) -> List[Dict]:
+        """Like fetch_recent_studies(), but lets network and HTTP errors propagate."""
         params = {
             "format": "json",
             "pageSize": limit,
@@ -19,35 +33,65 @@ class ClinicalTrialsFetcher:
         }
         if query:
             params["query.term"] = query
-        
-        try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(self.BASE_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                studies = []
-                if "studies" in data:
-                    for item in data["studies"]:
-                        protocol = item.get("protocolSection", {})
-                        identification = protocol.get("identificationModule", {})
-                        description = protocol.get("descriptionModule", {})
-                        status = protocol.get("statusModule", {})
-                        
-                        nct_id = identification.get("nctId")
-                        if not nct_id: continue
-                        
-                        study = {
-                            "nctId": nct_id,
-                            "title": identification.get("briefTitle", "No Title"),
-                            "summary": description.get("briefSummary", ""),
-                            "status": status.get("overallStatus", "Unknown"),
-                            "lastUpdate": status.get("lastUpdatePostDateStruct", {}).get("date"),
-                            "url": f"https://clinicaltrials.gov/study/{nct_id}",
-                            "sponsor": protocol.get("sponsorCollaboratorsModule", {}).get("leadSponsor", {}).get("name", "Unknown")
-                        }
-                        studies.append(study)
-                return studies
-        except Exception as e:
-            logger.error(f"Error fetching clinical trials: {e}")
-            return []
+
+        response = await self.http_client.get(self.BASE_URL, params=params)
+        response.raise_for_status()
+        return self.parse_studies(response.json())
+
+    async def iter_updated_studies(
+        self, query: str = None, since: Optional[str] = None, page_size: int = 100, max_pages: Optional[int] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield pages of studies last updated on or after `since` (YYYY-MM-DD),
+        oldest update first, following nextPageToken until the last page or
+        `max_pages`. Only the fields parse_studies() reads are requested, and
+        each page can be stored before the next one is fetched.
+        """
+        params = {
+            "format": "json",
+            "pageSize": page_size,
+            "sort": "LastUpdatePostDate:asc",
+            "fields": self.SYNC_FIELDS
+        }
+        if query:
+            params["query.term"] = query
+        if since:
+            params["filter.advanced"] = f"AREA[LastUpdatePostDate]RANGE[{since},MAX]"
+
+        pages = 0
+        while True:
+            response = await self.http_client.get(self.BASE_URL, params=params)
+            response.raise_for_status()
+            data = response.json()
+            yield self.parse_studies(data)
+
+            pages += 1
+            next_token = data.get("nextPageToken")
+            if not next_token or (max_pages and pages >= max_pages):
+                return
+            params["pageToken"] = next_token
+
+    @staticmethod
+    def parse_studies(data: Dict) -> List[Dict]:
+        studies = []
+        if "studies" in data:
+            for item in data["studies"]:
+                protocol = item.get("protocolSection", {})
+                identification = protocol.get("identificationModule", {})
+                description = protocol.get("descriptionModule", {})
+                status = protocol.get("statusModule", {})
+
+                nct_id = identification.get("nctId")
+                if not nct_id: continue
+
+                study = {
+                    "nctId": nct_id,
+                    "title": identification.get("briefTitle", "No Title"),
+                    "summary": description.get("briefSummary", ""),
+                    "status": status.get("overallStatus", "Unknown"),
+                    "lastUpdate": status.get("lastUpdatePostDateStruct", {}).get("date"),
+                    "url": f"https://clinicaltrials.gov/study/{nct_id}",
+                    "sponsor": protocol.get("sponsorCollaboratorsModule", {}).get("leadSponsor", {}).get("name", "Unknown")
+                }
+                studies.append(study)
+        return studies
@@ -1,12 +1,14 @@
 import asyncio
 import feedparser
-import httpx
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 from time import mktime
 
+from libs.shared.src.http_client import ServiceClient
+from ..feeds import conditional_headers, content_hash, new_entries, merge_seen_ids
+
 logger = logging.getLogger("crawler-service")
 
 class AbstractNewsScraper(ABC):
@@ -18,9 +20,21 @@ class AbstractNewsScraper(ABC):
         pass
 
 class RSSScraper(AbstractNewsScraper):
-    def __init__(self, source_name: str, rss_url: str):
+    """
+    Fetches an RSS/Atom feed. When `state` (see feeds.py) holds the validators
+    and seen entries of the last fetch, the request is conditional and only
+    entries not seen before are returned. After each fetch, `state` holds the
+    values to persist and `feed_status` is "not_modified", "unchanged" or
+    "changed".
+    """
+
+    def __init__(self, source_name: str, rss_url: str, http_client: Optional[ServiceClient] = None,
+                 state: Optional[Dict] = None):
         self.source_name = source_name
         self.rss_url = rss_url
+        self.http_client = http_client or ServiceClient(timeout=30, follow_redirects=True)
+        self.state = state
+        self.feed_status = None
         self.headers = {
             "User-Agent": (
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -30,37 +44,62 @@ class RSSScraper(AbstractNewsScraper):
         }
 
     async def scrape(self) -> List[Dict]:
-        logger.info(f"Scraping {self.source_name} RSS feed...")
         try:
-            async with httpx.AsyncClient(timeout=30, follow_redirects=True, headers=self.headers) as client:
-                response = await client.get(self.rss_url)
-                response.raise_for_status()
-            
-            feed = feedparser.parse(response.text)
-            articles = []
-            for entry in feed.entries:
-                published_dt = datetime.utcnow()
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    published_dt = datetime.fromtimestamp(mktime(entry.published_parsed))
-                
-                articles.append({
-                    "title": entry.get("title", "No Title"),
-                    "link": entry.get("link", ""),
-                    "content": entry.get("summary", "") or entry.get("description", ""),
-                    "source": self.source_name,
-                    "published_at": published_dt
-                })
-            return articles
+            return await self.fetch_articles()
         except Exception as e:
             logger.error(f"Error scraping {self.source_name}: {e}")
             return []
 
+    async def fetch_articles(self) -> List[Dict]:
+        """Like scrape(), but lets network and HTTP errors propagate."""
+        logger.info(f"Scraping {self.source_name} RSS feed...")
+        response = await self.http_client.get(self.rss_url, headers={**self.headers, **conditional_headers(self.state)})
+        if response.status_code == 304:
+            self.feed_status = "not_modified"
+            return []
+        response.raise_for_status()
+
+        previous = self.state or {}
+        state = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_hash": content_hash(response.content),
+            "seen_ids": previous.get("seen_ids") or []
+        }
+        # Servers without validators (or that ignore them) still send the
+        # same bytes, so skip parsing when the body hash matches
+        if state["content_hash"] == previous.get("content_hash"):
+            self.state, self.feed_status = state, "unchanged"
+            return []
+
+        feed = feedparser.parse(response.content)
+        entries = new_entries(feed.entries, state["seen_ids"])
+        state["seen_ids"] = merge_seen_ids(feed.entries, state["seen_ids"])
+
+        articles = []
+        for entry in entries:
+            published_dt = datetime.utcnow()
+            if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                published_dt = datetime.fromtimestamp(mktime(entry.published_parsed))
+
+            articles.append({
+                "title": entry.get("title", "No Title"),
+                "link": entry.get("link", ""),
+                "content": entry.get("summary", "") or entry.get("description", ""),
+                "source": self.source_name,
+                "published_at": published_dt
+            })
+        self.state, self.feed_status = state, "changed"
+        return articles
+
 # Factory for creating scrapers
-def get_scrapers() -> List[AbstractNewsScraper]:
-    return [
-        RSSScraper("FDA Press Releases", "https://www.fda.gov/about-fda/contact-fda/stay-informed/rss-feeds/press-releases/rss.xml"),
-        RSSScraper("NIH News", "https://www.nih.gov/news-events/feed.xml"),
-        RSSScraper("ScienceDaily (Medicine)", "https://www.sciencedaily.com/rss/health_medicine.xml"),
-        RSSScraper("Medical Xpress", "https://medicalxpress.com/rss-feed/"),
-        RSSScraper("Drug Discovery News", "https://www.drugdiscoverynews.com/rss")
+def get_scrapers(http_client: Optional[ServiceClient] = None, feed_states: Optional[Dict[str, Dict]] = None) -> List[AbstractNewsScraper]:
+    feeds = [
+        ("FDA Press Releases", "https://www.fda.gov/about-fda/contact-fda/stay-informed/rss-feeds/press-releases/rss.xml"),
+        ("NIH News", "https://www.nih.gov/news-events/feed.xml"),
+        ("ScienceDaily (Medicine)", "https://www.sciencedaily.com/rss/health_medicine.xml"),
+        ("Medical Xpress", "https://medicalxpress.com/rss-feed/"),
+        ("Drug Discovery News", "https://www.drugdiscoverynews.com/rss")
     ]
+    feed_states = feed_states or {}
+    return [RSSScraper(name, url, http_client, feed_states.get(url)) for name, url in feeds]
@@ -0,0 +1,55 @@
+"""
+Typed document content.
+
+Source payloads are stored as JSONB in `documents.payload` (TOAST-compressed
+with lz4), next to the normalized fields consumers actually read: clean body
+text, and for trials the sponsor, overall status and last update date. The
+orchestrator builds its LLM prompt from these fields instead of the JSON text
+that `raw_content` used to hold.
+"""
+import html
+import json
+import re
+from datetime import datetime
+from typing import Dict, Optional
+
+TAG_RE = re.compile(r"<[^>]+>")
+SPACE_RE = re.compile(r"\s+")
+
+def clean_text(value: Optional[str]) -> str:
+    """Strip HTML tags and entities and collapse whitespace."""
+    if not value:
+        return ""
+    return SPACE_RE.sub(" ", html.unescape(TAG_RE.sub(" ", value))).strip()
+
+def jsonable(payload: Dict) -> Dict:
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in payload.items()}
+
+def article_content(article: Dict) -> Dict:
+    """Document columns for an RSS article."""
+    return {
+        "payload": jsonable(article),
+        "body_text": clean_text(article.get("content")),
+    }
+
+def study_content(study: Dict) -> Dict:
+    """Document columns for a ClinicalTrials.gov study."""
+    return {
+        "payload": jsonable(study),
+        "body_text": clean_text(study.get("summary")),
+        "sponsor": study.get("sponsor"),
+        "trial_status": study.get("status"),
+        "last_update": study.get("lastUpdate"),
+    }
+
+def legacy_content(source: str, raw_content: Optional[str]) -> Dict:
+    """Typed columns for a row that only has the old JSON-in-text raw_content."""
+    try:
+        payload = json.loads(raw_content) if raw_content else None
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return {"payload": {"text": raw_content}, "body_text": clean_text(raw_content)}
+    if source == "ClinicalTrials":
+        return study_content(payload)
+    return article_content(payload)
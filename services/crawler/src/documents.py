@@ -0,0 +1,130 @@
+"""
+Listing and export queries for the documents table.
+
+Pages are keyset-paginated on (ingested_at, id), newest first: the cursor is
+the last row's key, so fetching page N costs the same as page 1. Only the
+requested columns are selected, and the content columns are left out unless
+asked for.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select, tuple_
+
+from . import models
+
+# API field name -> column
+DOCUMENT_FIELDS = {
+    "id": models.Document.id,
+    "source": models.Document.source,
+    "externalId": models.Document.external_id,
+    "title": models.Document.title,
+    "url": models.Document.url,
+    "publishedDate": models.Document.published_date,
+    "ingestedAt": models.Document.ingested_at,
+    "processed": models.Document.processed,
+    "processingStatus": models.Document.processing_status,
+    "storyId": models.Document.story_id,
+    "bodyText": models.Document.body_text,
+    "sponsor": models.Document.sponsor,
+    "trialStatus": models.Document.trial_status,
+    "lastUpdate": models.Document.last_update,
+    "payload": models.Document.payload,
+}
+DEFAULT_FIELDS = ["id", "source", "externalId", "title", "url", "publishedDate", "ingestedAt", "processed"]
+
+class DocumentFilters:
+    def __init__(
+        self,
+        source: Optional[str] = None,
+        processed: Optional[bool] = None,
+        ingested_from: Optional[datetime] = None,
+        ingested_to: Optional[datetime] = None
+    ):
+        self.source = source
+        self.processed = processed
+        self.ingested_from = ingested_from
+        self.ingested_to = ingested_to
+
+    def apply(self, query):
+        Document = models.Document
+        if self.source:
+            query = query.where(Document.source == self.source)
+        if self.processed is not None:
+            query = query.where(Document.processed == self.processed)
+        if self.ingested_from:
+            query = query.where(Document.ingested_at >= self.ingested_from)
+        if self.ingested_to:
+            query = query.where(Document.ingested_at < self.ingested_to)
+        return query
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Validate a comma-separated projection. Raises ValueError on unknown fields."""
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in DOCUMENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+def encode_cursor(ingested_at: datetime, doc_id: str) -> str:
+    payload = json.dumps([ingested_at.isoformat(), doc_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str):
+    """Raises ValueError on a malformed cursor."""
+    try:
+        ingested_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(ingested_at), doc_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def build_page_query(fields: Sequence[str], filters: DocumentFilters, cursor: Optional[str], limit: int):
+    Document = models.Document
+    columns = [DOCUMENT_FIELDS[name].label(name) for name in fields]
+    # The keyset columns are always selected so the next cursor can be built
+    query = select(*columns, Document.ingested_at.label("_ingested_at"), Document.id.label("_id"))
+    # Postgres sorts NULLs first under DESC, which would end a page early;
+    # the schema upgrade backfills them
+    query = filters.apply(query).where(Document.ingested_at != None)
+    if cursor:
+        query = query.where(tuple_(Document.ingested_at, Document.id) < tuple_(*decode_cursor(cursor)))
+    return query.order_by(Document.ingested_at.desc(), Document.id.desc()).limit(limit)
+
+def serialize(row, fields: Sequence[str]) -> Dict:
+    item = {}
+    for name in fields:
+        value = row._mapping[name]
+        item[name] = value.isoformat() if isinstance(value, datetime) else value
+    return item
+
+async def fetch_page(session, fields: Sequence[str], filters: DocumentFilters, cursor: Optional[str], limit: int):
+    """One page of serialized documents and the cursor of the next page (None on the last)."""
+    result = await session.execute(build_page_query(fields, filters, cursor, limit))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1]._ingested_at, rows[-1]._id)
+    return [serialize(row, fields) for row in rows], next_cursor
+
+async def count_documents(session, filters: DocumentFilters) -> int:
+    result = await session.execute(filters.apply(select(func.count()).select_from(models.Document)))
+    return result.scalar_one()
+
+async def export_ndjson(session_factory, fields: Sequence[str], filters: DocumentFilters, batch_size: int):
+    """
+    Yield every matching document as one JSON line, a keyset page at a time.
+    Each page uses a short-lived session, so a long export holds no
+    transaction open and memory stays at one page.
+    """
+    cursor = None
+    while True:
+        async with session_factory() as session:
+            items, cursor = await fetch_page(session, fields, filters, cursor, batch_size)
+        for item in items:
+            yield json.dumps(item, default=str) + "\n"
+        if not cursor:
+            return
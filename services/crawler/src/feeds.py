@@ -0,0 +1,73 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+
+# GUIDs/links remembered per feed; comfortably more than a feed window holds
+FEED_SEEN_IDS_LIMIT = 200
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+def conditional_headers(state: Optional[Dict]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since from the validators of the last fetch."""
+    headers = {}
+    if state and state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state and state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    return headers
+
+def entry_id(entry) -> str:
+    return entry.get("id") or entry.get("link") or ""
+
+def new_entries(entries: List, seen_ids: Iterable[str]) -> List:
+    """Entries whose GUID (or link, when the feed has no GUIDs) was not seen before."""
+    seen = set(seen_ids or [])
+    return [entry for entry in entries if entry_id(entry) and entry_id(entry) not in seen]
+
+def merge_seen_ids(entries: List, seen_ids: Iterable[str]) -> List[str]:
+    """Current entries first, then previously seen ones, capped at FEED_SEEN_IDS_LIMIT."""
+    merged = {}
+    for item_id in [entry_id(entry) for entry in entries] + list(seen_ids or []):
+        if item_id:
+            merged.setdefault(item_id, None)
+    return list(merged)[:FEED_SEEN_IDS_LIMIT]
+
+async def load_feed_states(session, job_id: str) -> Dict[str, Dict]:
+    """Stored feed state for a job, keyed by feed URL."""
+    result = await session.execute(select(models.FeedState).where(models.FeedState.job_id == job_id))
+    return {
+        state.feed_url: {
+            "etag": state.etag,
+            "last_modified": state.last_modified,
+            "content_hash": state.content_hash,
+            "seen_ids": state.seen_ids or []
+        }
+        for state in result.scalars().all()
+    }
+
+def build_upsert(job_id: str, feed_url: str, state: Dict):
+    values = {
+        "job_id": job_id,
+        "feed_url": feed_url,
+        "etag": state.get("etag"),
+        "last_modified": state.get("last_modified"),
+        "content_hash": state.get("content_hash"),
+        "seen_ids": state.get("seen_ids") or [],
+        "updated_at": datetime.utcnow()
+    }
+    statement = pg_insert(models.FeedState).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=[models.FeedState.job_id, models.FeedState.feed_url],
+        set_={key: statement.excluded[key] for key in ("etag", "last_modified", "content_hash", "seen_ids", "updated_at")}
+    )
+
+async def save_feed_states(session, job_id: str, states: Dict[str, Dict]):
+    """Upsert feed states in the caller's transaction, so they only advance if the documents commit."""
+    for feed_url, state in states.items():
+        await session.execute(build_upsert(job_id, feed_url, state))
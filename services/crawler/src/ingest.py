@@ -0,0 +1,50 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+
+# Rows per INSERT statement; keeps bind parameters well under asyncpg's 32767 limit
+INSERT_CHUNK_SIZE = 500
+
+async def existing_external_ids(session, external_ids: Iterable[str]) -> Set[str]:
+    """One `external_id IN (...)` query for the whole batch."""
+    external_ids = list(external_ids)
+    existing = set()
+    for i in range(0, len(external_ids), INSERT_CHUNK_SIZE):
+        result = await session.execute(
+            select(models.Document.external_id)
+            .where(models.Document.external_id.in_(external_ids[i:i + INSERT_CHUNK_SIZE]))
+        )
+        existing.update(result.scalars().all())
+    return existing
+
+def build_insert(rows: List[Dict]):
+    """Multi-row INSERT that skips external_ids already present and returns the new IDs."""
+    return (
+        pg_insert(models.Document)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[models.Document.external_id])
+        .returning(models.Document.id)
+    )
+
+async def ingest_documents(session, rows: List[Dict]) -> Tuple[List[str], int]:
+    """
+    Insert new documents in bulk. Rows repeating an external_id (within the
+    batch, already stored, or inserted concurrently by another run) are
+    skipped instead of failing the transaction.
+
+    Returns the IDs of the inserted documents and the number skipped.
+    """
+    unique = {}
+    for row in rows:
+        unique.setdefault(row["external_id"], row)
+    existing = await existing_external_ids(session, unique)
+    new_rows = [row for external_id, row in unique.items() if external_id not in existing]
+
+    created_ids = []
+    for i in range(0, len(new_rows), INSERT_CHUNK_SIZE):
+        result = await session.execute(build_insert(new_rows[i:i + INSERT_CHUNK_SIZE]))
+        created_ids.extend(result.scalars().all())
+    return created_ids, len(rows) - len(created_ids)
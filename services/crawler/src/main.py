@@ -1,20 +1,32 @@
 import sys
 sys.path.append("/app")
 
-from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from datetime import datetime
+from typing import Dict, List, Optional
 import asyncio
+import os
+import time
 import uuid
-import json
 
 from libs.shared.src.logger import setup_logger
 from libs.shared.src.middleware import CorrelationIdMiddleware
 from .database import get_db, engine, Base, AsyncSessionLocal
+from .migrations import upgrade_schema, backfill_content
+from .content import article_content
+from .near_dup import STATUS_DUPLICATE, ingest_articles, load_story_index
+from .query_filter import QueryFilter, compile_query
+from .scheduler import CrawlScheduler, has_active_run, next_fire_time
+from .documents import DocumentFilters, count_documents, decode_cursor, export_ndjson, fetch_page, parse_fields
 from . import models, schemas
 from libs.shared.src.exceptions import setup_exception_handlers
 from libs.shared.src.auth import get_current_user, require_role, ROLE_ADMIN, ROLE_ANALYST, ROLE_EXECUTIVE, User
+from libs.shared.src.events import get_event_bus, DOCUMENT_INGESTED
+from libs.shared.src.http_client import ServiceClient
 
 logger = setup_logger("crawler-service")
 
@@ -27,16 +39,66 @@ app = FastAPI(
 app.add_middleware(CorrelationIdMiddleware)
 setup_exception_handlers(app)
 
+event_bus = get_event_bus()
+# One connection pool for all upstream sources, kept alive between runs
+http_client = ServiceClient(timeout=30, follow_redirects=True, max_per_host=4)
+
+# Cron scheduler: every replica ticks, due jobs are claimed with SKIP LOCKED
+CRAWL_SCHEDULER_ENABLED = os.getenv("CRAWL_SCHEDULER_ENABLED", "true").lower() == "true"
+CRAWL_SCHEDULER_TICK_SECONDS = int(os.getenv("CRAWL_SCHEDULER_TICK_SECONDS", "30"))
+CRAWL_SCHEDULE_JITTER_SECONDS = float(os.getenv("CRAWL_SCHEDULE_JITTER_SECONDS", "60"))
+CRAWL_MAX_CONCURRENT_RUNS = int(os.getenv("CRAWL_MAX_CONCURRENT_RUNS", "2"))
+CRAWL_MAX_RUNS_PER_SOURCE = int(os.getenv("CRAWL_MAX_RUNS_PER_SOURCE", "1"))
+# Running crawl runs heartbeat; a STARTED run silent for longer than the
+# stale threshold no longer blocks its job and is resumed by recovery
+CRAWL_RUN_HEARTBEAT_SECONDS = float(os.getenv("CRAWL_RUN_HEARTBEAT_SECONDS", "30"))
+CRAWL_RUN_STALE_SECONDS = float(os.getenv("CRAWL_RUN_STALE_SECONDS", "180"))
+CRAWL_RUN_RECOVERY_SECONDS = int(os.getenv("CRAWL_RUN_RECOVERY_SECONDS", "60"))
+
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await upgrade_schema(conn)
     logger.info("Database initialized")
+    app.state.content_backfill = asyncio.create_task(backfill_content(AsyncSessionLocal))
+
+    scheduler = AsyncIOScheduler()
+    # Resume runs left STARTED by a restart, then keep sweeping for dead workers
+    scheduler.add_job(crawl_scheduler.recover, 'interval', seconds=CRAWL_RUN_RECOVERY_SECONDS, next_run_time=datetime.now(), max_instances=1)
+    if CRAWL_SCHEDULER_ENABLED:
+        scheduler.add_job(crawl_scheduler.tick, 'interval', seconds=CRAWL_SCHEDULER_TICK_SECONDS, max_instances=1)
+    scheduler.start()
+    app.state.scheduler = scheduler
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.scheduler.shutdown(wait=False)
+    app.state.content_backfill.cancel()
+    await crawl_scheduler.close()
+    await event_bus.close()
+    await http_client.aclose()
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "crawler-service"}
 
+def schedule_next_run(job: models.CrawlJob):
+    """Set the job's next_run_at from its cron schedule; 422 if the expression is invalid."""
+    if not job.schedule:
+        job.next_run_at = None
+        return
+    try:
+        job.next_run_at = next_fire_time(job.schedule, datetime.utcnow(), CRAWL_SCHEDULE_JITTER_SECONDS)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid schedule: {e}")
+
+def validate_query(query: Optional[str]):
+    try:
+        compile_query(query)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid query: {e}")
+
 @app.post("/api/crawl/jobs", response_model=schemas.CrawlJobResponse, status_code=status.HTTP_201_CREATED)
 async def create_crawl_job(
     job: schemas.CrawlJobCreate, 
@@ -49,6 +111,8 @@ async def create_crawl_job(
         schedule=job.schedule,
         enabled=job.enabled
     )
+    validate_query(db_job.query)
+    schedule_next_run(db_job)
     db.add(db_job)
     await db.commit()
     await db.refresh(db_job)
@@ -68,8 +132,9 @@ async def delete_crawl_job(job_id: str, db: AsyncSession = Depends(get_db)):
     job = await db.get(models.CrawlJob, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    # Delete associated runs first
+    # Delete associated runs and feed state first
     await db.execute(delete(models.CrawlRun).where(models.CrawlRun.job_id == job_id))
+    await db.execute(delete(models.FeedState).where(models.FeedState.job_id == job_id))
     await db.delete(job)
     await db.commit()
     logger.info(f"Deleted crawl job {job_id}")
@@ -79,8 +144,18 @@ async def update_crawl_job(job_id: str, updates: schemas.CrawlJobUpdate, db: Asy
     job = await db.get(models.CrawlJob, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    for field, value in updates.model_dump(exclude_unset=True).items():
+    changes = updates.model_dump(exclude_unset=True)
+    for field, value in changes.items():
         setattr(job, field, value)
+    if "query" in changes:
+        validate_query(job.query)
+    if "schedule" in changes or "enabled" in changes:
+        schedule_next_run(job)
+    if "query" in changes or "source" in changes:
+        # Entries already seen were filtered with the old query; re-read feeds
+        # in full and backfill trials for the new query
+        await db.execute(delete(models.FeedState).where(models.FeedState.job_id == job_id))
+        job.trials_watermark = None
     await db.commit()
     await db.refresh(job)
     logger.info(f"Updated crawl job {job_id}")
@@ -88,93 +163,231 @@ async def update_crawl_job(job_id: str, updates: schemas.CrawlJobUpdate, db: Asy
 
 from .clients.scrapers import get_scrapers
 from .clients.clinical_trials import ClinicalTrialsFetcher
+from .sources import fetch_sources
+from .ingest import ingest_documents
+from .feeds import load_feed_states, save_feed_states
+from .trials import study_row, initial_watermark, sync_trials
+from .runs import RUN_COMPLETED, RUN_FAILED, start_attempt, checkpoint_source, finish_run, heartbeat, retry_delay
 
-# Mock crawl function -> upgraded to Real Scraper
-async def run_crawl_task(run_id: str, job_id: str):
-    logger.info(f"Starting crawl run {run_id} for job {job_id}")
+CRAWL_SOURCE_TIMEOUT = float(os.getenv("CRAWL_SOURCE_TIMEOUT", "45"))
+CRAWL_MAX_CONCURRENT_SOURCES = int(os.getenv("CRAWL_MAX_CONCURRENT_SOURCES", "4"))
+# Incremental ClinicalTrials.gov sync: pages are stored as they arrive, so a
+# long catch-up only needs a longer budget, not more memory
+CT_SYNC_TIMEOUT = float(os.getenv("CT_SYNC_TIMEOUT", "600"))
+CT_SYNC_PAGE_SIZE = int(os.getenv("CT_SYNC_PAGE_SIZE", "100"))
+CT_SYNC_MAX_PAGES = int(os.getenv("CT_SYNC_MAX_PAGES", "100"))
+CT_SYNC_BACKFILL_DAYS = int(os.getenv("CT_SYNC_BACKFILL_DAYS", "30"))
+CLINICAL_TRIALS_SOURCE = "ClinicalTrials"
+# Durable runs: failed sources are retried in-process, and runs whose worker
+# died are resumed from their checkpoint by any replica
+CRAWL_RUN_MAX_ATTEMPTS = int(os.getenv("CRAWL_RUN_MAX_ATTEMPTS", "3"))
+CRAWL_RUN_RETRY_BASE_SECONDS = float(os.getenv("CRAWL_RUN_RETRY_BASE_SECONDS", "30"))
+CRAWL_RUN_RETRY_MAX_SECONDS = float(os.getenv("CRAWL_RUN_RETRY_MAX_SECONDS", "300"))
+# Articles within NEAR_DUP_MAX_DISTANCE SimHash bits of one ingested in the
+# last NEAR_DUP_WINDOW_DAYS join its story instead of being analysed again
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true"
+NEAR_DUP_WINDOW_DAYS = int(os.getenv("NEAR_DUP_WINDOW_DAYS", "14"))
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "8"))
+
+def article_rows(articles: List[Dict], query_filter: Optional[QueryFilter]) -> List[Dict]:
+    rows = []
+    for article in articles:
+        content = article_content(article)
+        # Filter by the job's compiled query, if any, before any DB work
+        if query_filter and not query_filter.matches(f"{article.get('title') or ''} {content['body_text']}"):
+            continue
+        rows.append({
+            "id": f"news-{uuid.uuid4().hex[:8]}",
+            "source": article['source'],
+            "external_id": article['link'],
+            "url": article['link'],
+            "title": article['title'],
+            "published_date": datetime.now(),
+            "processed": False,
+            **content
+        })
+    return rows
+
+async def publish_ingested(run_id: str, created_ids: List[str]):
+    # Wake the orchestrator instead of waiting for its reconciliation sweep
+    if not created_ids:
+        return
+    try:
+        await event_bus.publish_ids(DOCUMENT_INGESTED, created_ids, run_id=run_id)
+    except Exception as e:
+        logger.error(f"Failed to publish ingestion event for run {run_id}: {e}")
+
+async def crawl_attempt(run_id: str, job_id: str, checkpoint: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    One pass over the sources not checkpointed yet. Each source's documents,
+    feed state and checkpoint are committed together as soon as it arrives.
+    Returns this pass's per-source stats.
+    """
     # Summarizer removed - now handled by Insight Classification Service
-    ct_fetcher = ClinicalTrialsFetcher()
-    
+    ct_fetcher = ClinicalTrialsFetcher(http_client)
+
     async with AsyncSessionLocal() as session:
-        try:
-            job = await session.get(models.CrawlJob, job_id)
-            source_filter = job.source if job else "All"
-            query_filter = job.query if job else None
-            docs_created = 0
-            
-            # 1. Health & Research News Scraping
-            if source_filter in ["All", "ResearchNews"]:
-                scrapers = get_scrapers()
-                for scraper in scrapers:
-                    articles = await scraper.scrape()
-                    for article in articles:
-                        # Filter by query keywords if provided
-                        if query_filter:
-                            keywords = [kw.strip().lower() for kw in query_filter.split(",")]
-                            text = (article.get('title', '') + ' ' + article.get('content', '')).lower()
-                            if not any(kw in text for kw in keywords):
-                                continue
-                        # Check if already ingested (by link)
-                        exists = await session.execute(select(models.Document).where(models.Document.external_id == article['link']))
-                        if exists.scalar_one_or_none(): continue
-                        
-                        # Save as Document (single source of truth)
-                        doc_id = f"news-{uuid.uuid4().hex[:8]}"
-                        doc = models.Document(
-                            id=doc_id,
-                            source=article['source'],
-                            external_id=article['link'],
-                            url=article['link'],
-                            title=article['title'],
-                            raw_content=json.dumps(article, default=str), 
-                            published_date=datetime.now(),
-                            processed=False 
-                        )
-                        session.add(doc)
-                        docs_created += 1
+        job = await session.get(models.CrawlJob, job_id)
+        source_filter = job.source if job else "All"
+        query_filter = job.query if job else None
+        feed_states = await load_feed_states(session, job_id) if job else {}
+        trials_watermark = (job.trials_watermark if job else None) or initial_watermark(CT_SYNC_BACKFILL_DAYS)
+        story_index = None
+        if NEAR_DUP_ENABLED and source_filter in ["All", "ResearchNews"]:
+            story_index = await load_story_index(session, NEAR_DUP_WINDOW_DAYS, NEAR_DUP_MAX_DISTANCE)
+
+    try:
+        compiled_query = compile_query(query_filter)
+    except ValueError as e:
+        # Saved before queries were validated; fall back to matching it as one phrase
+        logger.warning(f"Invalid query for job {job_id} ({e}), matching it as a phrase")
+        compiled_query = compile_query('"' + query_filter.replace('"', " ") + '"')
+
+    def pending(name: str) -> bool:
+        return checkpoint.get(name, {}).get("status") != "ok"
 
+    # Fetch every pending source concurrently (no DB connection held while
+    # waiting), so the run takes as long as the slowest source
+    sources = {}
+    scrapers = get_scrapers(http_client, feed_states) if source_filter in ["All", "ResearchNews"] else []
+    scrapers = {scraper.source_name: scraper for scraper in scrapers if pending(scraper.source_name)}
+    for scraper in scrapers.values():
+        sources[scraper.source_name] = scraper.fetch_articles
+    trials_sync = None
+    if source_filter in ["All", "ClinicalTrials"] and pending(CLINICAL_TRIALS_SOURCE):
+        if job:
+            # Writes its own pages while the other sources are fetched
+            trials_sync = sync_trials(
+                ct_fetcher, AsyncSessionLocal, job_id, query_filter, trials_watermark,
+                CT_SYNC_PAGE_SIZE, CT_SYNC_MAX_PAGES, CT_SYNC_TIMEOUT
+            )
+        else:
+            sources[CLINICAL_TRIALS_SOURCE] = lambda: ct_fetcher.fetch_studies(query=query_filter, limit=10)
+
+    async def store(source_name: str, items: List[Dict], stat: Dict):
+        scraper = scrapers.get(source_name)
+        if scraper:
+            # 1. Health & Research News Scraping
+            rows = article_rows(items, compiled_query)
+            if scraper.feed_status:
+                stat["feed"] = scraper.feed_status
+        else:
             # 2. Clinical Trials Scraping
-            if source_filter in ["All", "ClinicalTrials"]:
-                studies = await ct_fetcher.fetch_recent_studies(query=query_filter, limit=10)
-                for study in studies:
-                     # Check exist
-                    exists = await session.execute(select(models.Document).where(models.Document.external_id == study['nctId']))
-                    if exists.scalar_one_or_none(): continue
-                    
-                    doc_id = f"ct-{uuid.uuid4().hex[:8]}"
-                    doc = models.Document(
-                        id=doc_id,
-                        source="ClinicalTrials",
-                        external_id=study['nctId'],
-                        url=study['url'],
-                        title=study['title'],
-                        raw_content=json.dumps(study),
-                        published_date=datetime.now(),
-                        processed=False 
-                    )
-                    session.add(doc)
-                    docs_created += 1
-            
-            # Update run status
-            run = await session.get(models.CrawlRun, run_id)
-            if run:
-                run.status = "COMPLETED"
-                run.finished_at = datetime.utcnow()
-                run.stats_json = {"documents_found": docs_created}
-            
+            rows = [study_row(study) for study in items]
+
+        # One existence query and one ON CONFLICT insert per source
+        async with AsyncSessionLocal() as session:
+            if scraper and story_index is not None:
+                # Syndicated copies are stored already processed under their story
+                inserted, skipped, stat["near_duplicates"] = await ingest_articles(session, story_index, rows)
+            else:
+                inserted, skipped = await ingest_documents(session, rows)
+            stat["created"] = len(inserted)
+            stat["duplicates"] = skipped
+            # Feed validators and watermarks advance with the documents, so a
+            # failure re-reads the entries that were not stored
+            if job and scraper and scraper.feed_status in ("unchanged", "changed"):
+                await save_feed_states(session, job_id, {scraper.rss_url: scraper.state})
+            await checkpoint_source(session, run_id, source_name, stat)
             await session.commit()
-            logger.info(f"Completed crawl run {run_id}. Created {docs_created} docs")
-        except Exception as e:
-            logger.error(f"Crawl failed: {e}")
-            await session.rollback()
+        duplicate_ids = {row["id"] for row in rows if row.get("processing_status") == STATUS_DUPLICATE}
+        await publish_ingested(run_id, [doc_id for doc_id in inserted if doc_id not in duplicate_ids])
+
+    fetch = fetch_sources(sources, CRAWL_SOURCE_TIMEOUT, CRAWL_MAX_CONCURRENT_SOURCES, on_result=store)
+    if not trials_sync:
+        _, source_stats = await fetch
+        return source_stats
+
+    (_, source_stats), (trial_ids, trial_stat) = await asyncio.gather(fetch, trials_sync)
+    # Pages are committed as they arrive, so publish whatever the sync stored
+    await publish_ingested(run_id, trial_ids)
+    if trial_stat["status"] == "ok":
+        async with AsyncSessionLocal() as session:
+            await checkpoint_source(session, run_id, CLINICAL_TRIALS_SOURCE, trial_stat)
+            await session.commit()
+    source_stats[CLINICAL_TRIALS_SOURCE] = trial_stat
+    return source_stats
+
+async def run_crawl_task(run_id: str, job_id: str):
+    """
+    Execute a crawl run durably. Sources are committed with their checkpoint
+    as they arrive; sources that failed are retried with backoff up to
+    CRAWL_RUN_MAX_ATTEMPTS, and the run always ends COMPLETED or FAILED.
+    A run interrupted by a restart is resumed from its checkpoint by
+    CrawlScheduler.recover().
+    """
+    started = time.perf_counter()
+    beat = asyncio.create_task(heartbeat(AsyncSessionLocal, run_id, CRAWL_RUN_HEARTBEAT_SECONDS))
+    try:
+        while True:
+            async with AsyncSessionLocal() as session:
+                attempt_state = await start_attempt(session, run_id)
+            if attempt_state is None:
+                logger.warning(f"Crawl run {run_id} is no longer STARTED, not running it")
+                return
+            attempt, checkpoint = attempt_state
+            logger.info(f"Starting crawl run {run_id} for job {job_id} (attempt {attempt}, {len(checkpoint)} sources done)")
+
+            error = None
+            try:
+                source_stats = await crawl_attempt(run_id, job_id, checkpoint)
+            except Exception as e:
+                logger.error(f"Crawl run {run_id} attempt {attempt} failed: {e}")
+                source_stats, error = {}, str(e)
+            failed = {name: stat for name, stat in source_stats.items() if stat["status"] != "ok"}
+            if (not error and not failed) or attempt >= CRAWL_RUN_MAX_ATTEMPTS:
+                break
+            delay = retry_delay(attempt, CRAWL_RUN_RETRY_BASE_SECONDS, CRAWL_RUN_RETRY_MAX_SECONDS)
+            logger.warning(f"Retrying crawl run {run_id} in {delay:.1f}s: {error or ', '.join(failed) + ' failed'}")
+            await asyncio.sleep(delay)
+
+        async with AsyncSessionLocal() as session:
+            run = await session.get(models.CrawlRun, run_id)
+            done = dict(run.checkpoint or {}) if run else {}
+            docs_created = sum(stat.get("created", 0) for stat in done.values())
+            if error or (failed and not done):
+                status = RUN_FAILED
+                error = error or f"All sources failed: {', '.join(failed)}"
+            else:
+                status = RUN_COMPLETED
+            stats = {
+                "documents_found": docs_created,
+                "sources": {**failed, **done},
+                "attempts": attempt,
+                "seconds": round(time.perf_counter() - started, 3)
+            }
+            await finish_run(session, run_id, status, stats, error)
+        logger.info(
+            f"Crawl run {run_id} {status.lower()} after {attempt} attempts. Created {docs_created} docs"
+            + (f" ({len(failed)} sources failed: {', '.join(failed)})" if failed else "")
+        )
+    finally:
+        beat.cancel()
+
+crawl_scheduler = CrawlScheduler(
+    AsyncSessionLocal,
+    run_crawl_task,
+    max_concurrent_runs=CRAWL_MAX_CONCURRENT_RUNS,
+    max_runs_per_source=CRAWL_MAX_RUNS_PER_SOURCE,
+    jitter_seconds=CRAWL_SCHEDULE_JITTER_SECONDS,
+    stale_after_seconds=CRAWL_RUN_STALE_SECONDS,
+    max_attempts=CRAWL_RUN_MAX_ATTEMPTS,
+    heartbeat_seconds=CRAWL_RUN_HEARTBEAT_SECONDS
+)
+
+@app.get("/api/crawl/scheduler")
+async def scheduler_stats():
+    return crawl_scheduler.stats()
 
 @app.post("/api/crawl/run", response_model=schemas.CrawlRunResponse)
-async def trigger_crawl_run(job_id: str, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+async def trigger_crawl_run(job_id: str, db: AsyncSession = Depends(get_db)):
     # Verify job exists
     result = await db.execute(select(models.CrawlJob).where(models.CrawlJob.id == job_id))
     job = result.scalar_one_or_none()
     if not job:
          raise HTTPException(status_code=404, detail="Job not found")
+    if await has_active_run(db, job_id, CRAWL_RUN_STALE_SECONDS):
+        raise HTTPException(status_code=409, detail="A run of this job is already in progress")
 
     new_run = models.CrawlRun(
         job_id=job_id,
@@ -184,11 +397,59 @@ async def trigger_crawl_run(job_id: str, background_tasks: BackgroundTasks, db:
     await db.commit()
     await db.refresh(new_run)
     
-    background_tasks.add_task(run_crawl_task, new_run.id, job_id)
-    
+    # Same pool as scheduled runs, so manual triggers respect the concurrency caps
+    crawl_scheduler.dispatch(new_run.id, job_id, job.source)
+
     return new_run
 
-@app.get("/api/crawl/documents", response_model=list[schemas.DocumentResponse])
-async def list_documents(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(models.Document).order_by(models.Document.ingested_at.desc()))
-    return result.scalars().all()
+DOCUMENTS_PAGE_MAX = int(os.getenv("DOCUMENTS_PAGE_MAX", "1000"))
+DOCUMENTS_EXPORT_BATCH = int(os.getenv("DOCUMENTS_EXPORT_BATCH", "1000"))
+
+@app.get("/api/crawl/documents")
+async def list_documents(
+    response: Response,
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    source: Optional[str] = None,
+    processed: Optional[bool] = None,
+    ingested_from: Optional[datetime] = None,
+    ingested_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Newest documents first, keyset-paginated: pass the X-Next-Cursor header of
+    a page as `cursor` to get the next one. `fields` selects a subset of
+    columns; the heavy payload and bodyText (and the trial fields) are only
+    returned when listed. `format=ndjson` streams every matching document
+    instead of one page.
+    """
+    filters = DocumentFilters(source, processed, ingested_from, ingested_to)
+    try:
+        projection = parse_fields(fields)
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(
+            export_ndjson(AsyncSessionLocal, projection, filters, DOCUMENTS_EXPORT_BATCH),
+            media_type="application/x-ndjson"
+        )
+
+    items, next_cursor = await fetch_page(db, projection, filters, cursor, min(limit, DOCUMENTS_PAGE_MAX))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+@app.get("/api/crawl/documents/count")
+async def count_crawl_documents(
+    source: Optional[str] = None,
+    processed: Optional[bool] = None,
+    ingested_from: Optional[datetime] = None,
+    ingested_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    return {"count": await count_documents(db, DocumentFilters(source, processed, ingested_from, ingested_to))}
@@ -0,0 +1,98 @@
+import logging
+
+from sqlalchemy import bindparam, null, select, text, update
+
+from . import models
+from .content import legacy_content
+
+logger = logging.getLogger("crawler-service")
+
+# create_all only creates missing tables, so columns and indexes added to
+# existing tables are listed here. Every statement must be idempotent.
+SCHEMA_UPGRADES = [
+    # Orchestrator claim/lease columns (see services/orchestrator/src/claims.py)
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS processing_status VARCHAR DEFAULT 'PENDING'",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS claimed_by VARCHAR",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0",
+    "UPDATE documents SET processing_status = 'DONE' WHERE processed = true AND processing_status = 'PENDING'",
+    "CREATE INDEX IF NOT EXISTS ix_documents_claimable ON documents (processing_status, lease_expires_at) WHERE processed = false",
+    # Incremental ClinicalTrials.gov sync (see services/crawler/src/trials.py)
+    "ALTER TABLE crawl_jobs ADD COLUMN IF NOT EXISTS trials_watermark VARCHAR",
+    # Cron scheduler (see services/crawler/src/scheduler.py)
+    "ALTER TABLE crawl_jobs ADD COLUMN IF NOT EXISTS next_run_at TIMESTAMP",
+    # Durable crawl runs (see services/crawler/src/runs.py)
+    "ALTER TABLE crawl_runs ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0",
+    "ALTER TABLE crawl_runs ADD COLUMN IF NOT EXISTS checkpoint JSON",
+    "ALTER TABLE crawl_runs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP",
+    "ALTER TABLE crawl_runs ADD COLUMN IF NOT EXISTS error VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_crawl_runs_started ON crawl_runs (job_id) WHERE status = 'STARTED'",
+    # Keyset pagination of /api/crawl/documents (see services/crawler/src/documents.py)
+    "CREATE INDEX IF NOT EXISTS ix_documents_ingested ON documents (ingested_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_source_ingested ON documents (source, ingested_at, id)",
+    # Rows with no ingested_at cannot be paged by it
+    "UPDATE documents SET ingested_at = COALESCE(published_date, now() AT TIME ZONE 'utc') WHERE ingested_at IS NULL",
+    # Typed document content (see services/crawler/src/content.py)
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS payload JSONB",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS body_text TEXT",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS sponsor VARCHAR",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS trial_status VARCHAR",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS last_update VARCHAR",
+    "ALTER TABLE documents ALTER COLUMN payload SET COMPRESSION lz4",
+    "ALTER TABLE documents ALTER COLUMN body_text SET COMPRESSION lz4",
+    # Near-duplicate detection (see services/crawler/src/near_dup.py)
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS simhash BIGINT",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS story_id VARCHAR",
+]
+
+async def upgrade_schema(conn):
+    for statement in SCHEMA_UPGRADES:
+        await conn.execute(text(statement))
+
+async def backfill_content(session_factory, batch_size: int = 500) -> int:
+    """
+    Move legacy raw_content rows to the typed columns, a batch per
+    transaction, and clear raw_content so its TOAST space can be reclaimed.
+    Rows are locked with SKIP LOCKED, so replicas starting together split the
+    work. Returns the number of rows converted.
+    """
+    Document = models.Document
+    table = Document.__table__
+    converted = 0
+    try:
+        while True:
+            async with session_factory() as session:
+                result = await session.execute(
+                    select(Document.id, Document.source, Document.raw_content)
+                    .where(Document.payload == None, Document.raw_content != None)
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                params = []
+                for doc_id, source, raw_content in rows:
+                    content = {"sponsor": None, "trial_status": None, "last_update": None, **legacy_content(source, raw_content)}
+                    params.append({"b_id": doc_id, **{f"b_{key}": value for key, value in content.items()}})
+                # One executemany UPDATE for the whole batch
+                await session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("b_id"))
+                    .values(
+                        payload=bindparam("b_payload"),
+                        body_text=bindparam("b_body_text"),
+                        sponsor=bindparam("b_sponsor"),
+                        trial_status=bindparam("b_trial_status"),
+                        last_update=bindparam("b_last_update"),
+                        raw_content=null()
+                    ),
+                    params
+                )
+                await session.commit()
+            converted += len(rows)
+    except Exception as e:
+        logger.error(f"Content backfill stopped after {converted} documents: {e}")
+    if converted:
+        logger.info(f"Moved {converted} documents from raw_content to typed content")
+    return converted
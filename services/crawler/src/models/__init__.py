@@ -1,2 +1,3 @@
 from .job import CrawlJob, CrawlRun
 from .document import Document
+from .feed_state import FeedState
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, BigInteger, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from ..database import Base
 from datetime import datetime
 import uuid
@@ -12,6 +13,33 @@ class Document(Base):
     url = Column(String)
     published_date = Column(DateTime)
     title = Column(String)
-    raw_content = Column(Text) # JSON string or raw text
+    raw_content = Column(Text) # Legacy JSON string; moved to payload by migrations.backfill_content
+    # Typed content (see services/crawler/src/content.py)
+    payload = Column(JSONB) # Source article/study as scraped
+    body_text = Column(Text) # Clean text the orchestrator analyses
+    sponsor = Column(String)
+    trial_status = Column(String)
+    last_update = Column(String) # YYYY-MM-DD
+    # Near-duplicate detection (see services/crawler/src/near_dup.py)
+    simhash = Column(BigInteger)
+    story_id = Column(String) # ID of the first document of the story; its own ID for originals
     processed = Column(Boolean, default=False)
     ingested_at = Column(DateTime, default=datetime.utcnow)
+
+    # Orchestrator work claiming: PENDING, CLAIMED, DONE, FAILED
+    processing_status = Column(String, default="PENDING")
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index(
+            "ix_documents_claimable",
+            "processing_status",
+            "lease_expires_at",
+            postgresql_where=(processed == False)
+        ),
+        # Keyset pagination of /api/crawl/documents, newest first
+        Index("ix_documents_ingested", "ingested_at", "id"),
+        Index("ix_documents_source_ingested", "source", "ingested_at", "id"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, JSON, ForeignKey
+from ..database import Base
+from datetime import datetime
+
+class FeedState(Base):
+    """Conditional-request validators and seen entries per (job, feed)."""
+    __tablename__ = "feed_states"
+
+    job_id = Column(String, ForeignKey("crawl_jobs.id", ondelete="CASCADE"), primary_key=True)
+    feed_url = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String)
+    seen_ids = Column(JSON) # GUIDs/links of the most recent entries, newest first
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, JSON, ForeignKey, Integer, Index
 from ..database import Base
 from datetime import datetime
 import uuid
@@ -12,6 +12,8 @@ class CrawlJob(Base):
     schedule = Column(String) # Cron expression
     enabled = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    next_run_at = Column(DateTime) # Next scheduled run, cron fire time plus jitter
+    trials_watermark = Column(String) # ClinicalTrials.gov LastUpdatePostDate (YYYY-MM-DD) synced up to
 
 class CrawlRun(Base):
     __tablename__ = "crawl_runs"
@@ -22,3 +24,12 @@ class CrawlRun(Base):
     started_at = Column(DateTime, default=datetime.utcnow)
     finished_at = Column(DateTime)
     stats_json = Column(JSON)
+    # Durable execution (see services/crawler/src/runs.py)
+    attempts = Column(Integer, default=0)
+    checkpoint = Column(JSON) # source name -> stats of the sources already stored
+    heartbeat_at = Column(DateTime)
+    error = Column(String)
+
+    __table_args__ = (
+        Index("ix_crawl_runs_started", "job_id", postgresql_where=(status == "STARTED")),
+    )
@@ -0,0 +1,139 @@
+"""
+Near-duplicate detection for news articles.
+
+The same story is syndicated across feeds under different URLs, so exact
+external_id dedup lets every copy through. Each article gets a 64-bit SimHash
+of its normalized title and body shingles, stored in `documents.simhash`.
+Articles within `max_distance` bits of an earlier one join its story
+(`documents.story_id`) and are stored as already processed, so they get no
+LLM call, insight or notification of their own.
+
+Lookups use banded LSH: the hash is split into `max_distance + 1` bands, and
+two hashes within `max_distance` bits must agree on at least one band
+(pigeonhole), so only articles sharing a band are compared.
+"""
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from . import models
+from .ingest import existing_external_ids, ingest_documents
+
+HASH_BITS = 64
+SHINGLE_SIZE = 3
+STATUS_DUPLICATE = "DUPLICATE"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+def simhash(text: str) -> Optional[int]:
+    """Signed 64-bit SimHash (fits a BIGINT), or None for text without words."""
+    features = shingles(text)
+    if not features:
+        return None
+    # Bit i of the result is set when most feature hashes have it set; the
+    # per-bit vote is counted over columns of the hashes' binary strings.
+    digests = [format(int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big"), "064b") for f in features]
+    unsigned = int("".join("1" if column.count("1") * 2 > len(digests) else "0" for column in zip(*digests)), 2)
+    return unsigned - (1 << HASH_BITS) if unsigned >= 1 << (HASH_BITS - 1) else unsigned
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & ((1 << HASH_BITS) - 1)).bit_count()
+
+class StoryIndex:
+    """In-memory banded LSH index of SimHashes -> story IDs."""
+
+    def __init__(self, max_distance: int = 8):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = HASH_BITS // self.bands
+        self._buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(self.bands)]
+        self.size = 0
+
+    def _keys(self, value: int) -> Iterable[Tuple[int, int]]:
+        unsigned = value & ((1 << HASH_BITS) - 1)
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, unsigned >> (band * self.band_bits) & mask
+
+    def add(self, value: int, story_id: str):
+        for band, key in self._keys(value):
+            self._buckets[band].setdefault(key, []).append((value, story_id))
+        self.size += 1
+
+    def find(self, value: int) -> Optional[str]:
+        """Story of the closest indexed hash within max_distance, if any."""
+        best = None
+        for band, key in self._keys(value):
+            for candidate, story_id in self._buckets[band].get(key, ()):
+                distance = hamming(value, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, story_id)
+        return best[1] if best else None
+
+    def assign(self, rows: List[Dict]) -> int:
+        """
+        Set simhash and story_id on article rows (built by article_rows()),
+        marking near-duplicates of indexed or earlier rows as processed.
+        New stories are not indexed until remember() is called with the IDs
+        that were actually stored. Returns the number of near-duplicates.
+        """
+        batch = StoryIndex(self.max_distance)
+        duplicates = 0
+        for row in rows:
+            value = simhash(f"{row.get('title') or ''} {row.get('body_text') or ''}")
+            story_id = (self.find(value) or batch.find(value)) if value is not None else None
+            row["simhash"] = value
+            if story_id:
+                row["story_id"] = story_id
+                row["processed"] = True
+                row["processing_status"] = STATUS_DUPLICATE
+                duplicates += 1
+            else:
+                row["story_id"] = row["id"]
+                row["processing_status"] = "PENDING"
+                if value is not None:
+                    batch.add(value, row["id"])
+        return duplicates
+
+    def remember(self, rows: List[Dict], inserted_ids: Iterable[str]):
+        """Index the new stories among assigned `rows` that were inserted."""
+        inserted_ids = set(inserted_ids)
+        for row in rows:
+            if row["id"] in inserted_ids and row["story_id"] == row["id"] and row["simhash"] is not None:
+                self.add(row["simhash"], row["id"])
+
+async def load_story_index(session, window_days: int, max_distance: int) -> StoryIndex:
+    """Index of the articles ingested in the last `window_days`."""
+    index = StoryIndex(max_distance)
+    Document = models.Document
+    result = await session.execute(
+        select(Document.simhash, Document.story_id)
+        .where(Document.ingested_at > datetime.utcnow() - timedelta(days=window_days), Document.simhash != None)
+    )
+    for value, story_id in result.all():
+        index.add(value, story_id)
+    return index
+
+async def ingest_articles(session, index: StoryIndex, rows: List[Dict]) -> Tuple[List[str], int, int]:
+    """
+    ingest_documents() for article rows, clustered into stories first.
+    Articles already stored are dropped before assign(), and only inserted
+    stories are indexed, so no row joins a story whose ID was never stored.
+
+    Returns the inserted IDs, the number skipped and the near-duplicates.
+    """
+    existing = await existing_external_ids(session, (row["external_id"] for row in rows))
+    new_rows = [row for row in rows if row["external_id"] not in existing]
+    duplicates = index.assign(new_rows)
+    inserted, skipped = await ingest_documents(session, new_rows)
+    index.remember(new_rows, inserted)
+    return inserted, skipped + len(rows) - len(new_rows), duplicates
@@ -0,0 +1,199 @@
+"""
+Crawl job query filters.
+
+A job's query is compiled once into a boolean expression over its terms and,
+for large queries, one Aho-Corasick automaton over all of them, so each
+article is checked in one pass over its text however many terms there are.
+
+Syntax (operators are upper case; anything else is text):
+    Oncology, FDA, AstraZeneca        commas are OR, as before
+    breast cancer                     adjacent words form a phrase
+    "phase 3" AND (Pfizer OR Merck)   quoted phrases, AND/OR, parentheses
+    KRAS NOT review                   NOT excludes; a bare NOT binds to the
+                                      next term and ANDs with what precedes it
+    oncolog*                          trailing * matches any word ending
+
+Terms match case-insensitively on word boundaries, with whitespace collapsed.
+"""
+import re
+from functools import lru_cache
+from typing import Iterator, List, Optional, Set, Tuple
+
+from libs.shared.src.text_matching import KeywordAutomaton
+
+TOKEN_RE = re.compile(r'\s*(?:([(),])|"([^"]*)"?|([^\s(),"]+))')
+SCAN_MAX_TERMS = 300
+OPERATORS = {"AND", "OR", "NOT"}
+
+Node = Tuple  # ("term", id) | ("not", node) | ("and", [nodes]) | ("or", [nodes])
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+class QueryFilter:
+    def __init__(self, query: str, scan_max_terms: int = SCAN_MAX_TERMS):
+        self.query = query
+        self._terms: List[Tuple[str, bool]] = []  # (text, prefix)
+        self._tokens = self._tokenize(query)
+        self._pos = 0
+        expression = self._parse_or()
+        if self._pos < len(self._tokens):
+            raise ValueError(f"Unexpected {self._tokens[self._pos][1]!r}")
+        if expression is None:
+            raise ValueError("Query has no terms")
+        self.expression = expression
+        # A plain list of alternatives can stop at the first match
+        self._any = expression[0] == "term" or (
+            expression[0] == "or" and all(node[0] == "term" for node in expression[1])
+        )
+        # Up to a few hundred terms, one str.find() scan each is faster than
+        # the pure-Python automaton; past that a single pass over the text wins
+        # (see benchmarks/bench_query_filter.py)
+        self._automaton: Optional[KeywordAutomaton] = None
+        if len(self._terms) > scan_max_terms:
+            self._automaton = KeywordAutomaton(word_boundary=False)
+            for term_id, (term, _) in enumerate(self._terms):
+                self._automaton.add(term, term_id)
+            self._automaton.build()
+
+    @staticmethod
+    def _tokenize(query: str) -> List[Tuple[str, str]]:
+        tokens = []
+        phrase: List[str] = []
+
+        def flush():
+            if phrase:
+                tokens.append(("term", " ".join(phrase)))
+                phrase.clear()
+
+        for punct, quoted, word in TOKEN_RE.findall(query):
+            if word and word not in OPERATORS:
+                phrase.append(word)
+                continue
+            flush()
+            if punct:
+                tokens.append(("op", punct))
+            elif word:
+                tokens.append(("op", word))
+            elif normalize(quoted):
+                tokens.append(("term", quoted))
+        flush()
+        return tokens
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _parse_or(self) -> Optional[Node]:
+        nodes = []
+        while True:
+            node = self._parse_and()
+            if node is not None:
+                nodes.append(node)
+            token = self._peek()
+            if token in (("op", ","), ("op", "OR")):
+                self._pos += 1
+                continue
+            break
+        if not nodes:
+            return None
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def _parse_and(self) -> Optional[Node]:
+        nodes = []
+        while True:
+            token = self._peek()
+            if token == ("op", "AND"):
+                if not nodes:
+                    raise ValueError("AND without a left operand")
+                self._pos += 1
+                nodes.append(self._require(self._parse_not()))
+            elif token == ("op", "NOT") or (token and token[0] == "term") or token == ("op", "("):
+                # Implicit AND: "KRAS NOT review", "(a OR b) c"
+                nodes.append(self._parse_not())
+            else:
+                break
+        if not nodes:
+            return None
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def _parse_not(self) -> Optional[Node]:
+        token = self._peek()
+        if token == ("op", "NOT"):
+            self._pos += 1
+            return ("not", self._require(self._parse_not()))
+        if token == ("op", "("):
+            self._pos += 1
+            node = self._require(self._parse_or())
+            if self._peek() != ("op", ")"):
+                raise ValueError("Unbalanced parentheses")
+            self._pos += 1
+            return node
+        if token and token[0] == "term":
+            self._pos += 1
+            return ("term", self._add_term(token[1]))
+        return None
+
+    @staticmethod
+    def _require(node: Optional[Node]) -> Node:
+        if node is None:
+            raise ValueError("Operator without an operand")
+        return node
+
+    def _add_term(self, text: str) -> int:
+        text = normalize(text)
+        prefix = text.endswith("*")
+        text = text.rstrip("*").rstrip()
+        if not text:
+            raise ValueError("Empty term")
+        self._terms.append((text, prefix))
+        return len(self._terms) - 1
+
+    def _on_boundary(self, text: str, start: int, end: int, term_id: int) -> bool:
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        return self._terms[term_id][1] or end == len(text) or not text[end].isalnum()
+
+    def _scan(self, text: str) -> Iterator[int]:
+        if self._automaton:
+            for start, end, _, term_id in self._automaton.iter_matches(text):
+                if self._on_boundary(text, start, end, term_id):
+                    yield term_id
+            return
+        for term_id, (term, _) in enumerate(self._terms):
+            start = text.find(term)
+            while start != -1:
+                if self._on_boundary(text, start, start + len(term), term_id):
+                    yield term_id
+                    break
+                start = text.find(term, start + 1)
+
+    def _matched(self, text: str) -> Set[int]:
+        matched = set()
+        for term_id in self._scan(text):
+            matched.add(term_id)
+            if self._any:
+                break
+        return matched
+
+    def _evaluate(self, node: Node, matched: Set[int]) -> bool:
+        kind = node[0]
+        if kind == "term":
+            return node[1] in matched
+        if kind == "not":
+            return not self._evaluate(node[1], matched)
+        if kind == "and":
+            return all(self._evaluate(child, matched) for child in node[1])
+        return any(self._evaluate(child, matched) for child in node[1])
+
+    def matches(self, text: str) -> bool:
+        return self._evaluate(self.expression, self._matched(normalize(text)))
+
+@lru_cache(maxsize=256)
+def compile_query(query: Optional[str]) -> Optional[QueryFilter]:
+    """
+    Compiled filter for a job query, cached so scheduled runs of the same job
+    reuse it; None when the query is empty. Raises ValueError on bad syntax.
+    """
+    if not query or not query.strip():
+        return None
+    return QueryFilter(query)
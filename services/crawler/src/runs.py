@@ -0,0 +1,108 @@
+"""
+Durable state for crawl runs.
+
+A run records a checkpoint per source in `crawl_runs.checkpoint`, committed
+in the same transaction as that source's documents. A retried or recovered
+run skips the sources already checkpointed as "ok". `heartbeat_at` is bumped
+at each checkpoint and by heartbeat() while the run waits for a slot and
+executes. A STARTED run whose heartbeat (or start) is older than the stale
+threshold belongs to a dead worker, and any replica may claim it with SKIP
+LOCKED and resume it.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+
+from . import models
+
+logger = logging.getLogger("crawler-service")
+
+RUN_STARTED = "STARTED"
+RUN_COMPLETED = "COMPLETED"
+RUN_FAILED = "FAILED"
+
+def retry_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+def last_alive():
+    return func.coalesce(models.CrawlRun.heartbeat_at, models.CrawlRun.started_at)
+
+async def start_attempt(session, run_id: str) -> Optional[Tuple[int, Dict]]:
+    """Count a new attempt and return (attempt, checkpoint), or None if the run is gone or finished."""
+    run = await session.get(models.CrawlRun, run_id)
+    if not run or run.status != RUN_STARTED:
+        return None
+    run.attempts = (run.attempts or 0) + 1
+    run.heartbeat_at = datetime.utcnow()
+    await session.commit()
+    return run.attempts, dict(run.checkpoint or {})
+
+async def checkpoint_source(session, run_id: str, source: str, stat: Dict):
+    """Record a source as stored; the caller commits it with the source's documents."""
+    run = await session.get(models.CrawlRun, run_id)
+    if run:
+        # Reassign so the JSON column is flagged dirty
+        run.checkpoint = {**(run.checkpoint or {}), source: stat}
+        run.heartbeat_at = datetime.utcnow()
+
+async def heartbeat(session_factory, run_id: str, interval: float):
+    """Keep the run's heartbeat fresh until cancelled, so it is not taken for stale."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await session.execute(
+                    update(models.CrawlRun)
+                    .where(models.CrawlRun.id == run_id, models.CrawlRun.status == RUN_STARTED)
+                    .values(heartbeat_at=datetime.utcnow())
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Heartbeat for crawl run {run_id} failed: {e}")
+
+async def finish_run(session, run_id: str, status: str, stats: Dict, error: Optional[str] = None):
+    run = await session.get(models.CrawlRun, run_id)
+    if run:
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        run.stats_json = stats
+        run.error = error[:500] if error else None
+    await session.commit()
+
+async def claim_stale_runs(
+    session, limit: int, stale_after_seconds: float, max_attempts: int
+) -> Tuple[List[Tuple[str, str, str]], int]:
+    """
+    Claim up to `limit` STARTED runs whose worker stopped heartbeating and
+    commit. Runs with attempts left are returned as (run_id, job_id, source)
+    to resume; the rest are marked FAILED. Returns the claimed runs and the
+    number failed.
+    """
+    now = datetime.utcnow()
+    CrawlRun = models.CrawlRun
+    result = await session.execute(
+        select(CrawlRun, models.CrawlJob.source)
+        .outerjoin(models.CrawlJob, models.CrawlJob.id == CrawlRun.job_id)
+        .where(CrawlRun.status == RUN_STARTED, last_alive() < now - timedelta(seconds=stale_after_seconds))
+        .order_by(CrawlRun.started_at)
+        .limit(limit)
+        .with_for_update(of=CrawlRun, skip_locked=True)
+    )
+
+    claimed, failed = [], 0
+    for run, source in result.all():
+        if (run.attempts or 0) >= max_attempts or source is None:
+            run.status = RUN_FAILED
+            run.finished_at = now
+            run.error = "Abandoned by its worker after the last attempt" if source else "Job no longer exists"
+            failed += 1
+            continue
+        run.heartbeat_at = now
+        claimed.append((run.id, run.job_id, source))
+    await session.commit()
+    return claimed, failed
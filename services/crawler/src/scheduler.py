@@ -0,0 +1,203 @@
+"""
+Cron scheduling for crawl jobs.
+
+Every replica ticks on an interval. A tick claims enabled jobs whose
+`next_run_at` has passed with `FOR UPDATE SKIP LOCKED`, so two replicas never
+claim the same job. In the same transaction it creates the CrawlRun and moves
+`next_run_at` to the next cron fire time plus a random jitter. A job whose
+previous run is still going is skipped until its next fire time instead of
+overlapping it.
+
+Claimed runs go to an in-process worker pool with a global cap and a cap per
+job source. A replica only claims as many jobs as it has free slots. The same
+pool resumes runs whose worker died (see runs.py). A run waiting for a slot
+heartbeats too, so no replica takes it for stale and starts it a second time.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import or_, select
+
+from . import models
+from .runs import RUN_STARTED, claim_stale_runs, heartbeat, last_alive
+
+logger = logging.getLogger("crawler-service")
+
+RunTask = Callable[[str, str], Awaitable[None]]
+
+def parse_schedule(schedule: str) -> CronTrigger:
+    """Parse a 5-field crontab expression. Raises ValueError if it is invalid."""
+    return CronTrigger.from_crontab(schedule, timezone=timezone.utc)
+
+def next_fire_time(schedule: str, after: datetime, jitter_seconds: float = 0) -> datetime:
+    """Next fire time (naive UTC, like the rest of the schema) strictly after `after`."""
+    trigger = parse_schedule(schedule)
+    fire = trigger.get_next_fire_time(None, after.replace(tzinfo=timezone.utc) + timedelta(seconds=1))
+    return fire.replace(tzinfo=None) + timedelta(seconds=random.uniform(0, jitter_seconds))
+
+async def has_active_run(session, job_id: str, stale_after_seconds: float) -> bool:
+    """Whether the job has a run whose worker heartbeated recently enough to still be going."""
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+    result = await session.execute(
+        select(models.CrawlRun.id)
+        .where(
+            models.CrawlRun.job_id == job_id,
+            models.CrawlRun.status == RUN_STARTED,
+            last_alive() > cutoff
+        )
+        .limit(1)
+    )
+    return result.scalar_one_or_none() is not None
+
+async def claim_due_jobs(
+    session, limit: int, jitter_seconds: float, stale_after_seconds: float
+) -> List[Tuple[str, str, str]]:
+    """
+    Claim up to `limit` due jobs and commit. Returns (run_id, job_id, source)
+    for each run created. Jobs without a `next_run_at` yet only get one.
+    """
+    now = datetime.utcnow()
+    CrawlJob = models.CrawlJob
+    result = await session.execute(
+        select(CrawlJob)
+        .where(
+            CrawlJob.enabled == True,
+            CrawlJob.schedule != None,
+            or_(CrawlJob.next_run_at == None, CrawlJob.next_run_at <= now)
+        )
+        .order_by(CrawlJob.next_run_at.nulls_first())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+    claimed = []
+    for job in result.scalars().all():
+        try:
+            next_run_at = next_fire_time(job.schedule, now, jitter_seconds)
+        except ValueError as e:
+            logger.warning(f"Crawl job {job.id} has an invalid schedule {job.schedule!r}: {e}")
+            job.next_run_at = now + timedelta(days=1)
+            continue
+
+        due = job.next_run_at is not None
+        job.next_run_at = next_run_at
+        if not due:
+            continue
+        if await has_active_run(session, job.id, stale_after_seconds):
+            logger.info(f"Skipping scheduled run of job {job.id}: previous run still in progress")
+            continue
+
+        run = models.CrawlRun(job_id=job.id, status=RUN_STARTED)
+        session.add(run)
+        await session.flush()
+        claimed.append((run.id, job.id, job.source))
+
+    await session.commit()
+    return claimed
+
+class CrawlScheduler:
+    """Ticks the cron schedule and runs claimed crawl runs in a bounded pool."""
+
+    def __init__(
+        self,
+        session_factory,
+        run_task: RunTask,
+        max_concurrent_runs: int = 2,
+        max_runs_per_source: int = 1,
+        jitter_seconds: float = 60,
+        stale_after_seconds: float = 3600,
+        max_attempts: int = 3,
+        heartbeat_seconds: float = 30
+    ):
+        self.session_factory = session_factory
+        self.run_task = run_task
+        self.max_concurrent_runs = max(1, max_concurrent_runs)
+        self.max_runs_per_source = max(1, max_runs_per_source)
+        self.jitter_seconds = jitter_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.max_attempts = max_attempts
+        self.heartbeat_seconds = heartbeat_seconds
+        self._slots = asyncio.Semaphore(self.max_concurrent_runs)
+        self._source_slots: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.runs_started = 0
+        self.runs_failed = 0
+        self.runs_recovered = 0
+        self.runs_abandoned = 0
+
+    def _source_slot(self, source: str) -> asyncio.Semaphore:
+        if source not in self._source_slots:
+            self._source_slots[source] = asyncio.Semaphore(self.max_runs_per_source)
+        return self._source_slots[source]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def dispatch(self, run_id: str, job_id: str, source: Optional[str]) -> asyncio.Task:
+        """Queue a run on the pool; it starts once a global and a source slot are free."""
+        task = asyncio.create_task(self._run(run_id, job_id, source or "All"))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, run_id: str, job_id: str, source: str):
+        # The run is claimed from dispatch on; run_task heartbeats once it starts
+        beat = asyncio.create_task(heartbeat(self.session_factory, run_id, self.heartbeat_seconds))
+        try:
+            async with self._slots, self._source_slot(source):
+                beat.cancel()
+                self.runs_started += 1
+                try:
+                    await self.run_task(run_id, job_id)
+                except Exception as e:
+                    self.runs_failed += 1
+                    logger.error(f"Crawl run {run_id} for job {job_id} failed: {e}")
+        finally:
+            beat.cancel()
+
+    async def tick(self) -> int:
+        """Claim and dispatch due jobs. Returns the number of runs dispatched."""
+        free = self.max_concurrent_runs - self.in_flight
+        if free <= 0:
+            return 0
+        async with self.session_factory() as session:
+            claimed = await claim_due_jobs(session, free, self.jitter_seconds, self.stale_after_seconds)
+        for run_id, job_id, source in claimed:
+            logger.info(f"Scheduled crawl run {run_id} for job {job_id}")
+            self.dispatch(run_id, job_id, source)
+        return len(claimed)
+
+    async def recover(self) -> int:
+        """Resume STARTED runs whose worker stopped heartbeating. Returns the number dispatched."""
+        free = self.max_concurrent_runs - self.in_flight
+        if free <= 0:
+            return 0
+        async with self.session_factory() as session:
+            claimed, failed = await claim_stale_runs(session, free, self.stale_after_seconds, self.max_attempts)
+        self.runs_abandoned += failed
+        for run_id, job_id, source in claimed:
+            logger.info(f"Resuming stale crawl run {run_id} for job {job_id}")
+            self.dispatch(run_id, job_id, source)
+        self.runs_recovered += len(claimed)
+        return len(claimed)
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "inFlight": self.in_flight,
+            "runsStarted": self.runs_started,
+            "runsFailed": self.runs_failed,
+            "runsRecovered": self.runs_recovered,
+            "runsAbandoned": self.runs_abandoned,
+            "maxConcurrentRuns": self.max_concurrent_runs,
+            "maxRunsPerSource": self.max_runs_per_source
+        }
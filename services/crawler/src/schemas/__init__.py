@@ -1,2 +1 @@
 from .job import CrawlJobCreate, CrawlJobUpdate, CrawlJobResponse, CrawlRunResponse
-from .document import DocumentResponse
@@ -17,6 +17,7 @@ class CrawlJobUpdate(BaseModel):
 class CrawlJobResponse(CrawlJobCreate):
     id: str
     created_at: datetime = Field(serialization_alias="createdAt")
+    next_run_at: Optional[datetime] = Field(None, serialization_alias="nextRunAt")
 
     class Config:
         from_attributes = True
@@ -27,6 +28,8 @@ class CrawlRunResponse(BaseModel):
     status: str
     started_at: datetime = Field(serialization_alias="startedAt")
     finished_at: Optional[datetime] = Field(serialization_alias="finishedAt")
+    attempts: Optional[int] = None
+    error: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("crawler-service")
+
+Fetcher = Callable[[], Awaitable[List[Dict]]]
+ResultHandler = Callable[[str, List[Dict], Dict], Awaitable[None]]
+
+async def fetch_sources(
+    sources: Dict[str, Fetcher], timeout: float, max_concurrency: int, on_result: Optional[ResultHandler] = None
+) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict]]:
+    """
+    Fetch all sources concurrently, at most `max_concurrency` at a time.
+
+    Each source gets `timeout` seconds once it starts. A source that times out
+    or fails contributes no items but does not affect the others. Returns the
+    items per source and per-source stats (status, items, seconds, error).
+
+    `on_result(name, items, stat)` is awaited for each successful source as
+    soon as it arrives, outside the concurrency slot; if it raises, the
+    source is reported as failed.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch_one(name: str, fetch: Fetcher):
+        async with semaphore:
+            started = time.perf_counter()
+            stat = {"status": "ok"}
+            try:
+                items = await asyncio.wait_for(fetch(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Source {name} timed out after {timeout}s")
+                items, stat = [], {"status": "timeout"}
+            except Exception as e:
+                logger.error(f"Source {name} failed: {e}")
+                items, stat = [], {"status": "error", "error": str(e)[:200]}
+            stat["items"] = len(items)
+            stat["seconds"] = round(time.perf_counter() - started, 3)
+        if on_result and stat["status"] == "ok":
+            try:
+                await on_result(name, items, stat)
+            except Exception as e:
+                logger.error(f"Storing source {name} failed: {e}")
+                stat.update(status="error", error=str(e)[:200])
+        return name, items, stat
+
+    results = await asyncio.gather(*(fetch_one(name, fetch) for name, fetch in sources.items()))
+    return {name: items for name, items, _ in results}, {name: stat for name, _, stat in results}
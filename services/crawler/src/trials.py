@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import bindparam, select, update
+
+from . import models
+from .content import study_content
+from .ingest import ingest_documents
+
+logger = logging.getLogger("crawler-service")
+
+def study_row(study: Dict) -> Dict:
+    return {
+        "id": f"ct-{uuid.uuid4().hex[:8]}",
+        "source": "ClinicalTrials",
+        "external_id": study['nctId'],
+        "url": study['url'],
+        "title": study['title'],
+        "published_date": datetime.now(),
+        "processed": False,
+        **study_content(study)
+    }
+
+# Study columns a newer lastUpdate overwrites on a stored trial
+REFRESH_COLUMNS = ["url", "title", "payload", "body_text", "sponsor", "trial_status", "last_update"]
+
+async def refresh_trials(session, rows: List[Dict]) -> List[str]:
+    """
+    Overwrite the stored trials among `rows` whose lastUpdate moved forward
+    and queue them for analysis again (processed reset, claim cleared).
+    Returns the IDs of the refreshed documents.
+    """
+    Document = models.Document
+    by_external_id = {row["external_id"]: row for row in rows if row.get("last_update")}
+    if not by_external_id:
+        return []
+    result = await session.execute(
+        select(Document.id, Document.external_id, Document.last_update)
+        .where(Document.external_id.in_(list(by_external_id)))
+    )
+    params = []
+    for doc_id, external_id, last_update in result.all():
+        row = by_external_id[external_id]
+        if last_update is None or last_update < row["last_update"]:
+            params.append({"b_id": doc_id, **{f"b_{column}": row[column] for column in REFRESH_COLUMNS}})
+    if not params:
+        return []
+
+    table = Document.__table__
+    # One executemany UPDATE for the page
+    await session.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            **{column: bindparam(f"b_{column}") for column in REFRESH_COLUMNS},
+            processed=False,
+            processing_status="PENDING",
+            claimed_by=None,
+            lease_expires_at=None,
+            attempts=0
+        ),
+        params
+    )
+    return [param["b_id"] for param in params]
+
+def initial_watermark(backfill_days: int) -> str:
+    """Where a job's first sync starts: `backfill_days` before today."""
+    return (datetime.utcnow() - timedelta(days=backfill_days)).strftime("%Y-%m-%d")
+
+async def sync_trials(
+    fetcher, session_factory, job_id: str, query: str, watermark: str,
+    page_size: int, max_pages: int, timeout: float
+) -> Tuple[List[str], Dict]:
+    """
+    Store studies updated since the job's watermark, one page at a time.
+
+    Each page is inserted and the job's trials_watermark advanced to the
+    page's newest lastUpdate in one transaction, so only one page is held in
+    memory and a sync that times out resumes where it stopped on the next run.
+    The watermark day itself is requested again (the API filters by date);
+    studies already stored are skipped by ingest_documents() unless their
+    lastUpdate moved forward, in which case refresh_trials() overwrites them
+    and queues them for analysis again.
+
+    Returns the IDs of the inserted and refreshed documents and the source stats.
+    """
+    started = time.perf_counter()
+    created_ids = []
+    stat = {"status": "ok", "items": 0, "created": 0, "updated": 0, "duplicates": 0, "pages": 0}
+
+    async def run():
+        nonlocal watermark
+        pages = fetcher.iter_updated_studies(query=query, since=watermark, page_size=page_size, max_pages=max_pages)
+        async for studies in pages:
+            page_watermark = max((study["lastUpdate"] for study in studies if study.get("lastUpdate")), default=watermark)
+            async with session_factory() as session:
+                rows = [study_row(study) for study in studies]
+                inserted, skipped = await ingest_documents(session, rows)
+                refreshed = await refresh_trials(session, rows) if skipped else []
+                if page_watermark > watermark:
+                    await session.execute(
+                        update(models.CrawlJob)
+                        .where(models.CrawlJob.id == job_id)
+                        .values(trials_watermark=page_watermark)
+                    )
+                await session.commit()
+            watermark = page_watermark
+            created_ids.extend(inserted + refreshed)
+            stat["pages"] += 1
+            stat["items"] += len(studies)
+            stat["created"] += len(inserted)
+            stat["updated"] += len(refreshed)
+            stat["duplicates"] += skipped - len(refreshed)
+
+    try:
+        await asyncio.wait_for(run(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"ClinicalTrials sync for job {job_id} timed out after {timeout}s at watermark {watermark}")
+        stat["status"] = "timeout"
+    except Exception as e:
+        logger.error(f"ClinicalTrials sync for job {job_id} failed: {e}")
+        stat.update(status="error", error=str(e)[:200])
+    stat["watermark"] = watermark
+    stat["seconds"] = round(time.perf_counter() - started, 3)
+    return created_ids, stat
@@ -0,0 +1,18 @@
+from datetime import datetime
+from src.content import article_content, legacy_content, study_content
+
+def test_article_body_is_clean_text_and_payload_is_json_ready():
+    content = article_content({
+        "title": "FDA approves X",
+        "content": "<p>The FDA&nbsp;approved <b>X</b>\n today.</p>",
+        "published_at": datetime(2024, 5, 1, 9, 30)
+    })
+
+    assert content["body_text"] == "The FDA approved X today."
+    assert content["payload"]["published_at"] == "2024-05-01T09:30:00"
+
+def test_legacy_rows_are_converted_by_source():
+    study = legacy_content("ClinicalTrials", '{"nctId": "NCT1", "summary": "Phase 2", "sponsor": "Pfizer", "status": "RECRUITING", "lastUpdate": "2024-05-01"}')
+
+    assert study == study_content({"nctId": "NCT1", "summary": "Phase 2", "sponsor": "Pfizer", "status": "RECRUITING", "lastUpdate": "2024-05-01"})
+    assert legacy_content("NIH News", "plain <i>text</i>") == {"payload": {"text": "plain <i>text</i>"}, "body_text": "plain text"}
@@ -0,0 +1,30 @@
+from datetime import datetime
+import pytest
+from sqlalchemy.dialects import postgresql
+from src.documents import DocumentFilters, build_page_query, decode_cursor, encode_cursor, parse_fields
+
+def compile(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+def test_cursor_round_trips():
+    ingested_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+    assert decode_cursor(encode_cursor(ingested_at, "doc-1")) == (ingested_at, "doc-1")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_payload_is_only_selected_when_requested():
+    assert "payload" not in compile(build_page_query(parse_fields(None), DocumentFilters(), None, 100))
+    assert "payload" in compile(build_page_query(parse_fields("id,payload"), DocumentFilters(), None, 100))
+    with pytest.raises(ValueError):
+        parse_fields("id,password")
+
+def test_page_query_uses_keyset_and_filters():
+    cursor = encode_cursor(datetime(2024, 5, 1), "doc-1")
+    sql = compile(build_page_query(["id"], DocumentFilters(source="NIH News", processed=False), cursor, 50))
+
+    assert "(documents.ingested_at, documents.id) < (" in sql
+    assert "documents.ingested_at IS NOT NULL" in sql
+    assert "ORDER BY documents.ingested_at DESC, documents.id DESC" in sql
+    assert "documents.source =" in sql and "documents.processed =" in sql
+    assert "OFFSET" not in sql
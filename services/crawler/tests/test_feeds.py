@@ -0,0 +1,48 @@
+import httpx
+import pytest
+from libs.shared.src.http_client import ServiceClient
+from src.clients.scrapers import RSSScraper
+
+def feed(*guids):
+    items = "".join(
+        f"<item><guid>{guid}</guid><title>Item {guid}</title><link>https://example.com/{guid}</link></item>"
+        for guid in guids
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Test</title>{items}</channel></rss>'
+
+def make_scraper(requests, bodies):
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v2"':
+            return httpx.Response(304, headers={"ETag": '"v2"'})
+        body = bodies[min(len(requests), len(bodies)) - 1]
+        return httpx.Response(200, text=body, headers={"ETag": f'"v{len(requests)}"'})
+
+    return RSSScraper("Test", "https://example.com/rss", ServiceClient(transport=httpx.MockTransport(handler)))
+
+@pytest.mark.asyncio
+async def test_only_new_entries_are_returned_and_304_short_circuits():
+    requests = []
+    scraper = make_scraper(requests, [feed("b", "a"), feed("c", "b", "a")])
+
+    first = await scraper.fetch_articles()
+    second = await scraper.fetch_articles()
+    third = await scraper.fetch_articles()
+
+    assert [a["link"] for a in first] == ["https://example.com/b", "https://example.com/a"]
+    assert [a["link"] for a in second] == ["https://example.com/c"]
+    assert third == []
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert scraper.feed_status == "not_modified"
+    assert scraper.state["seen_ids"] == ["c", "b", "a"]
+
+@pytest.mark.asyncio
+async def test_identical_body_is_not_parsed_again():
+    requests = []
+    scraper = make_scraper(requests, [feed("a")])
+
+    await scraper.fetch_articles()
+    assert await scraper.fetch_articles() == []
+
+    assert scraper.feed_status == "unchanged"
+    assert scraper.state["etag"] == '"v2"'
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from src.ingest import build_insert, ingest_documents
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.values
+
+class FakeSession:
+    """Answers the existence query with `stored` and returns every inserted ID."""
+
+    def __init__(self, stored):
+        self.stored = stored
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        if statement.is_select:
+            return FakeResult(list(self.stored))
+        return FakeResult(self.inserted_ids(statement))
+
+    def inserted_ids(self, statement):
+        params = statement.compile(dialect=postgresql.dialect()).params
+        return [value for key, value in params.items() if key.startswith("id_m")]
+
+def row(external_id):
+    return {"id": f"doc-{external_id}", "source": "Test", "external_id": external_id, "title": external_id}
+
+def test_insert_skips_conflicts_and_returns_ids():
+    sql = str(build_insert([row("a"), row("b")]).compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (external_id) DO NOTHING" in sql
+    assert "RETURNING documents.id" in sql
+
+@pytest.mark.asyncio
+async def test_ingest_uses_one_lookup_and_one_insert_per_batch():
+    session = FakeSession(stored={"b"})
+
+    created, skipped = await ingest_documents(session, [row("a"), row("b"), row("c"), row("a")])
+
+    assert created == ["doc-a", "doc-c"]
+    assert skipped == 2
+    assert len(session.statements) == 2
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from src.near_dup import STATUS_DUPLICATE, StoryIndex, hamming, ingest_articles, simhash
+
+BODY = (
+    "The U.S. Food and Drug Administration today approved Arexvy, the first respiratory syncytial "
+    "virus vaccine approved for use in the United States. Arexvy is approved for the prevention of "
+    "lower respiratory tract disease caused by RSV in individuals 60 years of age and older."
+)
+OTHER = (
+    "Weekly injections of semaglutide reduced the risk of heart attack, stroke or cardiovascular "
+    "death by 20 percent in people with obesity and heart disease but without diabetes."
+)
+
+def test_simhash_ignores_case_and_punctuation_and_fits_a_bigint():
+    value = simhash(BODY)
+
+    assert value == simhash(BODY.upper().replace(",", ""))
+    assert -(1 << 63) <= value < 1 << 63
+    assert simhash("  ...  ") is None
+
+def test_syndicated_copy_is_near_and_other_story_is_far():
+    copy = BODY.replace("today", "on Wednesday")
+
+    assert hamming(simhash(BODY), simhash(copy)) <= 8
+    assert hamming(simhash(BODY), simhash(OTHER)) > 8
+
+def test_assign_clusters_copies_into_the_first_story():
+    index = StoryIndex(max_distance=8)
+    index.add(simhash(f"Semaglutide cuts heart risk {OTHER}"), "doc-old")
+    rows = [
+        {"id": "doc-1", "title": "FDA approves first RSV vaccine", "body_text": BODY, "processed": False},
+        {"id": "doc-2", "title": "FDA approves first RSV vaccine", "body_text": BODY + " Source: FDA.", "processed": False},
+        {"id": "doc-3", "title": "Semaglutide cuts heart risk", "body_text": OTHER, "processed": False},
+    ]
+
+    assert index.assign(rows) == 2
+    assert rows[0]["story_id"] == "doc-1" and rows[0]["processing_status"] == "PENDING"
+    assert rows[1]["story_id"] == "doc-1" and rows[1]["processing_status"] == STATUS_DUPLICATE
+    assert rows[1]["processed"] is True
+    assert rows[2]["story_id"] == "doc-old"
+    assert all(isinstance(row["simhash"], int) for row in rows)
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.values
+
+class StoredSession:
+    """Answers existence queries with `stored` external IDs and returns every inserted ID."""
+
+    def __init__(self, stored):
+        self.stored = stored
+
+    async def execute(self, statement):
+        if statement.is_select:
+            return FakeResult(list(self.stored))
+        params = statement.compile(dialect=postgresql.dialect()).params
+        return FakeResult([value for key, value in params.items() if key.startswith("id_m")])
+
+@pytest.mark.asyncio
+async def test_stored_article_does_not_become_a_story_root():
+    # The stored copy predates simhash, so it is not in the index
+    index = StoryIndex(max_distance=8)
+    rows = [
+        {"id": "doc-again", "external_id": "https://a/rsv", "title": "FDA approves first RSV vaccine", "body_text": BODY},
+        {"id": "doc-copy", "external_id": "https://b/rsv", "title": "FDA approves first RSV vaccine", "body_text": BODY},
+    ]
+
+    inserted, skipped, duplicates = await ingest_articles(StoredSession({"https://a/rsv"}), index, rows)
+
+    assert inserted == ["doc-copy"] and skipped == 1 and duplicates == 0
+    assert rows[1]["story_id"] == "doc-copy" and rows[1]["processing_status"] == "PENDING"
+    assert index.find(rows[1]["simhash"]) == "doc-copy"
+
+def test_only_inserted_stories_are_indexed():
+    index = StoryIndex(max_distance=8)
+    rows = [{"id": "doc-1", "title": "FDA approves first RSV vaccine", "body_text": BODY}]
+
+    index.assign(rows)
+    index.remember(rows, [])
+
+    assert index.size == 0
@@ -0,0 +1,39 @@
+import pytest
+
+from src.query_filter import QueryFilter, compile_query
+
+TEXT = "Pfizer reports Phase 3\n results for its KRAS inhibitor in oncology patients"
+
+def test_comma_separated_keywords_still_mean_any():
+    query = compile_query("Oncology, FDA, AstraZeneca")
+
+    assert query.matches(TEXT)
+    assert not query.matches("Merck opens a new plant")
+
+def test_terms_match_on_word_boundaries_and_phrases_ignore_whitespace():
+    assert compile_query('"phase 3 results"').matches(TEXT)
+    assert compile_query("phase 3 results").matches(TEXT)
+    assert not compile_query("onco").matches(TEXT)
+    assert compile_query("onco*").matches(TEXT)
+    assert not compile_query("phase 30").matches(TEXT)
+
+def test_boolean_operators_and_parentheses():
+    assert compile_query('"phase 3" AND (Merck OR Pfizer)').matches(TEXT)
+    assert not compile_query('"phase 3" AND (Merck OR Novartis)').matches(TEXT)
+    assert compile_query("KRAS NOT review").matches(TEXT)
+    assert not compile_query("KRAS NOT oncology").matches(TEXT)
+    assert compile_query("NOT Merck, review").matches(TEXT)
+
+def test_empty_query_is_no_filter_and_bad_syntax_is_rejected():
+    assert compile_query("") is None
+    assert compile_query("   ") is None
+    for bad in ["(KRAS OR Pfizer", "KRAS AND", "AND KRAS", "KRAS )", "NOT"]:
+        with pytest.raises(ValueError):
+            compile_query(bad)
+
+def test_automaton_and_find_strategies_agree():
+    query = '"phase 3" AND (Merck OR Pfizer) NOT review, onco*'
+    texts = [TEXT, "Merck phase 3 review", "oncogenic drivers", "phase 30 Pfizer"]
+
+    assert [QueryFilter(query, scan_max_terms=0).matches(t) for t in texts] == [QueryFilter(query).matches(t) for t in texts]
+    assert [QueryFilter(query).matches(t) for t in texts] == [True, False, True, False]
@@ -0,0 +1,68 @@
+import pytest
+from src import main
+from src.runs import RUN_COMPLETED, RUN_FAILED, RUN_STARTED, retry_delay
+
+class FakeRun:
+    def __init__(self):
+        self.status = RUN_STARTED
+        self.attempts = 0
+        self.checkpoint = {}
+        self.heartbeat_at = None
+
+class FakeSession:
+    def __init__(self, run):
+        self.run = run
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, model, run_id):
+        return self.run
+
+    async def commit(self):
+        pass
+
+@pytest.fixture
+def run(monkeypatch):
+    run = FakeRun()
+    monkeypatch.setattr(main, "AsyncSessionLocal", lambda: FakeSession(run))
+    monkeypatch.setattr(main, "CRAWL_RUN_RETRY_BASE_SECONDS", 0)
+    return run
+
+def test_retry_delay_is_capped():
+    assert all(0 <= retry_delay(attempt, base=30, cap=300) <= 300 for attempt in range(1, 10))
+
+@pytest.mark.asyncio
+async def test_failed_sources_are_retried_from_checkpoint(run, monkeypatch):
+    passes = []
+
+    async def crawl_attempt(run_id, job_id, checkpoint):
+        passes.append(set(checkpoint))
+        if len(passes) == 1:
+            run.checkpoint = {"FDA": {"status": "ok", "created": 2}}
+            return {"FDA": {"status": "ok"}, "NIH": {"status": "timeout"}}
+        run.checkpoint = {**run.checkpoint, "NIH": {"status": "ok", "created": 1}}
+        return {"NIH": {"status": "ok"}}
+
+    monkeypatch.setattr(main, "crawl_attempt", crawl_attempt)
+    await main.run_crawl_task("run-1", "job-1")
+
+    assert passes == [set(), {"FDA"}]
+    assert run.status == RUN_COMPLETED
+    assert run.stats_json["documents_found"] == 3
+    assert run.stats_json["attempts"] == 2
+
+@pytest.mark.asyncio
+async def test_run_is_marked_failed_after_last_attempt(run, monkeypatch):
+    async def crawl_attempt(run_id, job_id, checkpoint):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(main, "crawl_attempt", crawl_attempt)
+    await main.run_crawl_task("run-1", "job-1")
+
+    assert run.status == RUN_FAILED
+    assert run.attempts == main.CRAWL_RUN_MAX_ATTEMPTS
+    assert run.error == "database unavailable"
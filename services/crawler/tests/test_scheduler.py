@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime
+import pytest
+from src.scheduler import CrawlScheduler, next_fire_time
+
+def test_next_fire_time_follows_cron_with_bounded_jitter():
+    after = datetime(2024, 5, 1, 12, 0, 0)
+
+    assert next_fire_time("0 */12 * * *", after) == datetime(2024, 5, 2, 0, 0, 0)
+    jittered = next_fire_time("0 */12 * * *", after, jitter_seconds=60)
+    assert datetime(2024, 5, 2, 0, 0, 0) <= jittered <= datetime(2024, 5, 2, 0, 1, 0)
+
+def test_invalid_schedule_raises_value_error():
+    with pytest.raises(ValueError):
+        next_fire_time("every day", datetime(2024, 5, 1))
+
+@pytest.mark.asyncio
+async def test_pool_caps_runs_globally_and_per_source():
+    sources = ["ClinicalTrials", "ClinicalTrials", "ResearchNews", "ResearchNews", "ClinicalTrials"]
+    in_flight = {"total": 0}
+    peak = {"total": 0}
+
+    async def run_task(run_id, job_id):
+        keys = ("total", sources[int(job_id)])
+        for key in keys:
+            in_flight[key] = in_flight.get(key, 0) + 1
+            peak[key] = max(peak.get(key, 0), in_flight[key])
+        await asyncio.sleep(0.02)
+        for key in keys:
+            in_flight[key] -= 1
+
+    scheduler = CrawlScheduler(None, run_task, max_concurrent_runs=3, max_runs_per_source=1)
+    await asyncio.gather(*(scheduler.dispatch(f"run-{i}", str(i), source) for i, source in enumerate(sources)))
+
+    assert peak["ClinicalTrials"] == 1
+    assert peak["total"] == 2
+    assert scheduler.stats()["runsStarted"] == 5
+    assert scheduler.in_flight == 0
+
+class BeatRecorder:
+    """Session factory recording the heartbeat UPDATEs per run."""
+    def __init__(self):
+        self.beats = {}
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        run_id = next(v for k, v in statement.compile().params.items() if k.startswith("id"))
+        self.beats.setdefault(run_id, []).append(asyncio.get_running_loop().time())
+
+    async def commit(self):
+        pass
+
+@pytest.mark.asyncio
+async def test_run_waiting_for_a_source_slot_keeps_heartbeating():
+    stale_after = 0.05
+    started = {}
+
+    async def run_task(run_id, job_id):
+        started[run_id] = asyncio.get_running_loop().time()
+        # Hold the ClinicalTrials slot for several stale windows
+        await asyncio.sleep(stale_after * 5 if run_id == "run-0" else 0)
+
+    sessions = BeatRecorder()
+    scheduler = CrawlScheduler(
+        sessions, run_task, max_concurrent_runs=2, max_runs_per_source=1,
+        stale_after_seconds=stale_after, heartbeat_seconds=stale_after / 5
+    )
+    dispatched = asyncio.get_running_loop().time()
+    await asyncio.gather(*(scheduler.dispatch(f"run-{i}", str(i), "ClinicalTrials") for i in range(2)))
+
+    # run-1 was never silent for a stale window while it queued behind run-0
+    beats = [dispatched] + sessions.beats["run-1"] + [started["run-1"]]
+    assert started["run-1"] - dispatched >= stale_after * 5
+    assert max(b - a for a, b in zip(beats, beats[1:])) < stale_after
+    # and its heartbeat stopped once it held the slot
+    assert all(beat <= started["run-1"] for beat in sessions.beats["run-1"])
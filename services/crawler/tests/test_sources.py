@@ -0,0 +1,62 @@
+import asyncio
+import time
+import pytest
+from src.sources import fetch_sources
+
+def source(items, delay=0.0, error=None):
+    async def fetch():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return items
+    return fetch
+
+@pytest.mark.asyncio
+async def test_sources_are_fetched_concurrently_with_partial_results():
+    sources = {
+        "fast": source([{"id": 1}], delay=0.1),
+        "also-fast": source([{"id": 2}, {"id": 3}], delay=0.1),
+        "slow": source([{"id": 4}], delay=5),
+        "broken": source([], error=RuntimeError("feed down")),
+    }
+
+    started = time.perf_counter()
+    items, stats = await fetch_sources(sources, timeout=0.3, max_concurrency=4)
+
+    assert time.perf_counter() - started < 1
+    assert items == {"fast": [{"id": 1}], "also-fast": [{"id": 2}, {"id": 3}], "slow": [], "broken": []}
+    assert [stats[name]["status"] for name in sources] == ["ok", "ok", "timeout", "error"]
+    assert stats["also-fast"]["items"] == 2
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_limits_sources_in_flight():
+    in_flight = peak = 0
+
+    async def fetch():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return []
+
+    await fetch_sources({f"s{i}": fetch for i in range(6)}, timeout=1, max_concurrency=2)
+
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_each_source_is_stored_as_it_arrives():
+    stored = []
+
+    async def on_result(name, items, stat):
+        if name == "unstorable":
+            raise RuntimeError("db down")
+        stored.append((name, time.perf_counter()))
+
+    sources = {"fast": source([{"id": 1}], delay=0.01), "slow": source([], delay=0.2), "unstorable": source([{"id": 2}])}
+    started = time.perf_counter()
+    _, stats = await fetch_sources(sources, timeout=1, max_concurrency=4, on_result=on_result)
+
+    assert [name for name, _ in stored] == ["fast", "slow"]
+    assert stored[0][1] - started < 0.1
+    assert stats["unstorable"] == {"status": "error", "error": "db down", "items": 1, "seconds": stats["unstorable"]["seconds"]}
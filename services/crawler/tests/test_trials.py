@@ -0,0 +1,116 @@
+import httpx
+import pytest
+from libs.shared.src.http_client import ServiceClient
+from src.clients.clinical_trials import ClinicalTrialsFetcher
+from src.trials import refresh_trials, study_row, sync_trials
+
+def study(nct_id, last_update):
+    return {"protocolSection": {
+        "identificationModule": {"nctId": nct_id, "briefTitle": nct_id},
+        "statusModule": {"lastUpdatePostDateStruct": {"date": last_update}}
+    }}
+
+PAGES = {
+    None: {"studies": [study("NCT1", "2024-05-01"), study("NCT2", "2024-05-02")], "nextPageToken": "p2"},
+    "p2": {"studies": [study("NCT3", "2024-05-03")]},
+}
+
+def make_fetcher(requests):
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=PAGES[request.url.params.get("pageToken")])
+
+    return ClinicalTrialsFetcher(ServiceClient(transport=httpx.MockTransport(handler)))
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.values
+
+class FakeSession:
+    """Records each page's statements; nothing is stored yet."""
+
+    def __init__(self, log):
+        self.log = log
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        if statement.is_select:
+            return FakeResult([])
+        if statement.is_insert:
+            return FakeResult([f"doc-{len(self.statements)}"])
+        return FakeResult([])
+
+    async def commit(self):
+        self.log.append(self.statements)
+
+class StoredTrialsSession:
+    """Answers the refresh lookup with `stored` (id, external_id, last_update) rows."""
+
+    def __init__(self, stored):
+        self.stored = stored
+        self.updates = []
+
+    async def execute(self, statement, params=None):
+        if statement.is_select:
+            return FakeResult(self.stored)
+        self.updates.append((statement, params))
+        return FakeResult([])
+
+@pytest.mark.asyncio
+async def test_pages_are_followed_with_watermark_filter_and_fields():
+    requests = []
+    pages = [page async for page in make_fetcher(requests).iter_updated_studies(query="oncology", since="2024-05-01")]
+
+    assert [[s["nctId"] for s in page] for page in pages] == [["NCT1", "NCT2"], ["NCT3"]]
+    params = requests[0].url.params
+    assert params["filter.advanced"] == "AREA[LastUpdatePostDate]RANGE[2024-05-01,MAX]"
+    assert params["sort"] == "LastUpdatePostDate:asc"
+    assert "NCTId" in params["fields"]
+    assert requests[1].url.params["pageToken"] == "p2"
+
+@pytest.mark.asyncio
+async def test_sync_commits_each_page_and_advances_watermark():
+    commits = []
+    created, stat = await sync_trials(
+        make_fetcher([]), lambda: FakeSession(commits), "job-1", None, "2024-04-30",
+        page_size=2, max_pages=10, timeout=5
+    )
+
+    assert len(commits) == 2
+    watermarks = [s.compile().params["trials_watermark"] for page in commits for s in page if s.is_update]
+    assert watermarks == ["2024-05-02", "2024-05-03"]
+    assert len(created) == 2
+    assert stat["status"] == "ok"
+    assert stat["pages"] == 2 and stat["items"] == 3
+    assert stat["watermark"] == "2024-05-03"
+
+@pytest.mark.asyncio
+async def test_refresh_overwrites_trials_updated_since_they_were_stored():
+    rows = [
+        study_row({"nctId": nct_id, "url": "u", "title": nct_id, "lastUpdate": last_update})
+        for nct_id, last_update in [("NCT1", "2024-05-03"), ("NCT2", "2024-05-02"), ("NCT3", "2024-05-03")]
+    ]
+    session = StoredTrialsSession([
+        ("doc-1", "NCT1", "2024-05-01"), ("doc-2", "NCT2", "2024-05-02"), ("doc-3", "NCT3", None)
+    ])
+
+    assert await refresh_trials(session, rows) == ["doc-1", "doc-3"]
+
+    (statement, params), = session.updates
+    assert [(p["b_id"], p["b_last_update"]) for p in params] == [("doc-1", "2024-05-03"), ("doc-3", "2024-05-03")]
+    # Queued for analysis again
+    values = statement.compile().params
+    assert values["processed"] is False and values["processing_status"] == "PENDING" and values["attempts"] == 0
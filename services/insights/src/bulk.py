@@ -0,0 +1,91 @@
+"""
+Bulk ingestion for POST /api/insights/bulk.
+
+A batch is written with one multi-row INSERT ... ON CONFLICT (source_document_id)
+DO UPDATE, so re-sending a document (an orchestrator retry) updates its insight
+in place instead of adding a second one, and the request returns the same ID.
+Rows are returned with `xmax = 0`, true for inserted rows, and the rollups are
+adjusted in the same transaction: the buckets of updated rows are read (and
+locked) before the upsert.
+"""
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from sqlalchemy import literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+from .rollups import adjust, bucket, changed
+
+# Columns a re-sent document overwrites; id and created_at are kept
+UPSERT_COLUMNS = [
+    "title", "description", "category", "therapeutic_area", "competitor_id", "impact_level",
+    "relevance_score", "source", "published_date", "tags",
+]
+UPSERT_ATTEMPTS = 3
+
+class ConcurrentUpsert(Exception):
+    """Another transaction inserted one of the batch's documents after it was looked up."""
+
+def bucket_columns():
+    Insight = models.Insight
+    return [
+        Insight.published_date, Insight.created_at, Insight.therapeutic_area,
+        Insight.competitor_id, Insight.impact_level,
+    ]
+
+async def _upsert(session, rows: List[Dict]) -> List[Tuple[str, bool]]:
+    Insight = models.Insight
+    source_ids = [row["source_document_id"] for row in rows if row["source_document_id"]]
+    existing = {}
+    if source_ids:
+        result = await session.execute(
+            select(Insight.source_document_id, *bucket_columns())
+            .where(Insight.source_document_id.in_(source_ids))
+            .with_for_update()
+        )
+        existing = {row.source_document_id: bucket(row) for row in result.all()}
+
+    statement = pg_insert(Insight).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Insight.source_document_id],
+        set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+    ).returning(Insight.id, Insight.source_document_id, *bucket_columns(), literal_column("xmax = 0").label("inserted"))
+    result = await session.execute(statement)
+
+    deltas = Counter()
+    by_source, by_id = {}, {}
+    for row in result.all():
+        if row.inserted:
+            before = None
+        elif row.source_document_id in existing:
+            before = existing[row.source_document_id]
+        else:
+            # Its old bucket is unknown, so the rollups cannot be adjusted
+            raise ConcurrentUpsert(row.source_document_id)
+        deltas.update(changed(before, bucket(row)))
+        if row.source_document_id:
+            by_source[row.source_document_id] = (row.id, row.inserted)
+        else:
+            by_id[row.id] = (row.id, row.inserted)
+    await adjust(session, deltas)
+    # RETURNING order is not guaranteed to follow VALUES
+    return [
+        by_source[row["source_document_id"]] if row["source_document_id"] else by_id[row["id"]]
+        for row in rows
+    ]
+
+async def upsert_insights(session, rows: List[Dict]) -> List[Tuple[str, bool]]:
+    """
+    Insert or update `rows` (Insight column -> value, each with a fresh `id`)
+    in the caller's transaction. Returns (insight id, created) in input order.
+    Source document IDs must be unique within the batch.
+    """
+    for attempt in range(UPSERT_ATTEMPTS):
+        try:
+            # A savepoint, so a lost race is retried with the winner's row locked
+            async with session.begin_nested():
+                return await _upsert(session, rows)
+        except ConcurrentUpsert:
+            if attempt == UPSERT_ATTEMPTS - 1:
+                raise
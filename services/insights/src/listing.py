@@ -0,0 +1,123 @@
+"""
+Listing queries for GET /api/insights.
+
+Pages are keyset-paginated on (sort key, id): the cursor is the last row's
+key, so fetching page N costs the same as page 1, and every sort has an index
+starting with its key (see models/insight.py), optionally behind a therapeutic
+area or competitor filter. Totals are counted up to a cap instead of with a
+full COUNT(*).
+"""
+import base64
+import json
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+
+from . import models
+from .models.insight import CREATED_KEY, PUBLISHED_KEY, RELEVANCE_KEY
+
+# API sort name -> (sort key expression, cursor value parser)
+SORTS = {
+    "createdAt": (CREATED_KEY, date.fromisoformat),
+    "publishedDate": (PUBLISHED_KEY, date.fromisoformat),
+    "relevance": (RELEVANCE_KEY, float),
+}
+
+class InsightFilters:
+    def __init__(
+        self,
+        therapeutic_area: Optional[str] = None,
+        competitor_id: Optional[str] = None,
+        category: Optional[str] = None,
+        impact_level: Optional[str] = None,
+        source: Optional[str] = None,
+        min_relevance: Optional[float] = None,
+        max_relevance: Optional[float] = None,
+        published_from: Optional[date] = None,
+        published_to: Optional[date] = None
+    ):
+        self.therapeutic_area = therapeutic_area
+        self.competitor_id = competitor_id
+        self.category = category
+        self.impact_level = impact_level
+        self.source = source
+        self.min_relevance = min_relevance
+        self.max_relevance = max_relevance
+        self.published_from = published_from
+        self.published_to = published_to
+
+    def apply(self, query):
+        Insight = models.Insight
+        if self.therapeutic_area:
+            query = query.where(Insight.therapeutic_area == self.therapeutic_area)
+        if self.competitor_id:
+            query = query.where(Insight.competitor_id == self.competitor_id)
+        if self.category:
+            query = query.where(Insight.category == self.category)
+        if self.impact_level:
+            # Stored as entered (High/high) by analysts and the orchestrator
+            query = query.where(func.lower(Insight.impact_level) == self.impact_level.lower())
+        if self.source:
+            query = query.where(Insight.source == self.source)
+        if self.min_relevance is not None:
+            query = query.where(Insight.relevance_score >= self.min_relevance)
+        if self.max_relevance is not None:
+            query = query.where(Insight.relevance_score <= self.max_relevance)
+        if self.published_from:
+            query = query.where(Insight.published_date >= self.published_from)
+        if self.published_to:
+            query = query.where(Insight.published_date <= self.published_to)
+        return query
+
+def encode_cursor(sort: str, value, insight_id: str) -> str:
+    value = value.isoformat() if isinstance(value, date) else value
+    payload = json.dumps([sort, value, insight_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str, sort: str) -> Tuple:
+    """Raises ValueError on a malformed cursor or one from another sort."""
+    try:
+        cursor_sort, value, insight_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if cursor_sort != sort:
+            raise ValueError
+        return SORTS[sort][1](value), insight_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def build_page_query(filters: InsightFilters, sort: str, descending: bool, cursor: Optional[str], limit: int):
+    Insight = models.Insight
+    key = SORTS[sort][0]
+    query = filters.apply(select(Insight, key.label("_sort_key")))
+    if cursor:
+        position = tuple_(key, Insight.id)
+        after = tuple_(*decode_cursor(cursor, sort))
+        query = query.where(position < after if descending else position > after)
+    if descending:
+        query = query.order_by(key.desc(), Insight.id.desc())
+    else:
+        query = query.order_by(key.asc(), Insight.id.asc())
+    return query.limit(limit)
+
+async def fetch_page(
+    session, filters: InsightFilters, sort: str, descending: bool, cursor: Optional[str], limit: int
+) -> Tuple[List, Optional[str]]:
+    """One page of insights and the cursor of the next page (None on the last)."""
+    result = await session.execute(build_page_query(filters, sort, descending, cursor, limit))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) == limit:
+        last, sort_key = rows[-1]
+        next_cursor = encode_cursor(sort, sort_key, last.id)
+    return [insight for insight, _ in rows], next_cursor
+
+async def count_insights(session, filters: InsightFilters, cap: int) -> Tuple[int, bool]:
+    """
+    Number of matching insights, counting at most `cap` rows so a broad
+    filter costs a bounded index scan. Returns (count, exact).
+    """
+    Insight = models.Insight
+    matching = filters.apply(select(Insight.id)).limit(cap + 1).subquery()
+    result = await session.execute(select(func.count()).select_from(matching))
+    count = result.scalar_one()
+    return min(count, cap), count <= cap
@@ -1,19 +1,29 @@
 import sys
 sys.path.append("/app")
 
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi import FastAPI, Depends, HTTPException, Request, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from datetime import date
 from typing import List, Optional
+import os
 import uuid
 import logging
 
 from libs.shared.src.logger import setup_logger
 from libs.shared.src.middleware import CorrelationIdMiddleware
-from .database import get_db, engine, Base
+from .database import get_db, engine, Base, AsyncSessionLocal
+from .migrations import upgrade_schema
+from .listing import InsightFilters, count_insights, decode_cursor, fetch_page
+from .search import search_insights
+from .bulk import ConcurrentUpsert, upsert_insights
+from .rollups import RollupFilters, adjust, aggregate, bucket, changed, parse_group_by, rebuild_rollups
 from . import models, schemas
 from libs.shared.src.exceptions import setup_exception_handlers
 from libs.shared.src.auth import get_current_user, require_role, ROLE_ADMIN, ROLE_ANALYST, ROLE_EXECUTIVE, User
+from libs.shared.src.events import get_event_bus
+from libs.shared.src.response_cache import get_response_cache
 
 logger = setup_logger("insights-service")
 
@@ -22,11 +32,27 @@ app = FastAPI(title="Insights Service")
 app.add_middleware(CorrelationIdMiddleware)
 setup_exception_handlers(app)
 
+event_bus = get_event_bus()
+# GET /api/insights and /api/insights/{id}, tagged "insights" and "insight:<id>"
+response_cache = get_response_cache("insights", event_bus)
+
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await upgrade_schema(conn)
     logger.info("Database initialized")
+    # First start with rollups: count the insights that predate them
+    async with AsyncSessionLocal() as session:
+        if await rebuild_rollups(session, only_if_empty=True):
+            logger.info("Rebuilt insight rollups")
+        await session.commit()
+    await response_cache.subscribe()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await response_cache.close()
+    await event_bus.close()
 
 @app.get("/health")
 async def health():
@@ -69,46 +95,214 @@ async def create_insight(
         relevance_score=relevance_score,
         source=insight.source,
         published_date=insight.published_date,
-        source_document_id=insight.source_document_id
+        source_document_id=insight.source_document_id,
+        tags=insight.tags
     )
     db.add(db_insight)
-    await db.commit()
+    try:
+        # Flushes the insight first, so a duplicate source document fails here
+        await adjust(db, changed(None, bucket(db_insight)))
+        await db.commit()
+    except IntegrityError:
+        # ux_insights_source_document; POST /api/insights/bulk upserts instead
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="An insight for this source document already exists")
     await db.refresh(db_insight)
+    await response_cache.invalidate("insights")
     logger.info(f"Created insight {new_id} with relevance {relevance_score}")
     
     # In a real event-driven system, we would emit 'insight.created' here.
     return db_insight
 
+# Largest batch POST /api/insights/bulk accepts (13 bind parameters per row)
+INSIGHTS_BULK_MAX = int(os.getenv("INSIGHTS_BULK_MAX", "1000"))
+
+@app.post("/api/insights/bulk", response_model=schemas.InsightBulkResponse)
+async def bulk_upsert_insights(
+    insights: List[schemas.InsightCreate],
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_role([ROLE_ADMIN, ROLE_ANALYST]))
+):
+    """
+    Create insights in one transaction, updating the existing insight of a
+    source document instead of adding a second one, so a retried batch is
+    idempotent. Returns the insight IDs in request order.
+    """
+    if len(insights) > INSIGHTS_BULK_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {INSIGHTS_BULK_MAX} insights per request")
+    seen = set()
+    for index, insight in enumerate(insights):
+        if insight.source_document_id is None:
+            continue
+        if insight.source_document_id in seen:
+            raise HTTPException(status_code=422, detail=f"Duplicate sourceDocumentId at index {index}")
+        seen.add(insight.source_document_id)
+    if not insights:
+        return {"items": []}
+
+    rows = [
+        {
+            "id": f"insight-{uuid.uuid4().hex[:8]}",
+            **insight.model_dump(by_alias=False),
+            "relevance_score": calculate_relevance(insight.impact_level, insight.relevance_score),
+        }
+        for insight in insights
+    ]
+    try:
+        results = await upsert_insights(db, rows)
+    except ConcurrentUpsert:
+        raise HTTPException(status_code=409, detail="Concurrent write to the same source documents, retry")
+    await db.commit()
+    await response_cache.invalidate("insights", *(f"insight:{insight_id}" for insight_id, was_created in results if not was_created))
+    created = sum(1 for _, was_created in results if was_created)
+    logger.info(f"Bulk upserted {len(rows)} insights ({created} created, {len(rows) - created} updated)")
+    return {
+        "items": [
+            {"id": insight_id, "source_document_id": row["source_document_id"], "created": was_created}
+            for row, (insight_id, was_created) in zip(rows, results)
+        ]
+    }
+
+def insight_json(insight: models.Insight) -> dict:
+    # As rendered through response_model, for the response cache
+    return schemas.InsightResponse.model_validate(insight).model_dump(mode="json", by_alias=True)
+
+# Largest page and total count GET /api/insights will compute
+INSIGHTS_PAGE_MAX = int(os.getenv("INSIGHTS_PAGE_MAX", "500"))
+INSIGHTS_COUNT_CAP = int(os.getenv("INSIGHTS_COUNT_CAP", "10000"))
+
 @app.get("/api/insights", response_model=List[schemas.InsightResponse])
 async def list_insights(
+    request: Request,
+    therapeuticArea: Optional[str] = Query(None),
+    competitorId: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    impactLevel: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    minRelevance: Optional[float] = Query(None),
+    maxRelevance: Optional[float] = Query(None),
+    publishedFrom: Optional[date] = Query(None),
+    publishedTo: Optional[date] = Query(None),
+    sort: str = Query("createdAt", pattern="^(createdAt|publishedDate|relevance)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None),
+    withTotal: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Insights sorted by `sort` (newest/highest first by default), keyset-paginated:
+    pass the X-Next-Cursor header of a page as `cursor` to get the next one.
+    `withTotal` adds X-Total-Count, counted up to INSIGHTS_COUNT_CAP
+    (X-Total-Count-Exact: false when the cap was reached).
+    """
+    filters = InsightFilters(
+        therapeuticArea, competitorId, category, impactLevel, source,
+        minRelevance, maxRelevance, publishedFrom, publishedTo
+    )
+    descending = order == "desc"
+    if cursor:
+        try:
+            decode_cursor(cursor, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    async def load():
+        insights, next_cursor = await fetch_page(db, filters, sort, descending, cursor, min(limit, INSIGHTS_PAGE_MAX))
+        headers = {}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        if withTotal:
+            total, exact = await count_insights(db, filters, INSIGHTS_COUNT_CAP)
+            headers["X-Total-Count"] = str(total)
+            headers["X-Total-Count-Exact"] = str(exact).lower()
+        return [insight_json(insight) for insight in insights], headers
+
+    return await response_cache.respond(request, ["insights"], load)
+
+@app.get("/api/insights/aggregates")
+async def insight_aggregates(
+    groupBy: Optional[str] = Query(None),
+    weekFrom: Optional[date] = Query(None),
+    weekTo: Optional[date] = Query(None),
+    therapeuticArea: Optional[str] = Query(None),
+    competitorId: Optional[str] = Query(None),
+    impactLevel: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Insight counts grouped by any of week, therapeuticArea, competitorId and
+    impactLevel (comma-separated `groupBy`; none for just the total), read
+    from the rollup table.
+    """
+    try:
+        dimensions = parse_group_by(groupBy)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    filters = RollupFilters(weekFrom, weekTo, therapeuticArea, competitorId, impactLevel)
+    return {"groupBy": dimensions, **await aggregate(db, dimensions, filters)}
+
+@app.get("/api/insights/cache")
+async def response_cache_stats(user: User = Depends(require_role([ROLE_ADMIN]))):
+    return response_cache.stats()
+
+INSIGHTS_SEARCH_PAGE_MAX = int(os.getenv("INSIGHTS_SEARCH_PAGE_MAX", "100"))
+
+# Declared before /api/insights/{id} so "search" is not taken for an ID
+@app.get("/api/insights/search", response_model=schemas.InsightSearchResponse)
+async def search(
+    q: str = Query(..., min_length=1),
     therapeuticArea: Optional[str] = Query(None),
     competitorId: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    impactLevel: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    minRelevance: Optional[float] = Query(None),
+    maxRelevance: Optional[float] = Query(None),
+    publishedFrom: Optional[date] = Query(None),
+    publishedTo: Optional[date] = Query(None),
+    limit: int = Query(20, ge=1),
+    offset: int = Query(0, ge=0),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    query = select(models.Insight).order_by(models.Insight.created_at.desc())
-    if therapeuticArea:
-        query = query.where(models.Insight.therapeutic_area == therapeuticArea)
-    if competitorId:
-        query = query.where(models.Insight.competitor_id == competitorId)
-        
-    logger.info(f"Executing query: {query}")
-    result = await db.execute(query)
-    insights = result.scalars().all()
-    logger.info(f"Found {len(insights)} insights")
-    return insights
+    """
+    Full-text search over title, tags and description (web search syntax:
+    "quoted phrase", OR, -excluded), best matches first, with highlighted
+    matches and facet counts over all matches.
+    """
+    filters = InsightFilters(
+        therapeuticArea, competitorId, category, impactLevel, source,
+        minRelevance, maxRelevance, publishedFrom, publishedTo
+    )
+    found = await search_insights(db, q, filters, min(limit, INSIGHTS_SEARCH_PAGE_MAX), offset)
+    items = [
+        schemas.InsightSearchHit(
+            **schemas.InsightResponse.model_validate(hit["insight"]).model_dump(),
+            rank=hit["rank"],
+            highlights=hit["highlights"]
+        )
+        for hit in found["items"]
+    ]
+    return {"total": found["total"], "items": items, "facets": found["facets"]}
 
 @app.get("/api/insights/{id}", response_model=schemas.InsightResponse)
 async def get_insight(
     id: str, 
+    request: Request,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    result = await db.execute(select(models.Insight).where(models.Insight.id == id))
-    insight = result.scalar_one_or_none()
-    if not insight:
-        raise HTTPException(status_code=404, detail="Insight not found")
-    return insight
+    async def load():
+        result = await db.execute(select(models.Insight).where(models.Insight.id == id))
+        insight = result.scalar_one_or_none()
+        if not insight:
+            raise HTTPException(status_code=404, detail="Insight not found")
+        return insight_json(insight), {}
+
+    return await response_cache.respond(request, [f"insight:{id}"], load)
 
 @app.delete("/api/insights/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_insight(
@@ -122,7 +316,9 @@ async def delete_insight(
         raise HTTPException(status_code=404, detail="Insight not found")
     
     await db.delete(insight)
+    await adjust(db, changed(bucket(insight), None))
     await db.commit()
+    await response_cache.invalidate("insights", f"insight:{id}")
     logger.info(f"Deleted insight {id}")
     return None
 
@@ -138,6 +334,7 @@ async def update_insight(
     if not insight:
         raise HTTPException(status_code=404, detail="Insight not found")
     
+    before = bucket(insight)
     update_data = updates.model_dump(exclude_unset=True, by_alias=False)
     for field, value in update_data.items():
         setattr(insight, field, value)
@@ -146,7 +343,9 @@ async def update_insight(
     if 'impact_level' in update_data and 'relevance_score' not in update_data:
         insight.relevance_score = calculate_relevance(insight.impact_level, None)
     
+    await adjust(db, changed(before, bucket(insight)))
     await db.commit()
     await db.refresh(insight)
+    await response_cache.invalidate("insights", f"insight:{id}")
     logger.info(f"Updated insight {id}")
     return insight
@@ -0,0 +1,46 @@
+from sqlalchemy import text
+
+from .models.insight import SEARCH_VECTOR
+
+# create_all only creates missing tables, so columns and indexes added to
+# existing tables are listed here. Every statement must be idempotent.
+SCHEMA_UPGRADES = [
+    # Keyset pagination of /api/insights (see services/insights/src/listing.py)
+    "CREATE INDEX IF NOT EXISTS ix_insights_created ON insights (coalesce(created_at, DATE '0001-01-01'), id)",
+    "CREATE INDEX IF NOT EXISTS ix_insights_published ON insights (coalesce(published_date, DATE '0001-01-01'), id)",
+    "CREATE INDEX IF NOT EXISTS ix_insights_relevance ON insights (coalesce(relevance_score, -1.0), id)",
+    "CREATE INDEX IF NOT EXISTS ix_insights_area_created ON insights (therapeutic_area, coalesce(created_at, DATE '0001-01-01'), id)",
+    "CREATE INDEX IF NOT EXISTS ix_insights_area_relevance ON insights (therapeutic_area, coalesce(relevance_score, -1.0), id)",
+    "CREATE INDEX IF NOT EXISTS ix_insights_competitor_created ON insights (competitor_id, coalesce(created_at, DATE '0001-01-01'), id)",
+    "CREATE INDEX IF NOT EXISTS ix_insights_competitor_relevance ON insights (competitor_id, coalesce(relevance_score, -1.0), id)",
+    # Full-text search (see services/insights/src/search.py)
+    "ALTER TABLE insights ADD COLUMN IF NOT EXISTS tags JSONB",
+    f"ALTER TABLE insights ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_insights_search ON insights USING gin (search_vector)",
+    # Bulk upsert key (see services/insights/src/bulk.py)
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_insights_source_document ON insights (source_document_id)",
+]
+
+# Retried documents could leave several insights before the unique index
+# existed: keep the oldest of each
+DEDUPLICATE_SOURCE_DOCUMENTS = """
+    DELETE FROM insights WHERE id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY source_document_id ORDER BY created_at NULLS LAST, id
+            ) AS n
+            FROM insights
+            WHERE source_document_id IS NOT NULL
+        ) ranked
+        WHERE n > 1
+    )
+"""
+
+async def upgrade_schema(conn):
+    if (await conn.execute(text("SELECT to_regclass('ux_insights_source_document')"))).scalar() is None:
+        removed = (await conn.execute(text(DEDUPLICATE_SOURCE_DOCUMENTS))).rowcount
+        if removed:
+            # Recounted by rebuild_rollups() at startup
+            await conn.execute(text("TRUNCATE insight_rollups"))
+    for statement in SCHEMA_UPGRADES:
+        await conn.execute(text(statement))
@@ -1 +1,2 @@
 from .insight import Insight
+from .rollup import InsightRollup
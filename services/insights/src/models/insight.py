@@ -1,7 +1,22 @@
-from sqlalchemy import Column, String, Date, Text, Float
+from sqlalchemy import Column, String, Date, Text, Float, Index, Computed, func, literal_column
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
 from src.database import Base
 from datetime import datetime
 
+# Nullable sort columns are ordered through COALESCE (NULLs sort last,
+# newest/highest first), so keyset cursors compare plain values
+MIN_DATE = literal_column("DATE '0001-01-01'")
+MIN_RELEVANCE = literal_column("-1.0")
+
+# Full-text search document (see services/insights/src/search.py): title
+# weighs most, then tags, then the description
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(tags, '[]'::jsonb), '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 class Insight(Base):
     __tablename__ = "insights"
 
@@ -16,4 +31,24 @@ class Insight(Base):
     source = Column(String)
     published_date = Column(Date)
     source_document_id = Column(String)
+    tags = Column(JSONB) # Keywords from the analysis, list of strings
     created_at = Column(Date, default=datetime.utcnow)
+    # Only used in WHERE/ORDER BY, never loaded with the row
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
+
+# Sort keys of GET /api/insights (see services/insights/src/listing.py)
+CREATED_KEY = func.coalesce(Insight.created_at, MIN_DATE)
+PUBLISHED_KEY = func.coalesce(Insight.published_date, MIN_DATE)
+RELEVANCE_KEY = func.coalesce(Insight.relevance_score, MIN_RELEVANCE)
+
+# Keyset pagination per sort, unfiltered and by the two selective filters
+Index("ix_insights_created", CREATED_KEY, Insight.id)
+Index("ix_insights_published", PUBLISHED_KEY, Insight.id)
+Index("ix_insights_relevance", RELEVANCE_KEY, Insight.id)
+Index("ix_insights_area_created", Insight.therapeutic_area, CREATED_KEY, Insight.id)
+Index("ix_insights_area_relevance", Insight.therapeutic_area, RELEVANCE_KEY, Insight.id)
+Index("ix_insights_competitor_created", Insight.competitor_id, CREATED_KEY, Insight.id)
+Index("ix_insights_competitor_relevance", Insight.competitor_id, RELEVANCE_KEY, Insight.id)
+Index("ix_insights_search", Insight.search_vector, postgresql_using="gin")
+# One insight per source document: POST /api/insights/bulk upserts on it
+Index("ux_insights_source_document", Insight.source_document_id, unique=True)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Date, Index
+from src.database import Base
+
+class InsightRollup(Base):
+    """
+    Insight counts per (week, therapeutic area, competitor, impact level),
+    maintained with the insights they count (see services/insights/src/rollups.py).
+    """
+    __tablename__ = "insight_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    week = Column(Date, nullable=False) # Monday of the insight's published (else created) week
+    therapeutic_area = Column(String)
+    competitor_id = Column(String)
+    impact_level = Column(String) # Capitalized: High, Medium, Low
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            "ux_insight_rollups_bucket",
+            "week", "therapeutic_area", "competitor_id", "impact_level",
+            unique=True,
+            postgresql_nulls_not_distinct=True
+        ),
+    )
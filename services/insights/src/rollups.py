@@ -0,0 +1,148 @@
+"""
+Precomputed insight counts for dashboards.
+
+`insight_rollups` holds one count per (week, therapeutic area, competitor,
+impact level) bucket. The create/update/delete handlers adjust the affected
+buckets in the same transaction as the insight itself, so the counts never
+drift from the table, and aggregate queries sum buckets: O(buckets), not
+O(insights).
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+
+Bucket = Tuple[date, Optional[str], Optional[str], Optional[str]]
+
+# API dimension name -> rollup column
+DIMENSIONS = {
+    "week": models.InsightRollup.week,
+    "therapeuticArea": models.InsightRollup.therapeutic_area,
+    "competitorId": models.InsightRollup.competitor_id,
+    "impactLevel": models.InsightRollup.impact_level,
+}
+BUCKET_COLUMNS = ["week", "therapeutic_area", "competitor_id", "impact_level"]
+
+def week_of(day: date) -> date:
+    """Monday of the day's ISO week (what date_trunc('week') returns)."""
+    return day - timedelta(days=day.weekday())
+
+def bucket(insight) -> Bucket:
+    # created_at is only set at flush, so a new insight falls back to today
+    day = insight.published_date or insight.created_at or datetime.utcnow().date()
+    impact = insight.impact_level.title() if insight.impact_level else None
+    return week_of(day), insight.therapeutic_area, insight.competitor_id, impact
+
+async def adjust(session, deltas: Counter):
+    """Add `deltas` (bucket -> change) to the rollups, in the caller's transaction."""
+    # Sorted so concurrent writers lock bucket rows in the same order
+    changes = sorted(
+        ((key, delta) for key, delta in deltas.items() if delta),
+        key=lambda item: tuple("" if part is None else str(part) for part in item[0])
+    )
+    if not changes:
+        return
+    Rollup = models.InsightRollup
+    statement = pg_insert(Rollup).values([
+        {**dict(zip(BUCKET_COLUMNS, key)), "count": delta} for key, delta in changes
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=BUCKET_COLUMNS,
+        set_={"count": Rollup.count + statement.excluded["count"]}
+    )
+    await session.execute(statement)
+
+def changed(before: Optional[Bucket], after: Optional[Bucket]) -> Counter:
+    """Deltas for an insight moving from `before` to `after` (None: absent)."""
+    deltas = Counter()
+    if before != after:
+        if before is not None:
+            deltas[before] -= 1
+        if after is not None:
+            deltas[after] += 1
+    return deltas
+
+async def rebuild_rollups(session, only_if_empty: bool = False) -> bool:
+    """
+    Recompute every bucket from the insights table. Writers block on the
+    table lock until the rebuild commits, then apply their own deltas on
+    top. Returns whether a rebuild ran.
+    """
+    Rollup, Insight = models.InsightRollup, models.Insight
+    await session.execute(text("LOCK TABLE insight_rollups IN EXCLUSIVE MODE"))
+    if only_if_empty and (await session.execute(select(Rollup.id).limit(1))).first():
+        return False
+    await session.execute(delete(Rollup))
+    # Unit inlined so the SELECT and GROUP BY expressions are identical
+    week = func.date_trunc(literal_column("'week'"), func.coalesce(Insight.published_date, Insight.created_at, func.current_date()))
+    columns = [
+        cast(week, Date),
+        Insight.therapeutic_area,
+        Insight.competitor_id,
+        func.initcap(Insight.impact_level),
+    ]
+    await session.execute(
+        insert(Rollup).from_select(
+            BUCKET_COLUMNS + ["count"],
+            select(*columns, func.count()).group_by(*columns)
+        )
+    )
+    return True
+
+class RollupFilters:
+    def __init__(
+        self,
+        week_from: Optional[date] = None,
+        week_to: Optional[date] = None,
+        therapeutic_area: Optional[str] = None,
+        competitor_id: Optional[str] = None,
+        impact_level: Optional[str] = None
+    ):
+        self.week_from = week_from
+        self.week_to = week_to
+        self.therapeutic_area = therapeutic_area
+        self.competitor_id = competitor_id
+        self.impact_level = impact_level
+
+    def apply(self, query):
+        Rollup = models.InsightRollup
+        if self.week_from:
+            query = query.where(Rollup.week >= week_of(self.week_from))
+        if self.week_to:
+            query = query.where(Rollup.week <= self.week_to)
+        if self.therapeutic_area:
+            query = query.where(Rollup.therapeutic_area == self.therapeutic_area)
+        if self.competitor_id:
+            query = query.where(Rollup.competitor_id == self.competitor_id)
+        if self.impact_level:
+            query = query.where(Rollup.impact_level == self.impact_level.title())
+        return query
+
+def parse_group_by(group_by: Optional[str]) -> List[str]:
+    """Validate a comma-separated list of dimensions. Raises ValueError on unknown ones."""
+    names = [name.strip() for name in (group_by or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+async def aggregate(session, group_by: List[str], filters: RollupFilters) -> Dict:
+    Rollup = models.InsightRollup
+    columns = [DIMENSIONS[name].label(name) for name in group_by]
+    total = func.sum(Rollup.count)
+    query = filters.apply(select(*columns, total.label("count")))
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+    result = await session.execute(query.having(total > 0))
+    buckets = []
+    for row in result.all():
+        item = {name: row._mapping[name] for name in group_by}
+        if "week" in item:
+            item["week"] = item["week"].isoformat()
+        item["count"] = int(row._mapping["count"])
+        buckets.append(item)
+    return {"total": sum(item["count"] for item in buckets), "buckets": buckets}
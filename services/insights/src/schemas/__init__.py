@@ -1 +1 @@
-from .insight import InsightBase, InsightCreate, InsightUpdate, InsightResponse
+from .insight import InsightBase, InsightCreate, InsightUpdate, InsightResponse, InsightSearchHit, FacetCount, InsightSearchResponse, InsightBulkItem, InsightBulkResponse
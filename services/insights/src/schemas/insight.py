@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import date
 
 class InsightBase(BaseModel):
@@ -13,6 +13,7 @@ class InsightBase(BaseModel):
     source: Optional[str] = None
     published_date: Optional[date] = Field(default=None, alias="publishedDate")
     source_document_id: Optional[str] = Field(default=None, alias="sourceDocumentId")
+    tags: Optional[List[str]] = None
     
     model_config = ConfigDict(populate_by_name=True)
 
@@ -28,6 +29,7 @@ class InsightUpdate(BaseModel):
     impact_level: Optional[str] = Field(default=None, alias="impactLevel")
     relevance_score: Optional[float] = Field(default=None, alias="relevanceScore")
     source: Optional[str] = None
+    tags: Optional[List[str]] = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -36,3 +38,30 @@ class InsightResponse(InsightBase):
     created_at: Optional[date] = Field(default=None, alias="createdAt")
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+class InsightSearchHit(InsightResponse):
+    rank: float
+    # Field -> text with matches wrapped in <mark></mark>
+    highlights: Dict[str, str] = {}
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class InsightSearchResponse(BaseModel):
+    total: int
+    items: List[InsightSearchHit]
+    # Facet name (category, therapeuticArea, impactLevel, competitorId) -> counts
+    facets: Dict[str, List[FacetCount]]
+
+class InsightBulkItem(BaseModel):
+    id: str
+    source_document_id: Optional[str] = Field(default=None, alias="sourceDocumentId")
+    # False when an insight for the source document already existed and was updated
+    created: bool
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class InsightBulkResponse(BaseModel):
+    # In request order
+    items: List[InsightBulkItem]
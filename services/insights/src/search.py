@@ -0,0 +1,89 @@
+"""
+Full-text and faceted search over insights.
+
+`insights.search_vector` is a generated tsvector over title (weight A), tags
+(B) and description (C), with a GIN index. A search runs two queries over
+the same GIN match: the page of hits, ranked with ts_rank_cd and highlighted
+with ts_headline, and the total plus the counts of every facet in one
+GROUPING SETS aggregate.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, literal_column, select, tuple_
+
+from . import models
+from .listing import InsightFilters
+
+# API facet name -> column
+FACETS = {
+    "category": models.Insight.category,
+    "therapeuticArea": models.Insight.therapeutic_area,
+    "impactLevel": models.Insight.impact_level,
+    "competitorId": models.Insight.competitor_id,
+}
+FACET_LIMIT = 20
+
+# Inlined rather than bound: asyncpg cannot encode a regconfig parameter
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+TITLE_HEADLINE = "HighlightAll=true, StartSel=<mark>, StopSel=</mark>"
+DESCRIPTION_HEADLINE = "MaxFragments=2, MaxWords=30, MinWords=10, StartSel=<mark>, StopSel=</mark>"
+
+def ts_query(q: str):
+    # Web search syntax: "quoted phrase", OR, -excluded
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+def matching(query, q: str, filters: InsightFilters):
+    return filters.apply(query.where(models.Insight.search_vector.op("@@")(ts_query(q))))
+
+def build_hits_query(q: str, filters: InsightFilters, limit: int, offset: int):
+    Insight = models.Insight
+    tsq = ts_query(q)
+    rank = func.ts_rank_cd(Insight.search_vector, tsq)
+    # ts_headline is costly, and Postgres evaluates it after ORDER BY/LIMIT,
+    # so only the returned rows are highlighted
+    query = select(
+        Insight,
+        rank.label("rank"),
+        func.ts_headline(SEARCH_CONFIG, Insight.title, tsq, TITLE_HEADLINE).label("title_headline"),
+        func.ts_headline(SEARCH_CONFIG, func.coalesce(Insight.description, ""), tsq, DESCRIPTION_HEADLINE).label("description_headline"),
+    )
+    return matching(query, q, filters).order_by(rank.desc(), Insight.id).limit(limit).offset(offset)
+
+def build_facets_query(q: str, filters: InsightFilters):
+    matches = matching(select(*FACETS.values()), q, filters).subquery()
+    columns = [matches.c[column.key] for column in FACETS.values()]
+    sets = [tuple_(column) for column in columns] + [tuple_()]
+    return select(
+        *columns,
+        *(func.grouping(column) for column in columns),
+        func.count()
+    ).group_by(func.grouping_sets(*sets))
+
+def collect_facets(rows) -> Tuple[int, Dict[str, List[Dict]]]:
+    """(total, facet name -> top values by count) from build_facets_query() rows."""
+    names = list(FACETS)
+    total = 0
+    facets: Dict[str, List[Dict]] = {name: [] for name in names}
+    for row in rows:
+        values, grouped, count = row[:len(names)], row[len(names):-1], row[-1]
+        if all(grouped):
+            total = count
+            continue
+        index = list(grouped).index(0)
+        facets[names[index]].append({"value": values[index], "count": count})
+    for name in names:
+        facets[name] = sorted(facets[name], key=lambda item: -item["count"])[:FACET_LIMIT]
+    return total, facets
+
+async def search_insights(session, q: str, filters: InsightFilters, limit: int, offset: int) -> Dict:
+    result = await session.execute(build_hits_query(q, filters, limit, offset))
+    items = []
+    for insight, rank, title_headline, description_headline in result.all():
+        items.append({
+            "insight": insight,
+            "rank": rank,
+            "highlights": {"title": title_headline, "description": description_headline},
+        })
+    result = await session.execute(build_facets_query(q, filters))
+    total, facets = collect_facets(result.all())
+    return {"total": total, "items": items, "facets": facets}
@@ -72,3 +72,151 @@ async def test_get_insight_by_id():
     assert read_res.status_code == 200
     assert read_res.json()["id"] == insight_id
     assert read_res.json()["relevanceScore"] == 3.0
+
+@pytest.mark.asyncio
+async def test_list_insights_keyset_pages_by_relevance():
+    unique_area = f"Area-{uuid.uuid4()}"
+    token = create_test_token("ANALYST")
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        for score in [2.0, 9.5, 5.0, 7.0, 9.5]:
+            await ac.post("/api/insights", json={
+                "title": f"Scored {score}",
+                "therapeuticArea": unique_area,
+                "relevanceScore": score
+            }, headers=headers)
+
+        params = {"therapeuticArea": unique_area, "sort": "relevance", "limit": 2, "withTotal": "true"}
+        first = await ac.get("/api/insights", params=params, headers=headers)
+        second = await ac.get("/api/insights", params={**params, "cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+        third = await ac.get("/api/insights", params={**params, "cursor": second.headers["X-Next-Cursor"]}, headers=headers)
+        filtered = await ac.get("/api/insights", params={"therapeuticArea": unique_area, "minRelevance": 6}, headers=headers)
+        bad_cursor = await ac.get("/api/insights", params={"cursor": "not-a-cursor"}, headers=headers)
+
+    scores = [i["relevanceScore"] for page in (first, second, third) for i in page.json()]
+    assert scores == [9.5, 9.5, 7.0, 5.0, 2.0]
+    assert first.headers["X-Total-Count"] == "5"
+    assert first.headers["X-Total-Count-Exact"] == "true"
+    assert "X-Next-Cursor" not in third.headers
+    assert sorted(i["relevanceScore"] for i in filtered.json()) == [7.0, 9.5, 9.5]
+    assert bad_cursor.status_code == 422
+
+@pytest.mark.asyncio
+async def test_search_ranks_highlights_and_counts_facets():
+    marker = f"zx{uuid.uuid4().hex[:8]}"
+    token = create_test_token("ANALYST")
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/insights", json={
+            "title": f"{marker} KRAS inhibitor enters Phase 3",
+            "category": "Clinical Trial",
+            "therapeuticArea": "Oncology",
+            "impactLevel": "High"
+        }, headers=headers)
+        await ac.post("/api/insights", json={
+            "title": "Quarterly pipeline review",
+            "description": f"Mentions {marker} once in passing.",
+            "category": "General",
+            "therapeuticArea": "Oncology",
+            "tags": ["pipeline"]
+        }, headers=headers)
+
+        response = await ac.get("/api/insights/search", params={"q": marker}, headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    # A title match outranks a description match
+    assert data["items"][0]["title"].startswith(marker)
+    assert f"<mark>{marker}</mark>" in data["items"][0]["highlights"]["title"]
+    assert {"value": "Oncology", "count": 2} in data["facets"]["therapeuticArea"]
+    assert sorted(f["value"] for f in data["facets"]["category"]) == ["Clinical Trial", "General"]
+
+@pytest.mark.asyncio
+async def test_aggregates_follow_create_update_delete():
+    competitor = f"comp-{uuid.uuid4().hex[:8]}"
+    analyst = {"Authorization": f"Bearer {create_test_token('ANALYST')}"}
+    admin = {"Authorization": f"Bearer {create_test_token('ADMIN')}"}
+    params = {"competitorId": competitor, "groupBy": "week,impactLevel"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = await ac.post("/api/insights", json={
+            "title": "Readout", "competitorId": competitor, "impactLevel": "high", "publishedDate": "2024-05-15"
+        }, headers=analyst)
+        second = await ac.post("/api/insights", json={
+            "title": "Filing", "competitorId": competitor, "impactLevel": "Low", "publishedDate": "2024-05-17"
+        }, headers=analyst)
+        created = (await ac.get("/api/insights/aggregates", params=params, headers=analyst)).json()
+
+        await ac.put(f"/api/insights/{second.json()['id']}", json={"impactLevel": "High"}, headers=analyst)
+        await ac.delete(f"/api/insights/{first.json()['id']}", headers=admin)
+        changed = (await ac.get("/api/insights/aggregates", params=params, headers=analyst)).json()
+        bad = await ac.get("/api/insights/aggregates", params={"groupBy": "color"}, headers=analyst)
+
+    # Both land in the week starting Monday 2024-05-13; "high" counts as High
+    assert created["total"] == 2
+    assert created["buckets"] == [
+        {"week": "2024-05-13", "impactLevel": "High", "count": 1},
+        {"week": "2024-05-13", "impactLevel": "Low", "count": 1},
+    ]
+    assert changed["buckets"] == [{"week": "2024-05-13", "impactLevel": "High", "count": 1}]
+    assert bad.status_code == 422
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_is_idempotent_per_source_document():
+    prefix = f"doc-{uuid.uuid4().hex[:8]}"
+    headers = {"Authorization": f"Bearer {create_test_token('ANALYST')}"}
+    batch = [
+        {"title": f"Insight {i}", "sourceDocumentId": f"{prefix}-{i}", "impactLevel": "Medium", "competitorId": prefix}
+        for i in range(3)
+    ]
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = await ac.post("/api/insights/bulk", json=batch, headers=headers)
+        # A retry, with one document re-analysed and one new
+        batch[1]["impactLevel"] = "High"
+        retry = await ac.post("/api/insights/bulk", json=batch + [
+            {"title": "Insight 3", "sourceDocumentId": f"{prefix}-3", "competitorId": prefix}
+        ], headers=headers)
+        listed = await ac.get("/api/insights", params={"competitorId": prefix}, headers=headers)
+        counts = await ac.get("/api/insights/aggregates", params={"competitorId": prefix, "groupBy": "impactLevel"}, headers=headers)
+        duplicate = await ac.post("/api/insights/bulk", json=[batch[0], batch[0]], headers=headers)
+        single = await ac.post("/api/insights", json=batch[0], headers=headers)
+
+    assert first.status_code == 200
+    first_ids = [item["id"] for item in first.json()["items"]]
+    assert [item["sourceDocumentId"] for item in first.json()["items"]] == [f"{prefix}-{i}" for i in range(3)]
+    assert all(item["created"] for item in first.json()["items"])
+
+    items = retry.json()["items"]
+    assert [item["id"] for item in items[:3]] == first_ids
+    assert [item["created"] for item in items] == [False, False, False, True]
+    assert len(listed.json()) == 4
+    assert next(i for i in listed.json() if i["id"] == first_ids[1])["relevanceScore"] == 9.0
+    assert {b["impactLevel"]: b["count"] for b in counts.json()["buckets"]} == {"Medium": 2, "High": 1, None: 1}
+    assert duplicate.status_code == 422
+    assert single.status_code == 409
+
+@pytest.mark.asyncio
+async def test_get_insight_revalidates_and_sees_updates():
+    headers = {"Authorization": f"Bearer {create_test_token('ANALYST')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        created = await ac.post("/api/insights", json={"title": "Cached"}, headers=headers)
+        url = f"/api/insights/{created.json()['id']}"
+        first = await ac.get(url, headers=headers)
+        revalidated = await ac.get(url, headers={**headers, "If-None-Match": first.headers["etag"]})
+        await ac.put(url, json={"title": "Cached, then updated"}, headers=headers)
+        changed = await ac.get(url, headers={**headers, "If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200 and first.json()["title"] == "Cached"
+    assert revalidated.status_code == 304
+    assert changed.status_code == 200 and changed.json()["title"] == "Cached, then updated"
+
+@pytest.mark.asyncio
+async def test_create_insight_rejects_known_source_document():
+    payload = {"title": "Once", "sourceDocumentId": f"doc-{uuid.uuid4().hex[:8]}", "impactLevel": "Low"}
+    headers = {"Authorization": f"Bearer {create_test_token('ANALYST')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = await ac.post("/api/insights", json=payload, headers=headers)
+        second = await ac.post("/api/insights", json=payload, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 409
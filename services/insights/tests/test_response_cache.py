@@ -0,0 +1,76 @@
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from httpx import AsyncClient
+from libs.shared.src.events import InMemoryEventBus
+from libs.shared.src.response_cache import InMemoryRemoteCache, ResponseCache
+
+def make_app(cache: ResponseCache, rows: dict, loads: list):
+    app = FastAPI()
+
+    @app.get("/things/{id}")
+    async def get_thing(id: str, request: Request):
+        async def load():
+            loads.append(id)
+            if id not in rows:
+                raise HTTPException(status_code=404)
+            return rows[id], {"X-Source": "db"}
+
+        return await cache.respond(request, [f"thing:{id}"], load)
+
+    return app
+
+@pytest.mark.asyncio
+async def test_respond_caches_revalidates_and_invalidates():
+    rows, loads = {"a": {"name": "A"}}, []
+    cache = ResponseCache("test")
+    async with AsyncClient(app=make_app(cache, rows, loads), base_url="http://test") as ac:
+        first = await ac.get("/things/a")
+        second = await ac.get("/things/a")
+        revalidated = await ac.get("/things/a", headers={"If-None-Match": first.headers["etag"]})
+        missing = await ac.get("/things/b")
+        rows["a"] = {"name": "A2"}
+        await cache.invalidate("thing:a")
+        changed = await ac.get("/things/a", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.json() == second.json() == {"name": "A"}
+    assert second.headers["x-source"] == "db"
+    assert revalidated.status_code == 304
+    assert missing.status_code == 404
+    assert changed.status_code == 200 and changed.json() == {"name": "A2"}
+    assert changed.headers["etag"] != first.headers["etag"]
+    # a, b (errors are not cached), a after the invalidation
+    assert loads == ["a", "b", "a"]
+    stats = cache.stats()
+    assert (stats["memoryHits"], stats["misses"], stats["notModified"]) == (2, 3, 1)
+
+@pytest.mark.asyncio
+async def test_replicas_share_remote_tier_and_invalidations():
+    rows, loads = {"a": {"name": "A"}}, []
+    remote, bus = InMemoryRemoteCache(), InMemoryEventBus()
+    one = ResponseCache("test", remote=remote, event_bus=bus)
+    two = ResponseCache("test", remote=remote, event_bus=bus)
+    await one.subscribe()
+    await two.subscribe()
+    async with AsyncClient(app=make_app(one, rows, loads), base_url="http://test") as ac_one, \
+            AsyncClient(app=make_app(two, rows, loads), base_url="http://test") as ac_two:
+        await ac_one.get("/things/a")
+        await ac_two.get("/things/a")
+        rows["a"] = {"name": "A2"}
+        # A write handled by replica one
+        await one.invalidate("thing:a")
+        after = await ac_two.get("/things/a")
+
+    assert two.stats()["remoteHits"] == 1
+    assert after.json() == {"name": "A2"}
+    assert loads == ["a", "a"]
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used():
+    cache = ResponseCache("test", max_entries=2)
+    rows, loads = {"a": 1, "b": 2, "c": 3}, []
+    async with AsyncClient(app=make_app(cache, rows, loads), base_url="http://test") as ac:
+        for id in ["a", "b", "a", "c", "a", "b"]:
+            await ac.get(f"/things/{id}")
+
+    assert loads == ["a", "b", "c", "b"]
+    assert cache.stats()["evictions"] == 2
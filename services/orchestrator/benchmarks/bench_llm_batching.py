@@ -0,0 +1,67 @@
+"""
+Compare single-document and batched LLM requests against a local fake
+OpenAI-compatible server (benchmarks/fake_openai.py).
+
+Run from services/orchestrator:
+    PYTHONPATH=../..:. python -m benchmarks.bench_llm_batching --docs 120 --batch-size 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+from benchmarks.fake_openai import start_server
+
+# gpt-4o-mini list prices, USD per 1M tokens
+INPUT_PRICE = 0.15
+OUTPUT_PRICE = 0.60
+
+def make_competitors(n: int):
+    return [{"id": f"comp-{i:03d}", "name": f"Competitor Pharma {i}"} for i in range(n)]
+
+def make_documents(n: int):
+    body = "Phase 2 results for an investigational oncology compound were presented. " * 20
+    return [f"Document {i}\n{body}" for i in range(n)]
+
+async def run(mode: str, docs, competitors, batch_size: int):
+    from src.clients.llm_client import LLMClient
+
+    client = LLMClient(batch_size=batch_size, max_in_flight=64)
+    started = time.perf_counter()
+    if mode == "single":
+        await asyncio.gather(*(client.analyze_content(text, competitors) for text in docs))
+    else:
+        await client.analyze_batch(docs, competitors)
+    elapsed = time.perf_counter() - started
+
+    usage = client.usage
+    cost = (usage["promptTokens"] * INPUT_PRICE + usage["completionTokens"] * OUTPUT_PRICE) / 1_000_000
+    await client.aclose()
+    print(
+        f"{mode:>7} {usage['requests']:>9} {usage['promptTokens'] / len(docs):>14.0f} "
+        f"{elapsed:>8.2f} {len(docs) / elapsed:>9.1f} {cost / len(docs) * 1000:>14.4f}"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=120)
+    parser.add_argument("--competitors", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    os.environ["OPENAI_API_KEY"] = "sk-local-benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1/"
+
+    docs = make_documents(args.docs)
+    competitors = make_competitors(args.competitors)
+    print(f"{args.docs} documents, {args.competitors} competitors, batch size {args.batch_size}")
+    print(f"{'mode':>7} {'requests':>9} {'prompt tok/doc':>14} {'seconds':>8} {'docs/sec':>9} {'$ per 1k docs':>14}")
+    await run("single", docs, competitors, 1)
+    await run("batch", docs, competitors, args.batch_size)
+    server.should_exit = True
+
+if __name__ == "__main__":
+    asyncio.run(main())
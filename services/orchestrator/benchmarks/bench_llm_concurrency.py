@@ -0,0 +1,77 @@
+"""
+Latency and concurrency of the native async OpenAI client versus the previous
+approach (synchronous client wrapped in run_in_executor), measured against the
+local fake OpenAI-compatible server (benchmarks/fake_openai.py).
+
+Run from services/orchestrator:
+    PYTHONPATH=../..:. python -m benchmarks.bench_llm_concurrency --requests 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import openai
+
+from benchmarks.fake_openai import start_server
+
+async def timed(coro_factory, latencies):
+    started = time.perf_counter()
+    await coro_factory()
+    latencies.append(time.perf_counter() - started)
+
+async def run_executor(requests: int, body):
+    client = openai.OpenAI()
+    loop = asyncio.get_running_loop()
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        timed(lambda: loop.run_in_executor(None, lambda: client.chat.completions.create(**body)), latencies)
+        for _ in range(requests)
+    ))
+    return time.perf_counter() - started, latencies
+
+async def run_async(requests: int, body, max_in_flight: int):
+    from src.clients.llm_client import LLMClient
+
+    client = LLMClient(max_in_flight=max_in_flight)
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        timed(lambda: client._complete(body["messages"][0]["content"], body["messages"][1]["content"]), latencies)
+        for _ in range(requests)
+    ))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return elapsed, latencies
+
+def report(label, elapsed, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:>26} {elapsed:>8.2f} {len(latencies) / elapsed:>8.1f} {p50:>8.2f} {p95:>8.2f}")
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-in-flight", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    os.environ["OPENAI_API_KEY"] = "sk-local-benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1/"
+
+    from src.clients.llm_client import build_request_body
+    body = build_request_body("You are a benchmark.", "Analyse this short document.")
+
+    print(f"{args.requests} concurrent requests, default executor has {min(32, (os.cpu_count() or 1) + 4)} threads")
+    print(f"{'mode':>26} {'seconds':>8} {'req/sec':>8} {'p50':>8} {'p95':>8}")
+    report("run_in_executor", *await run_executor(args.requests, body))
+    for limit in args.max_in_flight:
+        report(f"AsyncOpenAI ({limit} in flight)", *await run_async(args.requests, body, limit))
+    server.should_exit = True
+
+if __name__ == "__main__":
+    asyncio.run(main())
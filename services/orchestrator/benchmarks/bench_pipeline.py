@@ -0,0 +1,111 @@
+"""
+Throughput benchmark for the orchestrator worker pool.
+
+The LLM is replaced by a stub that sleeps for a fixed latency, the downstream
+services by an in-memory httpx transport, and the per-document commit by a
+no-op (no claims are taken), so the numbers isolate the pipeline's scheduling behaviour.
+
+Run from services/orchestrator:
+    PYTHONPATH=../..:. python -m benchmarks.bench_pipeline --docs 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from libs.shared.src.http_client import ServiceClient
+from src import models
+from src.pipeline import DocumentPipeline
+
+class StubLLMClient:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def analyze_content(self, text, competitors=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {
+            "summary": "Stub summary.",
+            "therapeutic_area": "Oncology",
+            "category": "General",
+            "impact_level": "Low",
+            "relevance_score": 3.0,
+            "entities": {"company": "N/A", "drug": "N/A", "phase": "N/A", "indication": "N/A"},
+            "matched_competitor_id": None,
+            "tags": []
+        }
+
+class StubCompetitorClient:
+    async def get_competitors(self, headers=None):
+        return []
+
+    async def add_trial(self, competitor_id, trial_data, headers=None):
+        return None
+
+class BenchPipeline(DocumentPipeline):
+    async def mark_processed(self, doc_id: str):
+        return True
+
+    async def release(self, doc_id: str, refund_attempt: bool = False):
+        return None
+
+def downstream_handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/api/insights/bulk":
+        items = [
+            {"id": f"insight-{uuid.uuid4().hex[:8]}", "sourceDocumentId": insight["sourceDocumentId"], "created": True}
+            for insight in json.loads(request.content)
+        ]
+        return httpx.Response(200, json={"items": items})
+    return httpx.Response(200, json={})
+
+def make_documents(n: int):
+    return [
+        models.Document(
+            id=f"bench-{i}",
+            source="Bench",
+            title=f"Benchmark document {i}",
+            raw_content="{}",
+            processed=False,
+            published_date=datetime.now()
+        )
+        for i in range(n)
+    ]
+
+async def run(docs: int, latency: float, concurrency: int) -> float:
+    http_client = ServiceClient(transport=httpx.MockTransport(downstream_handler))
+    pipeline = BenchPipeline(
+        StubLLMClient(latency),
+        StubCompetitorClient(),
+        insights_url="http://insights",
+        notification_url="http://notification",
+        concurrency=concurrency,
+        batch_size=docs,
+        http_client=http_client
+    )
+    started = time.perf_counter()
+    processed = await pipeline.run_batch(make_documents(docs), [], {})
+    elapsed = time.perf_counter() - started
+    await http_client.aclose()
+    assert processed == docs
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    print(f"{args.docs} documents, {args.latency:.2f}s simulated LLM latency")
+    print(f"{'concurrency':>12} {'seconds':>10} {'docs/min':>10}")
+    for c in args.concurrency:
+        elapsed = await run(args.docs, args.latency, c)
+        print(f"{c:>12} {elapsed:>10.2f} {args.docs / elapsed * 60:>10.0f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
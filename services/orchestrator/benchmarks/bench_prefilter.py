@@ -0,0 +1,76 @@
+"""
+Measure the local pre-filter on a labelled fixture corpus: how many documents
+it keeps away from the LLM, and how many relevant ones it wrongly triages.
+
+Run from services/orchestrator:
+    PYTHONPATH=../..:. python -m benchmarks.bench_prefilter [--corpus path] [--min-score 2]
+
+The local model rows use two-fold cross validation (trained on half the
+corpus, evaluated on the other half) so they are not scored on their own
+training data.
+"""
+import argparse
+import json
+import os
+import time
+
+from src.prefilter import HashedCentroidModel, PreFilter
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "prefilter_corpus.json")
+
+def evaluate(name: str, documents, competitors, make_prefilter):
+    tp = fp = fn = tn = 0
+    started = time.perf_counter()
+    for fold in (0, 1):
+        test = [d for i, d in enumerate(documents) if i % 2 == fold]
+        train = [d for i, d in enumerate(documents) if i % 2 != fold]
+        prefilter = make_prefilter(train)
+        for doc in test:
+            predicted = prefilter.classify(f"{doc['title']}\n{doc['content']}", competitors).relevant
+            if predicted and doc["relevant"]:
+                tp += 1
+            elif predicted:
+                fp += 1
+            elif doc["relevant"]:
+                fn += 1
+            else:
+                tn += 1
+    elapsed = time.perf_counter() - started
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    api_calls = tp + fp
+    print(
+        f"{name:<22} {precision:>9.2f} {recall:>7.2f} {api_calls:>9}/{len(documents):<4} "
+        f"{1 - api_calls / len(documents):>12.0%} {elapsed / len(documents) * 1e6:>10.0f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--min-score", type=int, default=2)
+    parser.add_argument("--model-threshold", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)
+    documents, competitors = corpus["documents"], corpus["competitors"]
+    relevant = sum(1 for d in documents if d["relevant"])
+    print(f"{len(documents)} documents ({relevant} relevant), {len(competitors)} competitors")
+    print(f"{'variant':<22} {'precision':>9} {'recall':>7} {'API calls':>14} {'call savings':>12} {'us/doc':>10}")
+
+    evaluate("no pre-filter", documents, competitors, lambda train: PreFilter(min_score=0))
+    evaluate("rules", documents, competitors, lambda train: PreFilter(min_score=args.min_score))
+    evaluate(
+        "rules + local model",
+        documents,
+        competitors,
+        lambda train: PreFilter(
+            min_score=args.min_score,
+            model=HashedCentroidModel.from_examples([(f"{d['title']}\n{d['content']}", d["relevant"]) for d in train]),
+            model_threshold=args.model_threshold
+        )
+    )
+
+if __name__ == "__main__":
+    main()
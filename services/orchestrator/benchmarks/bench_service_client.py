@@ -0,0 +1,76 @@
+"""
+Compare a fresh httpx.AsyncClient per request (the old pattern) with the
+shared pooled ServiceClient against a local HTTP server.
+
+Run from services/orchestrator:
+    PYTHONPATH=../..:. python -m benchmarks.bench_service_client --requests 500 --concurrency 8
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from libs.shared.src.http_client import ServiceClient
+
+app = FastAPI()
+
+@app.post("/api/insights", status_code=201)
+async def create_insight(payload: dict):
+    return {"id": "insight-1", **payload}
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def per_request_client(url: str, payload: dict):
+    async with httpx.AsyncClient(timeout=30) as client:
+        return await client.post(url, json=payload)
+
+async def run(name: str, call, url: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await call(url, {"title": f"Insight {i}"})
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 201
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<22} {statistics.median(latencies) * 1000:>9.2f} {p95 * 1000:>9.2f} "
+        f"{total / elapsed:>9.0f}"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    start_server(args.port)
+    url = f"http://127.0.0.1:{args.port}/api/insights"
+    print(f"{args.requests} POSTs, concurrency {args.concurrency}")
+    print(f"{'client':<22} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>9}")
+
+    await run("httpx per request", per_request_client, url, args.requests, args.concurrency)
+    client = ServiceClient(timeout=30, max_per_host=args.concurrency)
+    await run("pooled ServiceClient", lambda u, p: client.post(u, json=p), url, args.requests, args.concurrency)
+    await client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
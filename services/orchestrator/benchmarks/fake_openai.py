@@ -0,0 +1,78 @@
+"""
+Minimal OpenAI-compatible chat completions server for local benchmarks.
+
+Latency is simulated as BASE_LATENCY + tokens * PER_TOKEN_LATENCY, token usage
+is estimated at four characters per token, and batch prompts (documents
+delimited by "=== DOCUMENT <n> ===") get one result per document.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+BASE_LATENCY = 0.2
+PER_TOKEN_LATENCY = 0.00002
+
+app = FastAPI()
+app.state.requests = 0
+
+DOC_MARKER = re.compile(r"=== DOCUMENT (\d+) ===")
+
+def fake_analysis(index=None):
+    result = {
+        "summary": "Synthetic analysis.",
+        "therapeutic_area": "Oncology",
+        "category": "General",
+        "impact_level": "Low",
+        "relevance_score": 3.0,
+        "entities": {"company": "N/A", "drug": "N/A", "phase": "N/A", "indication": "N/A"},
+        "matched_competitor_id": None,
+        "tags": ["synthetic"]
+    }
+    if index is not None:
+        result["index"] = index
+    return result
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.requests += 1
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+    user_content = body["messages"][-1]["content"]
+
+    indexes = [int(i) for i in DOC_MARKER.findall(user_content)]
+    if indexes:
+        content = json.dumps({"results": [fake_analysis(i) for i in indexes]})
+    else:
+        content = json.dumps(fake_analysis())
+
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(content) // 4
+    await asyncio.sleep(BASE_LATENCY + (prompt_tokens + completion_tokens) * PER_TOKEN_LATENCY)
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+def start_server(port: int = 8765) -> uvicorn.Server:
+    """Run the fake server in a background thread and wait until it accepts requests."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
@@ -0,0 +1,77 @@
+"""
+Offline backfill through the OpenAI Batch API.
+
+    python -m src.batch_backfill export --out backfill.jsonl [--limit 5000]
+    (upload backfill.jsonl as a Batch job, download its output file)
+    python -m src.batch_backfill import --results output.jsonl --competitors backfill.jsonl.competitors.json
+
+`import` loads the results into the analysis cache under the same keys the
+live pipeline uses, so when the orchestrator picks those documents up it
+creates their insights without calling the API again.
+"""
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from . import models
+from .claims import find_claimable_ids
+from .clients.analysis_cache import AnalysisCache, cache_key
+from .clients.llm_client import PROMPT_VERSION, MAX_DOCUMENT_CHARS, build_batch_file_lines, parse_batch_output_lines
+from .database import AsyncSessionLocal
+from .pipeline import document_text
+
+async def export_batch(out_path: str, limit: int):
+    from .main import comp_client, create_system_token, MAX_ATTEMPTS
+
+    headers = {"Authorization": f"Bearer {create_system_token()}"}
+    competitors = await comp_client.get_competitors(headers=headers)
+
+    async with AsyncSessionLocal() as session:
+        ids = await find_claimable_ids(session, limit, MAX_ATTEMPTS)
+        result = await session.execute(select(models.Document).where(models.Document.id.in_(ids)))
+        documents = result.scalars().all()
+
+    lines = build_batch_file_lines([(doc.id, document_text(doc)) for doc in documents], competitors)
+    with open(out_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    # The competitor list is part of the cache key, so keep the exact one used
+    with open(f"{out_path}.competitors.json", "w") as f:
+        json.dump(competitors, f)
+    print(f"Wrote {len(lines)} requests to {out_path}")
+
+async def import_results(results_path: str, competitors_path: str):
+    with open(competitors_path) as f:
+        competitors = json.load(f)
+    with open(results_path) as f:
+        analyses = parse_batch_output_lines(f)
+
+    cache = AnalysisCache(session_factory=AsyncSessionLocal)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(models.Document).where(models.Document.id.in_(list(analyses))))
+        documents = result.scalars().all()
+
+    for doc in documents:
+        text = document_text(doc)[:MAX_DOCUMENT_CHARS]
+        await cache.set(cache_key(text, competitors, PROMPT_VERSION), analyses[doc.id], PROMPT_VERSION)
+    print(f"Cached {len(documents)} analyses ({len(analyses) - len(documents)} unknown documents skipped)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export")
+    export_cmd.add_argument("--out", required=True)
+    export_cmd.add_argument("--limit", type=int, default=5000)
+    import_cmd = sub.add_parser("import")
+    import_cmd.add_argument("--results", required=True)
+    import_cmd.add_argument("--competitors", required=True)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        asyncio.run(export_batch(args.out, args.limit))
+    else:
+        asyncio.run(import_results(args.results, args.competitors))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Row claiming for the documents table.
+
+Workers claim documents with `FOR UPDATE SKIP LOCKED`, so concurrent replicas
+never pick the same row, and hold them under a time-limited lease. A document
+whose lease expired (its worker crashed) becomes claimable again, until it has
+used up `max_attempts`.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+STATUS_PENDING = "PENDING"
+STATUS_CLAIMED = "CLAIMED"
+STATUS_DONE = "DONE"
+STATUS_FAILED = "FAILED"
+
+def _claimable(now: datetime, max_attempts: int):
+    Document = models.Document
+    return and_(
+        Document.processed == False,
+        or_(Document.attempts == None, Document.attempts < max_attempts),
+        or_(
+            Document.processing_status == None,
+            Document.processing_status == STATUS_PENDING,
+            and_(Document.processing_status == STATUS_CLAIMED, Document.lease_expires_at < now)
+        )
+    )
+
+async def find_claimable_ids(session: AsyncSession, limit: int, max_attempts: int) -> List[str]:
+    """IDs that are free to claim right now (no locks taken)."""
+    result = await session.execute(
+        select(models.Document.id)
+        .where(_claimable(datetime.utcnow(), max_attempts))
+        .order_by(models.Document.ingested_at)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def claim_documents(
+    session: AsyncSession,
+    worker_id: str,
+    limit: int,
+    lease_seconds: int,
+    max_attempts: int,
+    ids: Optional[List[str]] = None
+) -> List[models.Document]:
+    """
+    Atomically claim up to `limit` documents (optionally restricted to `ids`)
+    for `worker_id` and commit the claim. Rows locked by another worker are
+    skipped rather than waited on.
+    """
+    now = datetime.utcnow()
+    candidates = (
+        select(models.Document.id)
+        .where(_claimable(now, max_attempts))
+        .order_by(models.Document.ingested_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if ids is not None:
+        candidates = candidates.where(models.Document.id.in_(ids))
+
+    result = await session.scalars(
+        update(models.Document)
+        .where(models.Document.id.in_(candidates.scalar_subquery()))
+        .values(
+            processing_status=STATUS_CLAIMED,
+            claimed_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=func.coalesce(models.Document.attempts, 0) + 1
+        )
+        .returning(models.Document),
+        execution_options={"synchronize_session": False}
+    )
+    documents = list(result.all())
+    await session.commit()
+    return documents
+
+async def complete_document(session: AsyncSession, doc_id: str, worker_id: str) -> bool:
+    """Mark a claimed document processed. Returns False if the lease was lost."""
+    result = await session.execute(
+        update(models.Document)
+        .where(models.Document.id == doc_id, models.Document.claimed_by == worker_id)
+        .values(
+            processed=True,
+            processing_status=STATUS_DONE,
+            claimed_by=None,
+            lease_expires_at=None
+        )
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+async def release_document(
+    session: AsyncSession, doc_id: str, worker_id: str, max_attempts: int, refund_attempt: bool = False
+):
+    """
+    Give a claimed document back after a failed attempt. Once it has used all
+    its attempts it is parked as FAILED instead of being retried forever.
+    With `refund_attempt` the attempt is not counted, for failures that say
+    nothing about the document itself (e.g. the LLM being rate limited).
+    """
+    Document = models.Document
+    attempts = Document.attempts - 1 if refund_attempt else Document.attempts
+    await session.execute(
+        update(Document)
+        .where(Document.id == doc_id, Document.claimed_by == worker_id)
+        .values(
+            processing_status=case(
+                (attempts >= max_attempts, STATUS_FAILED),
+                else_=STATUS_PENDING
+            ),
+            attempts=attempts,
+            claimed_by=None,
+            lease_expires_at=None
+        )
+    )
+    await session.commit()
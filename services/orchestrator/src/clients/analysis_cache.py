@@ -0,0 +1,157 @@
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..models import AnalysisCacheEntry
+
+logger = logging.getLogger("orchestrator")
+
+# Dates are the usual churn between re-fetches of the same study or press
+# release (lastUpdate, published_at), so they are not part of the hash.
+_DATE_RE = re.compile(r"\d{4}-\d{2}(-\d{2})?([t ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?")
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+def normalize_content(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _DATE_RE.sub(" ", text)
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+def competitor_fingerprint(competitors: Optional[List[Dict]]) -> str:
+    """Stable hash of the competitor list the prompt was built from."""
+    items = sorted(f"{c.get('id')}:{c.get('name')}" for c in competitors or [])
+    return hashlib.sha256("\n".join(items).encode("utf-8")).hexdigest()[:16]
+
+def cache_key(text: str, competitors: Optional[List[Dict]], prompt_version: str) -> str:
+    content_hash = hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+    return f"{prompt_version}:{competitor_fingerprint(competitors)}:{content_hash}"
+
+class AnalysisCache:
+    """
+    Two-tier cache for LLM analyses: an in-memory LRU in front of the
+    `llm_analysis_cache` table. Both tiers expire entries after `ttl_seconds`.
+    Pass `session_factory=None` to run with the memory tier only.
+    """
+
+    def __init__(self, session_factory=None, max_entries: int = 2048, ttl_seconds: int = 7 * 24 * 3600):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry:
+            expires_at, result = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return result
+            del self._memory[key]
+
+        if self.session_factory:
+            try:
+                result = await self._db_get(key)
+            except Exception as e:
+                logger.error(f"Analysis cache lookup failed: {e}")
+                result = None
+            if result is not None:
+                self.db_hits += 1
+                self._remember(key, result)
+                return result
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any], prompt_version: str):
+        self._remember(key, result)
+        self.stores += 1
+        if self.session_factory:
+            try:
+                await self._db_set(key, result, prompt_version)
+            except Exception as e:
+                logger.error(f"Analysis cache write failed: {e}")
+
+    async def purge_expired(self) -> int:
+        """Drop expired rows from the persistent tier."""
+        now = time.time()
+        for key in [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]:
+            del self._memory[key]
+        if not self.session_factory:
+            return 0
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(AnalysisCacheEntry).where(AnalysisCacheEntry.expires_at < datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memoryHits": self.memory_hits,
+            "dbHits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "memoryEntries": len(self._memory),
+            "hitRate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self._memory[key] = (time.time() + self.ttl_seconds, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    async def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        async with self.session_factory() as session:
+            row = await session.execute(
+                select(AnalysisCacheEntry.result_json)
+                .where(AnalysisCacheEntry.key == key, AnalysisCacheEntry.expires_at > datetime.utcnow())
+            )
+            result = row.scalar_one_or_none()
+            if result is not None:
+                await session.execute(
+                    update(AnalysisCacheEntry)
+                    .where(AnalysisCacheEntry.key == key)
+                    .values(hits=AnalysisCacheEntry.hits + 1)
+                )
+                await session.commit()
+            return result
+
+    async def _db_set(self, key: str, result: Dict[str, Any], prompt_version: str):
+        now = datetime.utcnow()
+        values = {
+            "key": key,
+            "prompt_version": prompt_version,
+            "result_json": result,
+            "hits": 0,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds)
+        }
+        stmt = pg_insert(AnalysisCacheEntry).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AnalysisCacheEntry.key],
+            set_={
+                "result_json": stmt.excluded.result_json,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at
+            }
+        )
+        async with self.session_factory() as session:
+            await session.execute(stmt)
+            await session.commit()
@@ -1,40 +1,95 @@
+import asyncio
 import httpx
 import logging
 import os
-from typing import List, Dict, Optional
+import time
+from typing import Any, List, Dict, Optional
+
+from libs.shared.src.http_client import ServiceClient
 
 logger = logging.getLogger("orchestrator")
 
 class CompetitorClient:
-    def __init__(self):
+    """
+    Client for the Competitor Service over a pooled ServiceClient.
+
+    The competitor list is cached: within `ttl_seconds` it is served from
+    memory, after that it is revalidated with If-None-Match, which costs a
+    304 and no body while nothing changed. `invalidate()` (wired to the
+    competitor-changed event) forces the next call to revalidate.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, http_client: Optional[ServiceClient] = None):
         self.base_url = os.getenv("COMPETITOR_SERVICE_URL", "http://competitor-service:8000")
+        self.ttl_seconds = ttl_seconds
+        self.http_client = http_client or ServiceClient(timeout=10)
+        self._snapshot: Optional[List[Dict]] = None
+        self._etag: Optional[str] = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.full_fetches = 0
+
+    def invalidate(self):
+        self._fetched_at = 0.0
 
     async def get_competitors(self, headers: Optional[Dict] = None) -> List[Dict]:
         """Fetch all competitors from the Competitor Service."""
-        try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.get(f"{self.base_url}/api/competitors", headers=headers)
-                response.raise_for_status()
-                return response.json()
-        except Exception as e:
-            logger.error(f"Failed to fetch competitors: {e}")
-            return []
+        async with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._fetched_at < self.ttl_seconds:
+                self.cache_hits += 1
+                return self._snapshot
+
+            request_headers = dict(headers or {})
+            if self._snapshot is not None and self._etag:
+                request_headers["If-None-Match"] = self._etag
+            try:
+                response = await self.http_client.get(
+                    f"{self.base_url}/api/competitors", headers=request_headers, timeout=10
+                )
+                if response.status_code == 304:
+                    self.not_modified += 1
+                else:
+                    response.raise_for_status()
+                    self._snapshot = response.json()
+                    self._etag = response.headers.get("etag")
+                    self.full_fetches += 1
+                self._fetched_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Failed to fetch competitors: {e}")
+                # A stale list beats matching against nothing
+                return self._snapshot or []
+            return self._snapshot
 
     async def add_trial(self, competitor_id: str, trial_data: Dict, headers: Optional[Dict] = None) -> Optional[Dict]:
         """Add a clinical trial to a competitor."""
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/competitors/{competitor_id}/trials",
-                    json=trial_data,
-                    headers=headers
-                )
-                response.raise_for_status()
-                logger.info(f"Successfully added trial {trial_data.get('trialId')} to competitor {competitor_id}")
-                return response.json()
+            # The trial endpoint upserts on trialId, so a retried POST is harmless
+            response = await self.http_client.post(
+                f"{self.base_url}/api/competitors/{competitor_id}/trials",
+                json=trial_data,
+                headers=headers,
+                timeout=10,
+                retry=True
+            )
+            response.raise_for_status()
+            logger.info(f"Successfully added trial {trial_data.get('trialId')} to competitor {competitor_id}")
+            return response.json()
         except httpx.HTTPStatusError as e:
              logger.error(f"Failed to add trial: {e.response.text}")
              return None
         except Exception as e:
             logger.error(f"Error adding trial: {e}")
             return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cacheHits": self.cache_hits,
+            "notModified": self.not_modified,
+            "fullFetches": self.full_fetches,
+            "cachedCompetitors": len(self._snapshot) if self._snapshot is not None else None
+        }
+
+    async def aclose(self):
+        await self.http_client.aclose()
@@ -1,111 +1,413 @@
 import openai
 import asyncio
+import httpx
 import logging
 import json5
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from .analysis_cache import AnalysisCache, cache_key
+from .rate_limiter import RateGovernor, backoff_delay, estimate_tokens, parse_retry_after
 
 logger = logging.getLogger("orchestrator")
 
+# Bump whenever the prompt or model changes so cached analyses are not reused
+PROMPT_VERSION = "v1"
+
+MODEL = "gpt-4o-mini"
+MAX_DOCUMENT_CHARS = 4000
+
+SCHEMA_DESCRIPTION = (
+    "{"
+    '  "summary": "Concise executive summary (1-2 sentences).", '
+    '  "therapeutic_area": "Primary Therapeutic Area (e.g. Oncology, Cardiovascular, Respiratory, Immunology, Neurology, etc.)", '
+    '  "category": "One of: Clinical Trial, Regulatory, Competitor Intelligence, General", '
+    '  "impact_level": "High (Major trial results, approvals), Medium (Phase 2, filings), Low (Pre-clinical, general news)", '
+    '  "relevance_score": "A float from 0.0 to 10.0 indicating how relevant and impactful this is for competitive intelligence. 9-10: breakthrough results, major approvals. 6-8: significant trials, regulatory filings. 3-5: routine updates. 0-2: tangential news.", '
+    '  "entities": {'
+    '    "company": "Primary company name mentioned in the text (e.g. AstraZeneca, Pfizer)", '
+    '    "drug": "Drug name/code (e.g. AZD1234) or N/A", '
+    '    "phase": "Phase (e.g. Phase 3) or N/A", '
+    '    "indication": "Target disease/indication"'
+    '  }, '
+    '  "matched_competitor_id": "The ID from the COMPETITOR LIST above if the document is about one of the tracked competitors, otherwise null", '
+    '  "tags": ["list", "of", "relevant", "keywords"]'
+    "}"
+)
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when the API cannot produce an analysis right now (rate limits,
+    outages, exhausted quota). Callers should retry the document later rather
+    than store a fallback result.
+    """
+
+    def __init__(self, message: str, transient: bool = True):
+        super().__init__(message)
+        self.transient = transient
+
+class LLMParseError(LLMUnavailableError):
+    """The model answered with something that is not an analysis object."""
+
+    def __init__(self, message: str):
+        super().__init__(message, transient=False)
+
+# Server-side failures worth retrying with backoff
+TRANSIENT_ERRORS = (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+def default_result() -> Dict[str, Any]:
+    return {
+        "summary": "Analysis unavailable.",
+        "therapeutic_area": "General",
+        "category": "General",
+        "impact_level": "Low",
+        "relevance_score": 3.0,
+        "entities": {
+            "company": "N/A",
+            "drug": "N/A",
+            "phase": "N/A",
+            "indication": "N/A"
+        },
+        "matched_competitor_id": None,
+        "tags": []
+    }
+
+def build_competitor_context(competitors: Optional[List[Dict]]) -> str:
+    if not competitors:
+        return ""
+    comp_list = [f"  - ID: {c['id']}, Name: {c['name']}" for c in competitors]
+    return (
+        "\n\nYou are provided with the following list of KNOWN COMPETITORS being tracked. "
+        "If the document mentions any of these companies (even by abbreviation, subsidiary, or alternate name), "
+        "return their exact ID in the 'matched_competitor_id' field. "
+        "If no competitor matches, return null.\n\n"
+        "COMPETITOR LIST:\n" + "\n".join(comp_list)
+    )
+
+def build_system_prompt(competitors: Optional[List[Dict]]) -> str:
+    return (
+        "You are an expert Medical and Competitor Intelligence Analyst. "
+        "Analyze the following medical news or clinical trial text. "
+        "Extract structured data and classify its importance for a pharmaceutical competitive intelligence dashboard. "
+        "Return JSON only."
+        + build_competitor_context(competitors) +
+        "\n\nSchema:"
+        + SCHEMA_DESCRIPTION
+    )
+
+def build_batch_system_prompt(competitors: Optional[List[Dict]]) -> str:
+    return (
+        "You are an expert Medical and Competitor Intelligence Analyst. "
+        "You will receive several medical news or clinical trial documents, each starting with a line "
+        "'=== DOCUMENT <index> ==='. Analyze every document independently. "
+        "Extract structured data and classify its importance for a pharmaceutical competitive intelligence dashboard. "
+        "Return JSON only."
+        + build_competitor_context(competitors) +
+        '\n\nReturn an object {"results": [...]} with exactly one entry per document, '
+        'each entry being {"index": <document index>, ...} followed by the fields of this schema:'
+        + SCHEMA_DESCRIPTION
+    )
+
+def build_batch_user_content(texts: List[str]) -> str:
+    return "\n\n".join(f"=== DOCUMENT {i} ===\n{text}" for i, text in enumerate(texts))
+
+def parse_batch_results(content: str, count: int) -> Dict[int, Dict[str, Any]]:
+    """
+    Map document index -> analysis from a batch response. Entries that are
+    missing, duplicated or malformed are left out so the caller can retry them.
+    """
+    data = json5.loads(content)
+    results = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(results, list):
+        raise ValueError("Batch response has no results array")
+
+    parsed = {}
+    for item in results:
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", None)
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        if not isinstance(index, int) or not 0 <= index < count or index in parsed:
+            continue
+        parsed[index] = item
+    return parsed
+
 class LLMClient:
-    def __init__(self):
+    """
+    Async OpenAI client. One long-lived `AsyncOpenAI` instance (and its HTTP
+    connection pool) is shared by every analysis; at most `max_in_flight`
+    requests run at once and each one is bounded by `request_timeout`.
+
+    Every request goes through a RateGovernor that keeps us inside the
+    RPM/TPM budgets and adapts concurrency to 429s. Rate limits and transient
+    errors are retried with retry-after aware backoff; once retries run out
+    an LLMUnavailableError is raised instead of returning a fallback analysis.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[AnalysisCache] = None,
+        batch_size: int = 1,
+        batch_max_chars: int = 24000,
+        max_in_flight: int = 16,
+        request_timeout: float = 60.0,
+        max_retries: int = 5,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None
+    ):
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.batch_max_chars = batch_max_chars
+        self.max_in_flight = max(1, max_in_flight)
+        self.request_timeout = request_timeout
+        self.usage = {"requests": 0, "batchRequests": 0, "promptTokens": 0, "completionTokens": 0, "batchFallbacks": 0}
+        self.max_retries = max_retries
+        self.governor = RateGovernor(rpm_limit=rpm_limit, tpm_limit=tpm_limit, max_concurrency=self.max_in_flight)
+        self.client: Optional[openai.AsyncOpenAI] = None
         self.api_key = os.getenv("OPENAI_API_KEY")
         if self.api_key:
-            openai.api_key = self.api_key
+            self.client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=os.getenv("OPENAI_BASE_URL") or None,
+                timeout=request_timeout,
+                # Retries are ours, so every 429 reaches the governor
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    timeout=request_timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_in_flight,
+                        max_keepalive_connections=self.max_in_flight
+                    )
+                )
+            )
         else:
             logger.warning("OPENAI_API_KEY not found. Automated classification will use fallback rules.")
 
+    async def aclose(self):
+        if self.client:
+            await self.client.close()
+
     async def analyze_content(self, text: str, competitors: List[Dict] = None) -> Dict[str, Any]:
         """
         Analyzes the text using OpenAI to extract structured data and classification.
         If a competitor list is provided, the LLM will also identify which competitor
         the document is about and return the matched competitor ID.
+        Successful analyses are cached by normalized content, competitor list
+        and prompt version, so repeated documents skip the API call.
         """
-        default_result = {
-            "summary": "Analysis unavailable.",
-            "therapeutic_area": "General",
-            "category": "General",
-            "impact_level": "Low",
-            "relevance_score": 3.0,
-            "entities": {
-                "company": "N/A",
-                "drug": "N/A",
-                "phase": "N/A",
-                "indication": "N/A"
-            },
-            "matched_competitor_id": None,
-            "tags": []
-        }
+        if not self.api_key:
+            return default_result()
+
+        truncated_text = text[:MAX_DOCUMENT_CHARS]
 
+        key = None
+        if self.cache:
+            key = cache_key(truncated_text, competitors, PROMPT_VERSION)
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        content = await self._complete(build_system_prompt(competitors), truncated_text)
+
+        try:
+            parsed_result = json5.loads(content)
+        except Exception as e:
+            logger.error(f"Error parsing JSON from OpenAI: {e}. Content: {content}")
+            raise LLMParseError(f"Unparseable analysis: {e}") from e
+        if not isinstance(parsed_result, dict):
+            raise LLMParseError(f"Analysis is a {type(parsed_result).__name__}, not an object")
+
+        if self.cache and key:
+            await self.cache.set(key, parsed_result, PROMPT_VERSION)
+        return parsed_result
+
+    async def analyze_batch(self, texts: List[str], competitors: List[Dict] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Analyze several documents, packing up to `batch_size` of them (and at most
+        `batch_max_chars` of text) into each request so the system prompt and
+        competitor list are sent once per batch rather than once per document.
+        Results come back in input order. A batch whose response cannot be
+        parsed is split in half and retried, down to single-document requests;
+        a document whose own answer cannot be parsed either gets None.
+        """
         if not self.api_key:
-            return default_result
-
-        truncated_text = text[:4000]
-        loop = asyncio.get_running_loop()
-
-        # Build competitor context for the prompt
-        competitor_context = ""
-        if competitors:
-            comp_list = []
-            for c in competitors:
-                comp_list.append(f"  - ID: {c['id']}, Name: {c['name']}")
-            competitor_context = (
-                "\n\nYou are provided with the following list of KNOWN COMPETITORS being tracked. "
-                "If the document mentions any of these companies (even by abbreviation, subsidiary, or alternate name), "
-                "return their exact ID in the 'matched_competitor_id' field. "
-                "If no competitor matches, return null.\n\n"
-                "COMPETITOR LIST:\n" + "\n".join(comp_list)
-            )
+            return [default_result() for _ in texts]
+
+        truncated = [text[:MAX_DOCUMENT_CHARS] for text in texts]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
 
+        pending = []
+        for i, text in enumerate(truncated):
+            if self.cache:
+                cached = await self.cache.get(cache_key(text, competitors, PROMPT_VERSION))
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append(i)
+
+        chunks = list(self._chunk(pending, truncated))
+        chunk_results = await asyncio.gather(
+            *(self._analyze_chunk([truncated[i] for i in chunk], competitors) for chunk in chunks)
+        )
+        for chunk, analyses in zip(chunks, chunk_results):
+            for i, analysis in zip(chunk, analyses):
+                results[i] = analysis
+        return results
+
+    def _chunk(self, indexes: List[int], texts: List[str]) -> Iterable[List[int]]:
+        chunk, chars = [], 0
+        for i in indexes:
+            if chunk and (len(chunk) >= self.batch_size or chars + len(texts[i]) > self.batch_max_chars):
+                yield chunk
+                chunk, chars = [], 0
+            chunk.append(i)
+            chars += len(texts[i])
+        if chunk:
+            yield chunk
+
+    async def _analyze_single(self, text: str, competitors: Optional[List[Dict]]) -> Optional[Dict[str, Any]]:
         try:
-            response = await loop.run_in_executor(
-                None,
-                lambda: openai.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are an expert Medical and Competitor Intelligence Analyst. "
-                                "Analyze the following medical news or clinical trial text. "
-                                "Extract structured data and classify its importance for a pharmaceutical competitive intelligence dashboard. "
-                                "Return JSON only."
-                                + competitor_context +
-                                "\n\nSchema:"
-                                "{"
-                                '  "summary": "Concise executive summary (1-2 sentences).", '
-                                '  "therapeutic_area": "Primary Therapeutic Area (e.g. Oncology, Cardiovascular, Respiratory, Immunology, Neurology, etc.)", '
-                                '  "category": "One of: Clinical Trial, Regulatory, Competitor Intelligence, General", '
-                                '  "impact_level": "High (Major trial results, approvals), Medium (Phase 2, filings), Low (Pre-clinical, general news)", '
-                                '  "relevance_score": "A float from 0.0 to 10.0 indicating how relevant and impactful this is for competitive intelligence. 9-10: breakthrough results, major approvals. 6-8: significant trials, regulatory filings. 3-5: routine updates. 0-2: tangential news.", '
-                                '  "entities": {'
-                                '    "company": "Primary company name mentioned in the text (e.g. AstraZeneca, Pfizer)", '
-                                '    "drug": "Drug name/code (e.g. AZD1234) or N/A", '
-                                '    "phase": "Phase (e.g. Phase 3) or N/A", '
-                                '    "indication": "Target disease/indication"'
-                                '  }, '
-                                '  "matched_competitor_id": "The ID from the COMPETITOR LIST above if the document is about one of the tracked competitors, otherwise null", '
-                                '  "tags": ["list", "of", "relevant", "keywords"]'
-                                "}"
-                            )
-                        },
-                        {"role": "user", "content": truncated_text}
-                    ],
-                    temperature=0.1,
-                    response_format={"type": "json_object"}
-                )
+            return await self.analyze_content(text, competitors)
+        except LLMParseError as e:
+            # Fails this document only, not the rest of the batch
+            logger.warning(f"Dropping unparseable analysis from batch: {e}")
+            return None
+
+    async def _split_and_retry(self, texts: List[str], competitors: Optional[List[Dict]]) -> List[Optional[Dict[str, Any]]]:
+        """Analyse the two halves of a failed batch separately."""
+        self.usage["batchFallbacks"] += 1
+        middle = len(texts) // 2
+        left, right = await asyncio.gather(
+            self._analyze_chunk(texts[:middle], competitors),
+            self._analyze_chunk(texts[middle:], competitors)
+        )
+        return left + right
+
+    async def _analyze_chunk(self, texts: List[str], competitors: Optional[List[Dict]]) -> List[Optional[Dict[str, Any]]]:
+        if len(texts) == 1:
+            return [await self._analyze_single(texts[0], competitors)]
+
+        try:
+            content = await self._complete(
+                build_batch_system_prompt(competitors),
+                build_batch_user_content(texts),
+                batch=True
             )
+            parsed = parse_batch_results(content, len(texts))
+        except LLMUnavailableError as e:
+            # Only an oversized/invalid request is helped by splitting; retrying
+            # smaller pieces against a rate limit just multiplies requests.
+            if not isinstance(e.__cause__, openai.BadRequestError):
+                raise
+            logger.warning(f"Batch of {len(texts)} documents rejected ({e}); splitting")
+            return await self._split_and_retry(texts, competitors)
+        except Exception as e:
+            logger.warning(f"Batch of {len(texts)} documents failed ({e}); splitting")
+            return await self._split_and_retry(texts, competitors)
 
-            content = response.choices[0].message.content.strip()
-            
+        results = []
+        for i, text in enumerate(texts):
+            analysis = parsed.get(i)
+            if analysis is None:
+                # The model skipped or garbled this entry; ask for it on its own
+                self.usage["batchFallbacks"] += 1
+                analysis = await self._analyze_single(text, competitors)
+            elif self.cache:
+                await self.cache.set(cache_key(text, competitors, PROMPT_VERSION), analysis, PROMPT_VERSION)
+            results.append(analysis)
+        return results
+
+    async def _complete(self, system_prompt: str, user_content: str, batch: bool = False) -> str:
+        estimated = estimate_tokens(system_prompt, user_content)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            await self.governor.acquire(estimated)
+            delay = None
             try:
-                parsed_result = json5.loads(content)
-                return parsed_result
-            except Exception as e:
-                logger.error(f"Error parsing JSON from OpenAI: {e}. Content: {content}")
-                return default_result
+                response = await self.client.chat.completions.create(
+                    **build_request_body(system_prompt, user_content),
+                    timeout=self.request_timeout
+                )
+            except openai.RateLimitError as e:
+                if getattr(e, "code", None) == "insufficient_quota":
+                    raise LLMUnavailableError("OpenAI quota exhausted", transient=False) from e
+                last_error = e
+                delay = self.governor.on_rate_limited(parse_retry_after(e.response.headers), attempt)
+                logger.warning(f"OpenAI rate limit hit (attempt {attempt + 1}); backing off {delay:.1f}s")
+            except TRANSIENT_ERRORS as e:
+                last_error = e
+                delay = backoff_delay(attempt)
+                logger.warning(f"OpenAI request failed ({e}); retrying in {delay:.1f}s")
+            except openai.APIError as e:
+                raise LLMUnavailableError(f"OpenAI request failed: {e}", transient=False) from e
+            finally:
+                await self.governor.release()
+
+            if delay is not None:
+                await asyncio.sleep(delay)
+                continue
 
+            usage = getattr(response, "usage", None)
+            self.governor.on_success(estimated, getattr(usage, "total_tokens", None) if usage else None)
+            self._record_usage(response, batch)
+            return response.choices[0].message.content.strip()
+
+        raise LLMUnavailableError(f"OpenAI unavailable after {self.max_retries + 1} attempts: {last_error}")
+
+    def _record_usage(self, response, batch: bool):
+        self.usage["requests"] += 1
+        if batch:
+            self.usage["batchRequests"] += 1
+        usage = getattr(response, "usage", None)
+        if usage:
+            self.usage["promptTokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self.usage["completionTokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+def build_request_body(system_prompt: str, user_content: str) -> Dict[str, Any]:
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ],
+        "temperature": 0.1,
+        "response_format": {"type": "json_object"}
+    }
+
+def build_batch_file_lines(documents: List[Tuple[str, str]], competitors: Optional[List[Dict]] = None) -> List[str]:
+    """
+    Render (custom_id, text) pairs as OpenAI Batch API input lines (JSONL) for
+    non-urgent backfills. Each line is a regular single-document request.
+    """
+    system_prompt = build_system_prompt(competitors)
+    return [
+        json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": build_request_body(system_prompt, text[:MAX_DOCUMENT_CHARS])
+        })
+        for custom_id, text in documents
+    ]
+
+def parse_batch_output_lines(lines: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Read an OpenAI Batch API output file into custom_id -> analysis."""
+    results = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {custom_id} failed: {record.get('error') or response.get('status_code')}")
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[custom_id] = json5.loads(content)
         except Exception as e:
-            logger.error(f"LLM analysis error: {e}")
-            return default_result
+            logger.warning(f"Unparseable batch result for {custom_id}: {e}")
+    return results
@@ -0,0 +1,193 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+def estimate_tokens(*texts: str, completion_tokens: int = 400) -> int:
+    """Rough prompt size (about four characters per token) plus the expected completion."""
+    return sum(len(t) for t in texts) // 4 + completion_tokens
+
+_DURATION_RE = re.compile(r"(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?$")
+
+def parse_retry_after(headers) -> Optional[float]:
+    """
+    Seconds to wait according to an OpenAI 429 response: `retry-after-ms`,
+    `retry-after`, or the `x-ratelimit-reset-*` durations (e.g. "6m0s", "20ms").
+    """
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    delays = []
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        match = _DURATION_RE.match(value.strip()) if value else None
+        if match and any(match.groups()):
+            h, m, s, ms = (float(g) if g else 0.0 for g in match.groups())
+            delays.append(h * 3600 + m * 60 + s + ms / 1000)
+    return max(delays) if delays else None
+
+class TokenBucket:
+    """Bucket refilled continuously at `per_minute` units per minute."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Take `amount` units, waiting for the refill if needed. Returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        # The lock keeps waiters first-come first-served
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def adjust(self, amount: float):
+        """Correct a previous estimate; a positive amount takes more units."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+class RateGovernor:
+    """
+    Client-side quota governor for the OpenAI API.
+
+    Requests pass through a requests-per-minute and a tokens-per-minute bucket
+    and an adaptive concurrency limit: the limit grows by one slot per
+    window of successful requests (additive increase) and halves on every
+    429 (multiplicative decrease). A 429 also pauses all callers for the
+    server's retry-after.
+    """
+
+    def __init__(
+        self,
+        rpm_limit: Optional[int] = None,
+        tpm_limit: Optional[int] = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1
+    ):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.requests = TokenBucket(rpm_limit) if rpm_limit else None
+        self.tokens = TokenBucket(tpm_limit) if tpm_limit else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._slots = asyncio.Condition()
+        self._resume_at = 0.0
+        self._window = deque() # (timestamp, tokens) over the last minute
+        self.successes = 0
+        self.rate_limited = 0
+        self.throttled_seconds = 0.0
+
+    async def acquire(self, estimated_tokens: int):
+        waited = 0.0
+        pause = self._resume_at - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+            waited += pause
+
+        started = time.monotonic()
+        async with self._slots:
+            await self._slots.wait_for(lambda: self.in_flight < int(self.concurrency_limit))
+            self.in_flight += 1
+        waited += time.monotonic() - started
+
+        try:
+            if self.requests:
+                waited += await self.requests.acquire(1)
+            if self.tokens:
+                waited += await self.tokens.acquire(estimated_tokens)
+        except BaseException:
+            await self.release()
+            raise
+        self.throttled_seconds += waited
+
+    async def release(self):
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    def _trim_window(self, now: float):
+        cutoff = now - 60
+        while self._window and self._window[0][0] < cutoff:
+            self._window.popleft()
+
+    def on_success(self, estimated_tokens: int, actual_tokens: Optional[int] = None):
+        self.successes += 1
+        used = actual_tokens if actual_tokens is not None else estimated_tokens
+        if self.tokens and actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+        now = time.monotonic()
+        # Trimmed here too, so the window stays a minute long without metrics() polls
+        self._trim_window(now)
+        self._window.append((now, used))
+        # Additive increase: about one extra slot per `limit` successes
+        self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit)
+
+    def on_rate_limited(self, retry_after: Optional[float], attempt: int) -> float:
+        """Record a 429 and return how long the caller should back off."""
+        self.rate_limited += 1
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+        if self.requests:
+            self.requests.drain()
+        if self.tokens:
+            self.tokens.drain()
+        delay = backoff_delay(attempt, retry_after)
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+    def metrics(self) -> Dict[str, Any]:
+        self._trim_window(time.monotonic())
+        requests_last_minute = len(self._window)
+        tokens_last_minute = sum(tokens for _, tokens in self._window)
+        return {
+            "rpmLimit": self.rpm_limit,
+            "tpmLimit": self.tpm_limit,
+            "requestsLastMinute": requests_last_minute,
+            "tokensLastMinute": tokens_last_minute,
+            "rpmUtilization": round(requests_last_minute / self.rpm_limit, 4) if self.rpm_limit else None,
+            "tpmUtilization": round(tokens_last_minute / self.tpm_limit, 4) if self.tpm_limit else None,
+            "concurrencyLimit": int(self.concurrency_limit),
+            "inFlight": self.in_flight,
+            "successes": self.successes,
+            "rateLimited": self.rate_limited,
+            "throttledSeconds": round(self.throttled_seconds, 3),
+            "pausedForSeconds": round(max(0.0, self._resume_at - time.monotonic()), 3)
+        }
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with jitter, never shorter than the server's retry-after."""
+    delay = min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+    return max(delay, retry_after or 0.0)
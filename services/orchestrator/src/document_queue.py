@@ -0,0 +1,45 @@
+import asyncio
+from typing import Iterable, List, Optional, Set
+
+class DocumentQueue:
+    """
+    In-process work queue of document IDs fed by "document ingested" events and
+    the reconciliation sweep. An ID that is already queued or in flight is not
+    enqueued again, so both producers can report the same document safely.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: Set[str] = set()
+
+    def put_many(self, ids: Iterable[str]) -> int:
+        added = 0
+        for doc_id in ids:
+            if doc_id in self._pending:
+                continue
+            self._pending.add(doc_id)
+            self._queue.put_nowait(doc_id)
+            added += 1
+        return added
+
+    async def get_batch(self, max_size: int, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait for at least one ID (or until `timeout`), then drain whatever else
+        is already queued, up to `max_size`.
+        """
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < max_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    def done(self, ids: Iterable[str]):
+        """Release IDs once their processing attempt has finished."""
+        for doc_id in ids:
+            self._pending.discard(doc_id)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
@@ -2,21 +2,22 @@ import sys
 sys.path.append("/app")
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import httpx
+from typing import List
+import asyncio
 import logging
 import os
-import re
+import socket
 from datetime import datetime, timedelta
 from jose import jwt
 
 from libs.shared.src.logger import setup_logger
 from libs.shared.src.middleware import CorrelationIdMiddleware
 from . import models
-from .database import engine, get_db, AsyncSessionLocal
+from .database import engine, get_db, AsyncSessionLocal, Base
 from libs.shared.src.exceptions import setup_exception_handlers
+from libs.shared.src.events import get_event_bus, DOCUMENT_INGESTED, COMPETITORS_CHANGED
+from libs.shared.src.http_client import ServiceClient
 
 logger = setup_logger("orchestrator")
 
@@ -35,12 +36,89 @@ NOTIFICATION_SERVICE_URL = os.getenv("NOTIFICATION_SERVICE_URL", "http://notific
 JWT_SECRET = os.getenv("JWT_SECRET", "super-secret-key-change-me")
 ALGORITHM = "HS256"
 
+# Worker pool
+ORCHESTRATOR_CONCURRENCY = int(os.getenv("ORCHESTRATOR_CONCURRENCY", "8"))
+ORCHESTRATOR_BATCH_SIZE = int(os.getenv("ORCHESTRATOR_BATCH_SIZE", "25"))
+# Documents normally arrive via "document ingested" events; the sweep only
+# catches what the events missed.
+RECONCILE_SECONDS = int(os.getenv("ORCHESTRATOR_RECONCILE_SECONDS", "300"))
+RECONCILE_LIMIT = int(os.getenv("ORCHESTRATOR_RECONCILE_LIMIT", "500"))
+# Claim/lease settings for running several replicas
+WORKER_ID = os.getenv("ORCHESTRATOR_WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+LEASE_SECONDS = int(os.getenv("ORCHESTRATOR_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.getenv("ORCHESTRATOR_MAX_ATTEMPTS", "5"))
+# LLM analysis cache
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Documents packed into one LLM request (1 disables batching)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))
+LLM_BATCH_MAX_CHARS = int(os.getenv("LLM_BATCH_MAX_CHARS", "24000"))
+# OpenAI connection pool
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "16"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+# OpenAI quota (gpt-4o-mini tier 1 defaults) and retry budget for 429s/transient errors
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "500"))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "200000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+# Local pre-filter (opt-in; drops some relevant documents, see benchmarks/bench_prefilter.py):
+# documents scoring below PREFILTER_MIN_SCORE skip the LLM.
+# PREFILTER_MODEL_PATH optionally points at labelled examples for the local text model.
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "false").lower() == "true"
+PREFILTER_MIN_SCORE = int(os.getenv("PREFILTER_MIN_SCORE", "2"))
+PREFILTER_MODEL_PATH = os.getenv("PREFILTER_MODEL_PATH", "")
+PREFILTER_MODEL_THRESHOLD = float(os.getenv("PREFILTER_MODEL_THRESHOLD", "0.05"))
+# Competitor list snapshot; changes also arrive as events, this bounds staleness if one is missed
+COMPETITOR_CACHE_TTL_SECONDS = float(os.getenv("COMPETITOR_CACHE_TTL_SECONDS", "300"))
+
 from .clients.llm_client import LLMClient
 from .clients.competitor_client import CompetitorClient
+from .clients.analysis_cache import AnalysisCache
+from .pipeline import DocumentPipeline
+from .prefilter import HashedCentroidModel, PreFilter
+from .document_queue import DocumentQueue
 
 # Initialize Clients
-llm_client = LLMClient()
-comp_client = CompetitorClient()
+# One pool for insights, notification and competitor calls; a slot per in-flight document per host
+service_client = ServiceClient(timeout=30, max_per_host=ORCHESTRATOR_CONCURRENCY)
+analysis_cache = AnalysisCache(
+    session_factory=AsyncSessionLocal,
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS
+)
+llm_client = LLMClient(
+    cache=analysis_cache,
+    batch_size=LLM_BATCH_SIZE,
+    batch_max_chars=LLM_BATCH_MAX_CHARS,
+    max_in_flight=LLM_MAX_IN_FLIGHT,
+    request_timeout=LLM_REQUEST_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    rpm_limit=LLM_RPM_LIMIT,
+    tpm_limit=LLM_TPM_LIMIT
+)
+comp_client = CompetitorClient(ttl_seconds=COMPETITOR_CACHE_TTL_SECONDS, http_client=service_client)
+prefilter = None
+if PREFILTER_ENABLED:
+    prefilter = PreFilter(
+        min_score=PREFILTER_MIN_SCORE,
+        model=HashedCentroidModel.load(PREFILTER_MODEL_PATH) if PREFILTER_MODEL_PATH else None,
+        model_threshold=PREFILTER_MODEL_THRESHOLD
+    )
+pipeline = DocumentPipeline(
+    llm_client,
+    comp_client,
+    insights_url=INSIGHTS_SERVICE_URL,
+    notification_url=NOTIFICATION_SERVICE_URL,
+    concurrency=ORCHESTRATOR_CONCURRENCY,
+    batch_size=ORCHESTRATOR_BATCH_SIZE,
+    worker_id=WORKER_ID,
+    lease_seconds=LEASE_SECONDS,
+    max_attempts=MAX_ATTEMPTS,
+    http_client=service_client,
+    prefilter=prefilter
+)
+document_queue = DocumentQueue()
+event_bus = get_event_bus()
+last_sweep_full = False
 
 def create_system_token():
     expire = datetime.utcnow() + timedelta(minutes=60)
@@ -55,143 +133,97 @@ def create_system_token():
 
 @app.on_event("startup")
 async def startup_event():
+    # The documents table belongs to the crawler; we only own the cache table
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[models.AnalysisCacheEntry.__table__])
+
+    await event_bus.subscribe(DOCUMENT_INGESTED, on_document_ingested)
+    await event_bus.subscribe(COMPETITORS_CHANGED, on_competitors_changed)
+    app.state.consumer_task = asyncio.create_task(consume_loop())
+
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(process_new_documents, 'interval', seconds=10)
+    scheduler.add_job(reconcile_documents, 'interval', seconds=RECONCILE_SECONDS, next_run_time=datetime.now())
+    scheduler.add_job(analysis_cache.purge_expired, 'interval', hours=1)
     scheduler.start()
-    logger.info("Background scheduler started")
+    app.state.scheduler = scheduler
+    logger.info(f"Document worker pool started (concurrency={pipeline.concurrency}, batch={pipeline.batch_size})")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.scheduler.shutdown(wait=False)
+    app.state.consumer_task.cancel()
+    await event_bus.close()
+    await service_client.aclose()
+    await llm_client.aclose()
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "orchestrator"}
 
-async def process_new_documents():
-    logger.info("Polling for unprocessed documents...")
-    async with AsyncSessionLocal() as session:
-        # Find unprocessed documents
-        result = await session.execute(select(models.Document).where(models.Document.processed == False).limit(5))
-        documents = result.scalars().all()
-        
+@app.get("/api/orchestrator/metrics")
+async def metrics():
+    return {
+        "analysisCache": analysis_cache.stats(),
+        "llmUsage": llm_client.usage,
+        "rateLimiter": llm_client.governor.metrics(),
+        "prefilter": prefilter.stats() if prefilter else None,
+        "competitorCache": comp_client.stats(),
+        "serviceClient": service_client.stats()
+    }
+
+async def on_document_ingested(payload: dict):
+    """Event handler: queue freshly ingested documents for immediate analysis."""
+    added = document_queue.put_many(payload.get("ids", []))
+    if added:
+        logger.info(f"Queued {added} ingested documents")
+
+async def on_competitors_changed(payload: dict):
+    """Event handler: the next batch revalidates the cached competitor list."""
+    comp_client.invalidate()
+    logger.info(f"Competitor {payload.get('id')} {payload.get('action')}, competitor cache invalidated")
+
+async def reconcile_documents() -> int:
+    """
+    Low-frequency sweep that queues unprocessed documents whose events were
+    missed (service restarts, dropped LISTEN connections, failed attempts) and
+    documents whose lease expired because their worker died.
+    """
+    global last_sweep_full
+    ids = await pipeline.fetch_unprocessed_ids(RECONCILE_LIMIT)
+    last_sweep_full = len(ids) >= RECONCILE_LIMIT
+    added = document_queue.put_many(ids)
+    if added:
+        logger.info(f"Reconciliation sweep queued {added} documents")
+    return added
+
+async def process_documents(ids: List[str]) -> int:
+    """Run one batch through the worker pool. Returns the number of documents processed."""
+    try:
+        documents = await pipeline.claim(ids)
         if not documents:
-            return
+            return 0
 
         # Generate System Token
         token = create_system_token()
         headers = {"Authorization": f"Bearer {token}"}
 
         # Fetch Competitors list (used by LLM for intelligent matching)
-        # Pass headers to client (assuming client updated to accept them)
         competitors = await comp_client.get_competitors(headers=headers)
         logger.info(f"Loaded {len(competitors)} competitors for AI matching")
-        
-        for doc in documents:
-            try:
-                logger.info(f"Processing document {doc.id}")
-                
-                # 1. Send document + competitor list to LLM for analysis
-                full_text = f"{doc.title}\n{doc.raw_content or ''}"
-                analysis = await llm_client.analyze_content(full_text, competitors=competitors)
-                
-                # Extract fields
-                summary = analysis.get("summary", "No summary available.")
-                therapeutic_area = analysis.get("therapeutic_area", "General")
-                category = analysis.get("category", "General")
-                impact_level = analysis.get("impact_level", "Low")
-                relevance_score = analysis.get("relevance_score", 3.0)
-                tags = analysis.get("tags", [])
-                
-                # Extract Entities
-                entities = analysis.get("entities", {})
-                company = entities.get("company", "N/A")
-                drug = entities.get("drug", "N/A")
-                phase = entities.get("phase", "N/A")
-                indication = entities.get("indication", "N/A")
-                
-                # AI-matched competitor ID (returned directly by OpenAI)
-                matched_comp_id = analysis.get("matched_competitor_id", None)
-                
-                description = f"{summary}\n\nEntities: {company}, {drug}, {phase}."
-
-                # 2. INTELLIGENCE LOOP: If AI matched a competitor, link trial
-                if matched_comp_id:
-                    logger.info(f"AI matched document to competitor {matched_comp_id} (company: {company})")
-                    
-                    # Create Trial if this is a clinical trial or has drug+phase data
-                    if category == "Clinical Trial" or (drug != 'N/A' and phase != 'N/A'):
-                        logger.info(f"Creating trial for competitor {matched_comp_id}")
-                        
-                        # Try to extract a real NCT ID from the text
-                        nct_match = re.search(r'NCT\d{8}', full_text)
-                        trial_id = nct_match.group(0) if nct_match else f"EXT-{doc.id[:8]}"
-                        
-                        trial_payload = {
-                            "trialId": trial_id,
-                            "drugName": drug if drug != 'N/A' else "Unknown Candidate",
-                            "phase": phase if phase != 'N/A' else "Unknown",
-                            "indication": indication if indication != 'N/A' else doc.title,
-                            "status": "New Intelligence",
-                            "startDate": str(datetime.now().date()),
-                            "estimatedCompletion": None,
-                            "enrollmentTarget": 0
-                        }
-                        await comp_client.add_trial(matched_comp_id, trial_payload, headers=headers)
-                else:
-                    logger.info(f"No competitor match for document {doc.id} (company: {company})")
-
-                # 3. Create Insight
-                # Ensure we send a YYYY-MM-DD string as expected by Pydantic 'date' field
-                if doc.published_date:
-                    published_date_str = doc.published_date.date().isoformat()
-                else:
-                    published_date_str = datetime.now().date().isoformat()
-                
-                insight_payload = {
-                    "title": f"[{category}] {doc.title[:80]}", 
-                    "description": description,
-                    "category": category,
-                    "therapeuticArea": therapeutic_area,
-                    "impactLevel": impact_level,
-                    "relevanceScore": relevance_score,
-                    "source": doc.source,
-                    "sourceDocumentId": doc.id,
-                    "competitorId": matched_comp_id,
-                    "publishedDate": published_date_str
-                }
-                
-                insight_created = False
-                async with httpx.AsyncClient() as client:
-                    resp = await client.post(f"{INSIGHTS_SERVICE_URL}/api/insights", json=insight_payload, headers=headers)
-                    if resp.status_code == 201:
-                        insight_resp = resp.json()
-                        logger.info(f"Created insight for doc {doc.id}")
-                        insight_created = True
-                    else:
-                        logger.error(f"Failed to create insight: {resp.text}")
-
-                if insight_created:
-                    # 4. Trigger Notification (matches user subscriptions by therapeuticArea + competitorId)
-                    if insight_resp.get("id"):
-                        try:
-                            notification_payload = {
-                                 "insightId": insight_resp.get("id"),
-                                 "title": insight_payload["title"],
-                                 "description": summary,
-                                 "therapeuticArea": therapeutic_area,
-                                 "competitorId": matched_comp_id
-                            }
-
-                            async with httpx.AsyncClient() as client:
-                                 # Internal trigger might require system/admin role or just authentication
-                                 await client.post(f"{NOTIFICATION_SERVICE_URL}/api/notifications/trigger", json=notification_payload, headers=headers)
-                                 logger.info(f"Triggered notification for insight {insight_resp.get('id')}")
-                        except Exception as ne:
-                            logger.error(f"Failed to trigger notification: {ne}")
-
-                    # 5. Mark as Processed ONLY if insight was created
-                    doc.processed = True
-                    await session.commit()
-                else:
-                    logger.warning(f"Skipping processed=True for doc {doc.id} due to insight creation failure")
-                
-            except Exception as e:
-                logger.error(f"Error processing doc {doc.id}: {e}")
-                await session.rollback()
+
+        return await pipeline.run_batch(documents, competitors, headers)
+    finally:
+        document_queue.done(ids)
+
+async def consume_loop():
+    """Drain the document queue as events arrive."""
+    while True:
+        ids = await document_queue.get_batch(pipeline.batch_size)
+        try:
+            await process_documents(ids)
+        except Exception as e:
+            logger.error(f"Processing batch failed: {e}")
+
+        # Keep working through a large backlog without waiting for the next sweep
+        if not len(document_queue) and last_sweep_full:
+            await reconcile_documents()
@@ -1 +1,2 @@
 from .document import Document
+from .analysis_cache import AnalysisCacheEntry
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, JSON, Integer
+from ..database import Base
+from datetime import datetime
+
+class AnalysisCacheEntry(Base):
+    """Persistent tier of the LLM analysis cache (owned by the orchestrator)."""
+    __tablename__ = "llm_analysis_cache"
+
+    key = Column(String, primary_key=True) # prompt version + competitor fingerprint + content hash
+    prompt_version = Column(String, nullable=False)
+    result_json = Column(JSON, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
@@ -1,9 +1,10 @@
 # We need the Document model to query it. 
 # In a real microservice architecture, we shouldn't share models directly this coupling.
-# Ideally, we would publish events "DocumentIngested" and listen to them.
-# But per the requirement "tagging service automated in the db", we will access the table directly.
+# The crawler publishes "document_ingested" events (libs/shared/src/events.py) to
+# tell us which rows are new, but per the requirement "tagging service automated
+# in the db", we still read the documents from the table directly.
 
-from sqlalchemy import Column, String, Boolean, Text, DateTime
+from sqlalchemy import Column, String, Boolean, Text, DateTime, Integer
 from ..database import Base
 
 class Document(Base):
@@ -12,6 +13,19 @@ class Document(Base):
     id = Column(String, primary_key=True)
     source = Column(String)
     title = Column(String)
-    raw_content = Column(Text)
+    external_id = Column(String)
+    raw_content = Column(Text) # Legacy JSON text, until the crawler's content backfill clears it
+    # Typed content written by the crawler (services/crawler/src/content.py)
+    body_text = Column(Text)
+    sponsor = Column(String)
+    trial_status = Column(String)
+    last_update = Column(String)
     processed = Column(Boolean, default=False)
     published_date = Column(DateTime, nullable=True)
+    ingested_at = Column(DateTime, nullable=True)
+
+    # Claim/lease columns so several orchestrator replicas can share the table
+    processing_status = Column(String, default="PENDING") # PENDING, CLAIMED, DONE, FAILED
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from libs.shared.src.http_client import ServiceClient
+from . import models
+from .clients.llm_client import LLMUnavailableError
+from .prefilter import PreFilter, triage_result
+from .claims import claim_documents, complete_document, find_claimable_ids, release_document
+from .database import AsyncSessionLocal
+
+logger = logging.getLogger("orchestrator")
+
+def document_text(doc: models.Document) -> str:
+    """
+    Text the LLM analyses for a document: the title, trial facts and the clean
+    body text, rather than the scraped JSON with all its keys.
+    """
+    if doc.body_text is None:
+        # Not converted by the crawler's content backfill yet
+        return f"{doc.title}\n{doc.raw_content or ''}"
+    facts = [
+        ("Trial", doc.external_id if doc.source == "ClinicalTrials" else None),
+        ("Sponsor", doc.sponsor),
+        ("Status", doc.trial_status),
+        ("Last update", doc.last_update),
+    ]
+    lines = [doc.title or ""] + [f"{label}: {value}" for label, value in facts if value] + [doc.body_text]
+    return "\n".join(lines)
+
+class PreparedInsight(NamedTuple):
+    doc_id: str
+    insight: Dict # POST /api/insights/bulk item
+    notification: Optional[Dict] # Trigger payload without insightId, None to stay silent
+
+class DocumentPipeline:
+    """
+    Worker pool that analyses documents concurrently.
+
+    Up to `concurrency` documents are analysed at once (LLM call, trial
+    upsert). The insights of a batch are then written with one
+    POST /api/insights/bulk per `insights_bulk_size` documents, which upserts on
+    the source document ID, so a retried document never gets a second insight.
+    Every document is marked processed in its own transaction, so a failure on
+    one document never rolls back the others.
+
+    Documents are claimed under a lease for `worker_id` before analysis, which
+    makes it safe to run several orchestrator replicas against one database.
+
+    With a `prefilter`, documents without any competitive signal are triaged
+    locally as low impact and never reach the LLM.
+    """
+
+    def __init__(
+        self,
+        llm_client,
+        comp_client,
+        insights_url: str,
+        notification_url: str,
+        concurrency: int = 8,
+        batch_size: int = 25,
+        session_factory=AsyncSessionLocal,
+        http_client: Optional[ServiceClient] = None,
+        worker_id: str = "orchestrator",
+        lease_seconds: int = 300,
+        max_attempts: int = 5,
+        prefilter: Optional[PreFilter] = None,
+        insights_bulk_size: int = 100
+    ):
+        self.llm_client = llm_client
+        self.comp_client = comp_client
+        self.insights_url = insights_url
+        self.notification_url = notification_url
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.session_factory = session_factory
+        self.http_client = http_client or ServiceClient(timeout=30)
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.prefilter = prefilter
+        self.insights_bulk_size = max(1, insights_bulk_size)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def claim(self, ids: Optional[List[str]] = None) -> List[models.Document]:
+        """Claim the given documents (or any claimable ones) for this worker."""
+        async with self.session_factory() as session:
+            return await claim_documents(
+                session,
+                self.worker_id,
+                limit=len(ids) if ids is not None else self.batch_size,
+                lease_seconds=self.lease_seconds,
+                max_attempts=self.max_attempts,
+                ids=ids
+            )
+
+    async def fetch_unprocessed_ids(self, limit: int) -> List[str]:
+        """Reconciliation query: IDs of unclaimed documents or expired leases."""
+        async with self.session_factory() as session:
+            return await find_claimable_ids(session, limit, self.max_attempts)
+
+    async def mark_processed(self, doc_id: str) -> bool:
+        """
+        Commit the processed flag for a single document and drop the lease.
+        False when the lease was lost (another worker now owns the document).
+        """
+        async with self.session_factory() as session:
+            return await complete_document(session, doc_id, self.worker_id)
+
+    async def release(self, doc_id: str, refund_attempt: bool = False):
+        """Return a document whose attempt failed so it can be retried."""
+        async with self.session_factory() as session:
+            await release_document(session, doc_id, self.worker_id, self.max_attempts, refund_attempt)
+
+    async def run_batch(self, documents: List[models.Document], competitors: List[Dict], headers: Dict) -> int:
+        """Process documents concurrently. Returns how many were marked processed."""
+        if not documents:
+            return 0
+
+        started = time.perf_counter()
+
+        analyses = {}
+        if self.prefilter is not None:
+            for doc in documents:
+                screened = self.prefilter.classify(document_text(doc), competitors)
+                if not screened.relevant:
+                    analyses[doc.id] = triage_result(screened)
+            if analyses:
+                logger.info(f"Pre-filter triaged {len(analyses)}/{len(documents)} documents without an LLM call")
+
+        # In batch mode the LLM sees the whole batch in a few packed requests
+        # up front; the downstream calls still run per document.
+        to_analyse = [doc for doc in documents if doc.id not in analyses]
+        if to_analyse and getattr(self.llm_client, "batch_size", 1) > 1:
+            try:
+                results = await self.llm_client.analyze_batch(
+                    [document_text(doc) for doc in to_analyse], competitors=competitors
+                )
+            except LLMUnavailableError as e:
+                logger.warning(f"LLM unavailable, returning {len(to_analyse)} documents to the queue: {e}")
+                for doc in to_analyse:
+                    await self.release(doc.id, refund_attempt=e.transient)
+                documents = [doc for doc in documents if doc.id in analyses]
+                if not documents:
+                    return 0
+            else:
+                unanswered = set()
+                for doc, analysis in zip(to_analyse, results):
+                    if analysis is None:
+                        # No usable answer: counts as a failed attempt
+                        unanswered.add(doc.id)
+                        await self._release_quietly(doc.id)
+                    else:
+                        analyses[doc.id] = analysis
+                documents = [doc for doc in documents if doc.id not in unanswered]
+                if not documents:
+                    return 0
+
+        prepared = await asyncio.gather(
+            *(self._prepare_bounded(doc, competitors, headers, analyses.get(doc.id)) for doc in documents)
+        )
+        prepared = [item for item in prepared if item is not None]
+        succeeded = 0
+        for start in range(0, len(prepared), self.insights_bulk_size):
+            succeeded += await self.publish(prepared[start:start + self.insights_bulk_size], headers)
+        logger.info(
+            f"Processed {succeeded}/{len(documents)} documents in {time.perf_counter() - started:.2f}s "
+            f"(concurrency={self.concurrency})"
+        )
+        return succeeded
+
+    async def _release_quietly(self, doc_id: str, refund_attempt: bool = False):
+        try:
+            await self.release(doc_id, refund_attempt=refund_attempt)
+        except Exception as e:
+            logger.error(f"Failed to release doc {doc_id}: {e}")
+
+    async def _prepare_bounded(
+        self, doc: models.Document, competitors: List[Dict], headers: Dict, analysis: Optional[Dict] = None
+    ) -> Optional[PreparedInsight]:
+        async with self._semaphore:
+            try:
+                return await self.prepare_insight(doc, competitors, headers, analysis)
+            except LLMUnavailableError as e:
+                # No analysis means no insight: leave the document for a later attempt
+                logger.warning(f"LLM unavailable for doc {doc.id}: {e}")
+                await self._release_quietly(doc.id, refund_attempt=e.transient)
+            except Exception as e:
+                logger.error(f"Error processing doc {doc.id}: {e}")
+                await self._release_quietly(doc.id)
+            return None
+
+    async def prepare_insight(
+        self, doc: models.Document, competitors: List[Dict], headers: Dict, analysis: Optional[Dict] = None
+    ) -> PreparedInsight:
+        """Analyse a document and link its trial. Returns the insight to create."""
+        logger.info(f"Processing document {doc.id}")
+
+        # 1. Send document + competitor list to LLM for analysis (unless batch mode already did)
+        full_text = document_text(doc)
+        if analysis is None:
+            analysis = await self.llm_client.analyze_content(full_text, competitors=competitors)
+
+        # Extract fields
+        summary = analysis.get("summary", "No summary available.")
+        therapeutic_area = analysis.get("therapeutic_area", "General")
+        category = analysis.get("category", "General")
+        impact_level = analysis.get("impact_level", "Low")
+        relevance_score = analysis.get("relevance_score", 3.0)
+
+        # Extract Entities
+        entities = analysis.get("entities", {})
+        company = entities.get("company", "N/A")
+        drug = entities.get("drug", "N/A")
+        phase = entities.get("phase", "N/A")
+        indication = entities.get("indication", "N/A")
+
+        # AI-matched competitor ID (returned directly by OpenAI)
+        matched_comp_id = analysis.get("matched_competitor_id", None)
+
+        description = f"{summary}\n\nEntities: {company}, {drug}, {phase}."
+
+        # 2. INTELLIGENCE LOOP: If AI matched a competitor, link trial
+        if matched_comp_id:
+            logger.info(f"AI matched document to competitor {matched_comp_id} (company: {company})")
+
+            # Create Trial if this is a clinical trial or has drug+phase data
+            if category == "Clinical Trial" or (drug != 'N/A' and phase != 'N/A'):
+                logger.info(f"Creating trial for competitor {matched_comp_id}")
+
+                # Try to extract a real NCT ID from the text
+                nct_match = re.search(r'NCT\d{8}', full_text)
+                trial_id = nct_match.group(0) if nct_match else f"EXT-{doc.id[:8]}"
+
+                trial_payload = {
+                    "trialId": trial_id,
+                    "drugName": drug if drug != 'N/A' else "Unknown Candidate",
+                    "phase": phase if phase != 'N/A' else "Unknown",
+                    "indication": indication if indication != 'N/A' else doc.title,
+                    "status": "New Intelligence",
+                    "startDate": str(datetime.now().date()),
+                    "estimatedCompletion": None,
+                    "enrollmentTarget": 0
+                }
+                await self.comp_client.add_trial(matched_comp_id, trial_payload, headers=headers)
+        else:
+            logger.info(f"No competitor match for document {doc.id} (company: {company})")
+
+        # 3. Insight, created in bulk by publish()
+        # Ensure we send a YYYY-MM-DD string as expected by Pydantic 'date' field
+        if doc.published_date:
+            published_date_str = doc.published_date.date().isoformat()
+        else:
+            published_date_str = datetime.now().date().isoformat()
+
+        insight_payload = {
+            "title": f"[{category}] {doc.title[:80]}",
+            "description": description,
+            "category": category,
+            "therapeuticArea": therapeutic_area,
+            "impactLevel": impact_level,
+            "relevanceScore": relevance_score,
+            "source": doc.source,
+            "sourceDocumentId": doc.id,
+            "competitorId": matched_comp_id,
+            "publishedDate": published_date_str,
+            "tags": analysis.get("tags") or []
+        }
+
+        # Locally triaged documents are recorded but not worth alerting anyone about
+        notification = None
+        if not analysis.get("triaged"):
+            notification = {
+                "title": insight_payload["title"],
+                "description": summary,
+                "therapeuticArea": therapeutic_area,
+                "competitorId": matched_comp_id
+            }
+        return PreparedInsight(doc.id, insight_payload, notification)
+
+    async def publish(self, prepared: List[PreparedInsight], headers: Dict) -> int:
+        """
+        Create the insights of analysed documents with one bulk request, notify
+        subscribers of the new ones and mark the documents processed. Returns
+        how many were marked processed.
+        """
+        try:
+            # Safe to retry: the bulk endpoint upserts on sourceDocumentId
+            resp = await self.http_client.post(
+                f"{self.insights_url}/api/insights/bulk",
+                json=[item.insight for item in prepared],
+                headers=headers,
+                retry=True
+            )
+            ok = resp.status_code == 200
+            if not ok:
+                logger.error(f"Failed to create insights: {resp.text}")
+        except Exception as e:
+            logger.error(f"Failed to create insights: {e}")
+            ok = False
+        if not ok:
+            logger.warning(f"Skipping processed=True for {len(prepared)} docs due to insight creation failure")
+            for item in prepared:
+                await self._release_quietly(item.doc_id)
+            return 0
+
+        results = resp.json()["items"]
+        created = sum(1 for result in results if result["created"])
+        logger.info(f"Created {created} insights, updated {len(results) - created} of retried documents")
+        results = await asyncio.gather(
+            *(self._complete_bounded(item, result, headers) for item, result in zip(prepared, results))
+        )
+        return sum(1 for ok in results if ok)
+
+    async def _complete_bounded(self, item: PreparedInsight, result: Dict, headers: Dict) -> bool:
+        async with self._semaphore:
+            # Matches user subscriptions by therapeuticArea + competitorId. An
+            # updated insight comes from a retried document: already notified.
+            if item.notification is not None and result["created"]:
+                try:
+                    await self.http_client.post(
+                        f"{self.notification_url}/api/notifications/trigger",
+                        json={"insightId": result["id"], **item.notification},
+                        headers=headers
+                    )
+                    logger.info(f"Triggered notification for insight {result['id']}")
+                except Exception as ne:
+                    logger.error(f"Failed to trigger notification: {ne}")
+
+            # Mark as Processed ONLY once the insight is stored
+            try:
+                completed = await self.mark_processed(item.doc_id)
+            except Exception as e:
+                logger.error(f"Error processing doc {item.doc_id}: {e}")
+                await self._release_quietly(item.doc_id)
+                return False
+            if not completed:
+                # Not ours to release: the new owner completes or retries it
+                logger.warning(f"Lease on doc {item.doc_id} was lost before it completed")
+            return completed
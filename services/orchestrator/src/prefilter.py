@@ -0,0 +1,214 @@
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from libs.shared.src.text_matching import KeywordAutomaton
+from .clients.analysis_cache import competitor_fingerprint
+
+# Corporate suffixes dropped to derive the short alias ("Pfizer Inc." -> "pfizer")
+_CORPORATE_SUFFIXES = {
+    "inc", "plc", "ag", "sa", "se", "nv", "ltd", "limited", "co", "corp", "corporation", "company",
+    "group", "holdings", "pharma", "pharmaceutical", "pharmaceuticals", "laboratories", "&"
+}
+
+# Well-known alternate names the competitor records do not carry
+KNOWN_ALIASES = {
+    "astrazeneca": ["alexion"],
+    "bristol-myers squibb": ["bms", "bristol myers squibb", "celgene"],
+    "merck": ["msd"],
+    "johnson & johnson": ["j&j", "janssen"],
+    "roche": ["genentech", "hoffmann-la roche", "chugai"],
+    "sanofi": ["genzyme"],
+    "eli lilly": ["lilly"],
+    "novo nordisk": ["novo"],
+    "glaxosmithkline": ["gsk"],
+    "gsk": ["glaxosmithkline"],
+    "abbvie": ["allergan"],
+    "amgen": ["horizon therapeutics"],
+}
+
+# Terms that indicate drug development or market news; each distinct one adds a point
+SIGNAL_TERMS = [
+    "phase 1", "phase i", "phase 1b", "phase 2", "phase ii", "phase 2b", "phase 3", "phase iii",
+    "clinical trial", "randomized", "randomised", "placebo-controlled", "pivotal", "topline", "top-line",
+    "primary endpoint", "overall survival", "progression-free survival",
+    "fda", "ema", "chmp", "mhra", "pmda", "approval", "approved", "approves", "label expansion",
+    "breakthrough therapy", "fast track", "orphan drug", "priority review", "accelerated approval",
+    "new drug application", "biologics license application", "marketing authorization", "marketing authorisation",
+    "acquisition", "acquire", "licensing deal", "collaboration agreement", "biosimilar", "patent",
+    "drug candidate", "investigational", "pipeline",
+]
+
+# Company codes such as AZD9291, MK-3475 or BNT162b2
+DRUG_CODE_RE = re.compile(r"\b[A-Z]{2,5}-?\d{3,7}[a-z]?\d?\b")
+# International nonproprietary name stems (antibodies, kinase inhibitors, ...)
+DRUG_STEM_RE = re.compile(r"\b[a-z]{3,}(?:mab|tinib|rafenib|ciclib|parib|lisib|glutide|gliflozin)\b", re.IGNORECASE)
+NCT_RE = re.compile(r"\bNCT\d{8}\b")
+
+COMPETITOR_WEIGHT = 3
+IDENTIFIER_WEIGHT = 2
+SIGNAL_WEIGHT = 1
+
+def competitor_aliases(name: str) -> List[str]:
+    """Spellings of a competitor name worth matching: full, hyphen-free, suffix-free and known aliases."""
+    full = " ".join(name.lower().replace(",", " ").replace(".", " ").split())
+    aliases = {full, full.replace("-", " ")}
+    words = full.split()
+    while len(words) > 1 and words[-1] in _CORPORATE_SUFFIXES:
+        words = words[:-1]
+    short = " ".join(words)
+    aliases.add(short)
+    aliases.update(KNOWN_ALIASES.get(short, []))
+    return [a for a in aliases if len(a) >= 3]
+
+@dataclass
+class PrefilterResult:
+    relevant: bool
+    score: int
+    competitor_ids: List[str] = field(default_factory=list)
+    signals: List[str] = field(default_factory=list)
+    model_score: Optional[float] = None
+
+class HashedCentroidModel:
+    """
+    Tiny local text model: hashed unigram/bigram counts, one centroid per
+    class, scored by cosine similarity. `score` is positive when a document
+    looks more like the relevant examples than the irrelevant ones.
+    """
+
+    def __init__(self, dimensions: int = 2 ** 16):
+        self.dimensions = dimensions
+        self.relevant: Dict[int, float] = {}
+        self.irrelevant: Dict[int, float] = {}
+
+    @classmethod
+    def from_examples(cls, examples: Sequence[Tuple[str, bool]], dimensions: int = 2 ** 16) -> "HashedCentroidModel":
+        model = cls(dimensions)
+        sums = {True: Counter(), False: Counter()}
+        for text, label in examples:
+            sums[bool(label)].update(model.vectorize(text))
+        model.relevant = _normalize(sums[True])
+        model.irrelevant = _normalize(sums[False])
+        return model
+
+    @classmethod
+    def load(cls, path: str) -> "HashedCentroidModel":
+        """Train from a JSON file of `{"text": ..., "relevant": bool}` examples."""
+        with open(path) as f:
+            examples = json.load(f)
+        return cls.from_examples([(e["text"], e["relevant"]) for e in examples])
+
+    def vectorize(self, text: str) -> Dict[int, float]:
+        tokens = re.findall(r"[a-z0-9]+", text.lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        counts = Counter(
+            int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") % self.dimensions
+            for g in grams
+        )
+        return _normalize({k: 1.0 + math.log(v) for k, v in counts.items()})
+
+    def score(self, text: str) -> float:
+        vector = self.vectorize(text)
+        return _dot(vector, self.relevant) - _dot(vector, self.irrelevant)
+
+def _normalize(vector: Dict[int, float]) -> Dict[int, float]:
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {k: v / norm for k, v in vector.items()} if norm else {}
+
+def _dot(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+class PreFilter:
+    """
+    Cheap local screen in front of the LLM.
+
+    A document needs `min_score` points of competitive signal to be sent for
+    analysis: a tracked competitor or alias (3), an NCT ID or drug code (2),
+    and one point per distinct development/regulatory term. Documents below
+    the bar can still be passed on by the optional local model. Everything
+    else is triaged as low impact without an API call.
+    """
+
+    def __init__(self, min_score: int = 2, model: Optional[HashedCentroidModel] = None, model_threshold: float = 0.05):
+        self.min_score = min_score
+        self.model = model
+        self.model_threshold = model_threshold
+        self._signals = KeywordAutomaton((term, term) for term in SIGNAL_TERMS).build()
+        self._competitors: Optional[KeywordAutomaton] = None
+        self._competitors_key: Optional[str] = None
+        self.screened = 0
+        self.triaged = 0
+        self.passed_by_model = 0
+
+    def _competitor_automaton(self, competitors: Optional[List[Dict]]) -> KeywordAutomaton:
+        # Rebuilt only when the competitor list changes
+        key = competitor_fingerprint(competitors)
+        if key != self._competitors_key:
+            automaton = KeywordAutomaton()
+            for c in competitors or []:
+                for alias in competitor_aliases(c.get("name", "")):
+                    automaton.add(alias, c["id"])
+            self._competitors = automaton.build()
+            self._competitors_key = key
+        return self._competitors
+
+    def classify(self, text: str, competitors: Optional[List[Dict]] = None) -> PrefilterResult:
+        self.screened += 1
+        competitor_ids = sorted(self._competitor_automaton(competitors).matched_values(text))
+        identifiers = set(NCT_RE.findall(text)) | set(DRUG_CODE_RE.findall(text)) | {
+            m.lower() for m in DRUG_STEM_RE.findall(text)
+        }
+        signals = sorted(self._signals.matched_values(text))
+
+        score = (
+            (COMPETITOR_WEIGHT if competitor_ids else 0)
+            + (IDENTIFIER_WEIGHT if identifiers else 0)
+            + SIGNAL_WEIGHT * len(signals)
+        )
+        result = PrefilterResult(
+            relevant=score >= self.min_score,
+            score=score,
+            competitor_ids=competitor_ids,
+            signals=sorted(identifiers) + signals
+        )
+        if not result.relevant and self.model is not None:
+            result.model_score = round(self.model.score(text), 4)
+            if result.model_score >= self.model_threshold:
+                result.relevant = True
+                self.passed_by_model += 1
+        if not result.relevant:
+            self.triaged += 1
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "screened": self.screened,
+            "triaged": self.triaged,
+            "passedByModel": self.passed_by_model,
+            "triageRate": round(self.triaged / self.screened, 4) if self.screened else 0.0
+        }
+
+def triage_result(result: PrefilterResult) -> Dict:
+    """Low-impact analysis stored for documents the pre-filter screened out."""
+    return {
+        "summary": "Triaged locally as low relevance: no tracked competitor, drug or trial signal found.",
+        "therapeutic_area": "General",
+        "category": "General",
+        "impact_level": "Low",
+        "relevance_score": 1.0,
+        "entities": {
+            "company": "N/A",
+            "drug": "N/A",
+            "phase": "N/A",
+            "indication": "N/A"
+        },
+        "matched_competitor_id": None,
+        "tags": result.signals,
+        "triaged": True
+    }
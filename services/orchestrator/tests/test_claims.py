@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+import uuid
+from datetime import datetime
+from src import models
+from src.database import AsyncSessionLocal
+from src.claims import claim_documents, complete_document, STATUS_DONE
+
+async def insert_documents(count: int):
+    tag = uuid.uuid4().hex[:8]
+    ids = [f"claim-{tag}-{i}" for i in range(count)]
+    async with AsyncSessionLocal() as session:
+        for doc_id in ids:
+            session.add(models.Document(
+                id=doc_id,
+                source="Test",
+                title=f"Doc {doc_id}",
+                processed=False,
+                ingested_at=datetime.utcnow(),
+                processing_status="PENDING",
+                attempts=0
+            ))
+        await session.commit()
+    return ids
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_process_each_document_once(setup_db):
+    ids = await insert_documents(60)
+    processed = []
+
+    async def worker(worker_id: str):
+        while True:
+            async with AsyncSessionLocal() as session:
+                docs = await claim_documents(session, worker_id, limit=5, lease_seconds=60, max_attempts=3, ids=ids)
+            if not docs:
+                return
+            for doc in docs:
+                processed.append(doc.id)
+                await asyncio.sleep(0)
+                async with AsyncSessionLocal() as session:
+                    assert await complete_document(session, doc.id, worker_id)
+
+    await asyncio.gather(*(worker(f"worker-{n}") for n in range(8)))
+
+    assert sorted(processed) == sorted(ids)
+    async with AsyncSessionLocal() as session:
+        for doc_id in ids:
+            doc = await session.get(models.Document, doc_id)
+            assert doc.processed is True
+            assert doc.processing_status == STATUS_DONE
+            assert doc.attempts == 1
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(setup_db):
+    ids = await insert_documents(1)
+
+    async with AsyncSessionLocal() as session:
+        # A worker that claims with an already-expired lease behaves like one that crashed
+        crashed = await claim_documents(session, "crashed-worker", limit=1, lease_seconds=-1, max_attempts=3, ids=ids)
+    assert [d.id for d in crashed] == ids
+
+    async with AsyncSessionLocal() as session:
+        reclaimed = await claim_documents(session, "healthy-worker", limit=1, lease_seconds=60, max_attempts=3, ids=ids)
+    assert [d.id for d in reclaimed] == ids
+    assert reclaimed[0].attempts == 2
+
+    async with AsyncSessionLocal() as session:
+        assert not await complete_document(session, ids[0], "crashed-worker")
+        assert await complete_document(session, ids[0], "healthy-worker")
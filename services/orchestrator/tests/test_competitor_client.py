@@ -0,0 +1,38 @@
+import httpx
+import pytest
+from libs.shared.src.http_client import ServiceClient
+from src.clients.competitor_client import CompetitorClient
+
+COMPETITORS = [{"id": "comp-1", "name": "Pfizer"}]
+
+def make_client(requests, ttl_seconds=300):
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("if-none-match") == 'W/"1-100"':
+            return httpx.Response(304, headers={"ETag": 'W/"1-100"'})
+        return httpx.Response(200, json=COMPETITORS, headers={"ETag": 'W/"1-100"'})
+
+    return CompetitorClient(ttl_seconds=ttl_seconds, http_client=ServiceClient(transport=httpx.MockTransport(handler)))
+
+@pytest.mark.asyncio
+async def test_competitor_list_is_served_from_cache_within_ttl():
+    requests = []
+    client = make_client(requests)
+
+    assert await client.get_competitors() == COMPETITORS
+    assert await client.get_competitors() == COMPETITORS
+
+    assert len(requests) == 1
+    assert client.stats()["cacheHits"] == 1
+
+@pytest.mark.asyncio
+async def test_invalidated_list_is_revalidated_with_etag():
+    requests = []
+    client = make_client(requests)
+
+    await client.get_competitors()
+    client.invalidate()
+    assert await client.get_competitors() == COMPETITORS
+
+    assert requests[1].headers["if-none-match"] == 'W/"1-100"'
+    assert client.stats() == {"cacheHits": 0, "notModified": 1, "fullFetches": 1, "cachedCompetitors": 1}
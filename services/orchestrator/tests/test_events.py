@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import asyncpg
+import pytest
+from libs.shared.src.events import PostgresEventBus, DOCUMENT_INGESTED
+
+class FakeConnection:
+    """Listener connection that records the callbacks registered per channel."""
+
+    def __init__(self, connections):
+        self.listeners = {}
+        connections.append(self)
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def is_closed(self):
+        return False
+
+    async def close(self):
+        pass
+
+@pytest.mark.asyncio
+async def test_postgres_bus_shares_one_listener_between_handlers(monkeypatch):
+    connections = []
+
+    async def connect(dsn):
+        return FakeConnection(connections)
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    bus = PostgresEventBus("postgresql+asyncpg://test", reconnect_seconds=60)
+    received = []
+
+    async def first(payload):
+        received.append(("first", payload["ids"]))
+
+    async def second(payload):
+        received.append(("second", payload["ids"]))
+
+    await bus.subscribe(DOCUMENT_INGESTED, first)
+    await bus.subscribe(DOCUMENT_INGESTED, second)
+    await asyncio.sleep(0)
+
+    assert len(connections) == 1
+    connections[0].listeners[DOCUMENT_INGESTED](None, 1, DOCUMENT_INGESTED, json.dumps({"ids": ["doc-1"]}))
+    assert len(bus._handler_tasks) == 2
+    await asyncio.gather(*bus._handler_tasks)
+
+    assert sorted(received) == [("first", ["doc-1"]), ("second", ["doc-1"])]
+    assert not bus._handler_tasks
+    await bus.close()
@@ -0,0 +1,161 @@
+import json
+import pytest
+from src.clients.analysis_cache import AnalysisCache
+from src.clients.llm_client import LLMClient, parse_batch_results, build_batch_file_lines, parse_batch_output_lines
+
+class FakeCompletions:
+    """Stands in for AsyncOpenAI.chat.completions; `reply` builds the response content."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = type("Message", (), {"content": self.reply(kwargs["messages"][-1]["content"])})
+        choice = type("Choice", (), {"message": message})
+        return type("Response", (), {"choices": [choice], "usage": None})
+
+def make_client(monkeypatch, reply, **kwargs):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    client = LLMClient(**kwargs)
+    completions = FakeCompletions(reply)
+    client.client = type("FakeOpenAI", (), {"chat": type("Chat", (), {"completions": completions})})
+    return client, completions
+
+@pytest.mark.asyncio
+async def test_analysis_cache_skips_repeat_llm_calls(monkeypatch):
+    cache = AnalysisCache(session_factory=None)
+    client, completions = make_client(monkeypatch, lambda content: '{"summary": "cached", "entities": {}}', cache=cache)
+    competitors = [{"id": "comp-1", "name": "Pfizer"}]
+
+    first = await client.analyze_content("FDA approves drug X.\nlastUpdate: 2024-01-01", competitors)
+    # Same release re-fetched with different whitespace, case and dates
+    second = await client.analyze_content("FDA  approves DRUG x.\nlastUpdate: 2024-02-15", competitors)
+    # A different competitor list invalidates the entry
+    await client.analyze_content("FDA approves drug X.", [{"id": "comp-2", "name": "Novartis"}])
+
+    assert first == second == {"summary": "cached", "entities": {}}
+    assert len(completions.calls) == 2
+    assert cache.stats()["memoryHits"] == 1
+
+def test_parse_batch_results_drops_bad_entries():
+    content = json.dumps({"results": [
+        {"index": 0, "summary": "a"},
+        {"index": "1", "summary": "b"},
+        {"index": 1, "summary": "duplicate"},
+        {"index": 7, "summary": "out of range"},
+        "garbage"
+    ]})
+    assert parse_batch_results(content, 3) == {0: {"summary": "a"}, 1: {"summary": "b"}}
+
+@pytest.mark.asyncio
+async def test_analyze_batch_falls_back_to_single_requests(monkeypatch):
+    def reply(content):
+        if "=== DOCUMENT" in content:
+            # Only the first document comes back from the packed request
+            return json.dumps({"results": [{"index": 0, "summary": "batched"}]})
+        return json.dumps({"summary": "single"})
+
+    client, completions = make_client(monkeypatch, reply, batch_size=3)
+
+    results = await client.analyze_batch(["doc a", "doc b", "doc c"])
+
+    assert [r["summary"] for r in results] == ["batched", "single", "single"]
+    assert len(completions.calls) == 3
+    assert client.usage["batchFallbacks"] == 2
+
+def test_batch_file_round_trip():
+    lines = build_batch_file_lines([("doc-1", "text")], [{"id": "comp-1", "name": "Pfizer"}])
+    request = json.loads(lines[0])
+    assert request["custom_id"] == "doc-1"
+    assert request["url"] == "/v1/chat/completions"
+
+    output = [
+        json.dumps({"custom_id": "doc-1", "response": {"status_code": 200, "body": {
+            "choices": [{"message": {"content": '{"summary": "offline"}'}}]
+        }}}),
+        json.dumps({"custom_id": "doc-2", "response": {"status_code": 500, "body": {}}})
+    ]
+    assert parse_batch_output_lines(output) == {"doc-1": {"summary": "offline"}}
+
+def rate_limit_error(headers):
+    import httpx
+    import openai
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "http://openai.test/v1/chat/completions"))
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+def test_parse_retry_after_headers():
+    from src.clients.rate_limiter import parse_retry_after
+
+    assert parse_retry_after({"retry-after-ms": "250"}) == 0.25
+    assert parse_retry_after({"retry-after": "3"}) == 3.0
+    assert parse_retry_after({"x-ratelimit-reset-requests": "1m30s", "x-ratelimit-reset-tokens": "20ms"}) == 90.0
+    assert parse_retry_after({}) is None
+
+@pytest.mark.asyncio
+async def test_rate_limited_request_is_retried(monkeypatch):
+    from src.clients import rate_limiter
+    monkeypatch.setattr(rate_limiter, "backoff_delay", lambda attempt, retry_after=None: 0.01)
+
+    failures = [rate_limit_error({"retry-after-ms": "10"})]
+
+    def reply(content):
+        if failures:
+            raise failures.pop()
+        return '{"summary": "after retry"}'
+
+    client, completions = make_client(monkeypatch, reply, max_in_flight=8)
+
+    result = await client.analyze_content("doc")
+
+    assert result == {"summary": "after retry"}
+    assert len(completions.calls) == 2
+    metrics = client.governor.metrics()
+    assert metrics["rateLimited"] == 1
+    assert metrics["concurrencyLimit"] == 4
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_raise_instead_of_default(monkeypatch):
+    from src.clients import rate_limiter
+    from src.clients.llm_client import LLMUnavailableError
+    monkeypatch.setattr(rate_limiter, "backoff_delay", lambda attempt, retry_after=None: 0.01)
+
+    def reply(content):
+        raise rate_limit_error({})
+
+    client, completions = make_client(monkeypatch, reply, max_retries=2)
+
+    with pytest.raises(LLMUnavailableError) as exc:
+        await client.analyze_content("doc")
+    assert exc.value.transient
+    assert len(completions.calls) == 3
+
+@pytest.mark.asyncio
+async def test_unparseable_analysis_raises_instead_of_default(monkeypatch):
+    from src.clients.llm_client import LLMParseError
+
+    def reply(content):
+        if "=== DOCUMENT" in content:
+            return json.dumps({"results": [{"index": 0, "summary": "batched"}]})
+        return "Sorry, I cannot help with that."
+
+    client, completions = make_client(monkeypatch, reply, batch_size=2)
+
+    with pytest.raises(LLMParseError) as exc:
+        await client.analyze_content("doc")
+    assert not exc.value.transient
+    # In a batch only the garbled document is left without an analysis
+    assert await client.analyze_batch(["doc a", "doc b"]) == [{"summary": "batched"}, None]
+
+def test_governor_window_is_trimmed_without_metrics_polls(monkeypatch):
+    from src.clients import rate_limiter
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock["now"])
+    governor = rate_limiter.RateGovernor(rpm_limit=600)
+
+    for _ in range(300):
+        governor.on_success(100)
+        clock["now"] += 1
+
+    assert len(governor._window) <= 61
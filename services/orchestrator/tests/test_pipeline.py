@@ -0,0 +1,186 @@
+import asyncio
+import json
+import pytest
+import httpx
+from datetime import datetime
+from libs.shared.src.http_client import ServiceClient
+from src import models
+from src.pipeline import DocumentPipeline, document_text
+
+class SlowLLMClient:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def analyze_content(self, text, competitors=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if "fail" in text:
+            raise RuntimeError("boom")
+        return {"summary": "ok", "entities": {}, "matched_competitor_id": None}
+
+class NoopCompetitorClient:
+    async def add_trial(self, competitor_id, trial_data, headers=None):
+        return None
+
+class RecordingPipeline(DocumentPipeline):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.committed = []
+
+    async def mark_processed(self, doc_id: str):
+        self.committed.append(doc_id)
+        return True
+
+    async def release(self, doc_id: str, refund_attempt: bool = False):
+        pass
+
+class FakeInsightsService:
+    """Bulk endpoint that remembers source documents, like the upsert in the insights service."""
+    def __init__(self):
+        self.bulk_requests = []
+        self.notified = []
+        self.ids = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/insights/bulk":
+            batch = json.loads(request.content)
+            self.bulk_requests.append(batch)
+            items = []
+            for insight in batch:
+                doc_id = insight["sourceDocumentId"]
+                created = doc_id not in self.ids
+                self.ids.setdefault(doc_id, f"insight-{len(self.ids)}")
+                items.append({"id": self.ids[doc_id], "sourceDocumentId": doc_id, "created": created})
+            return httpx.Response(200, json={"items": items})
+        self.notified.append(json.loads(request.content)["insightId"])
+        return httpx.Response(201, json={})
+
+def make_pipeline(llm, concurrency, service=None, **kwargs):
+    return RecordingPipeline(
+        llm,
+        NoopCompetitorClient(),
+        insights_url="http://insights",
+        notification_url="http://notification",
+        concurrency=concurrency,
+        http_client=ServiceClient(transport=httpx.MockTransport(service or FakeInsightsService())),
+        **kwargs
+    )
+
+def make_doc(doc_id, title):
+    return models.Document(id=doc_id, source="Test", title=title, raw_content="", published_date=datetime.now())
+
+@pytest.mark.asyncio
+async def test_run_batch_respects_concurrency_limit():
+    llm = SlowLLMClient()
+    pipeline = make_pipeline(llm, concurrency=3)
+    docs = [make_doc(f"doc-{i}", f"Doc {i}") for i in range(10)]
+
+    processed = await pipeline.run_batch(docs, [], {})
+
+    assert processed == 10
+    assert llm.peak == 3
+
+@pytest.mark.asyncio
+async def test_failed_document_does_not_block_others():
+    pipeline = make_pipeline(SlowLLMClient(), concurrency=4)
+    docs = [make_doc("doc-ok-1", "fine"), make_doc("doc-bad", "fail"), make_doc("doc-ok-2", "fine")]
+
+    processed = await pipeline.run_batch(docs, [], {})
+
+    assert processed == 2
+    assert sorted(pipeline.committed) == ["doc-ok-1", "doc-ok-2"]
+
+@pytest.mark.asyncio
+async def test_insights_are_created_in_bulk_and_retries_not_renotified():
+    service = FakeInsightsService()
+    pipeline = make_pipeline(SlowLLMClient(), concurrency=4, service=service, insights_bulk_size=2)
+    docs = [make_doc(f"doc-{i}", f"Doc {i}") for i in range(3)]
+
+    assert await pipeline.run_batch(docs, [], {}) == 3
+    # A retried document gets its existing insight back
+    assert await pipeline.run_batch([make_doc("doc-1", "Doc 1")], [], {}) == 1
+
+    assert [[i["sourceDocumentId"] for i in batch] for batch in service.bulk_requests] == [
+        ["doc-0", "doc-1"], ["doc-2"], ["doc-1"]
+    ]
+    assert sorted(service.notified) == ["insight-0", "insight-1", "insight-2"]
+    assert pipeline.committed.count("doc-1") == 2
+
+@pytest.mark.asyncio
+async def test_document_queue_deduplicates_pending_ids():
+    from src.document_queue import DocumentQueue
+    from libs.shared.src.events import InMemoryEventBus, DOCUMENT_INGESTED
+
+    queue = DocumentQueue()
+    bus = InMemoryEventBus()
+
+    async def handler(payload):
+        queue.put_many(payload["ids"])
+
+    await bus.subscribe(DOCUMENT_INGESTED, handler)
+    await bus.publish_ids(DOCUMENT_INGESTED, ["doc-1", "doc-2"])
+    # The reconciliation sweep reporting the same document must not queue it twice
+    assert queue.put_many(["doc-2", "doc-3"]) == 1
+
+    batch = await queue.get_batch(max_size=10, timeout=1)
+    assert batch == ["doc-1", "doc-2", "doc-3"]
+
+    queue.done(batch)
+    assert queue.put_many(["doc-1"]) == 1
+
+def test_document_text_uses_typed_content_instead_of_json():
+    trial = models.Document(
+        id="ct-1", source="ClinicalTrials", external_id="NCT01234567", title="A study",
+        body_text="Tests drug X.", sponsor="Pfizer", trial_status="RECRUITING", last_update="2024-05-01"
+    )
+    legacy = models.Document(id="doc-1", source="Test", title="Old", raw_content='{"summary": "x"}')
+
+    assert document_text(trial) == (
+        "A study\nTrial: NCT01234567\nSponsor: Pfizer\nStatus: RECRUITING\nLast update: 2024-05-01\nTests drug X."
+    )
+    assert document_text(legacy) == 'Old\n{"summary": "x"}'
+
+@pytest.mark.asyncio
+async def test_unanswered_batch_document_is_released_not_stored():
+    class BatchLLM(SlowLLMClient):
+        batch_size = 2
+
+        async def analyze_batch(self, texts, competitors=None):
+            return [{"summary": "ok", "entities": {}}, None]
+
+    class ReleasingPipeline(RecordingPipeline):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.released = []
+
+        async def release(self, doc_id: str, refund_attempt: bool = False):
+            self.released.append((doc_id, refund_attempt))
+
+    service = FakeInsightsService()
+    pipeline = ReleasingPipeline(
+        BatchLLM(), NoopCompetitorClient(), insights_url="http://insights", notification_url="http://notification",
+        http_client=ServiceClient(transport=httpx.MockTransport(service))
+    )
+
+    assert await pipeline.run_batch([make_doc("doc-ok", "fine"), make_doc("doc-garbled", "fine")], [], {}) == 1
+    assert pipeline.committed == ["doc-ok"]
+    assert pipeline.released == [("doc-garbled", False)]
+    assert [i["sourceDocumentId"] for i in service.bulk_requests[0]] == ["doc-ok"]
+
+@pytest.mark.asyncio
+async def test_document_with_lost_lease_is_not_counted():
+    class LeaseLosingPipeline(RecordingPipeline):
+        async def mark_processed(self, doc_id: str):
+            await super().mark_processed(doc_id)
+            return doc_id != "doc-stolen"
+
+    pipeline = LeaseLosingPipeline(
+        SlowLLMClient(), NoopCompetitorClient(), insights_url="http://insights",
+        notification_url="http://notification",
+        http_client=ServiceClient(transport=httpx.MockTransport(FakeInsightsService()))
+    )
+
+    assert await pipeline.run_batch([make_doc("doc-ok", "fine"), make_doc("doc-stolen", "fine")], [], {}) == 1
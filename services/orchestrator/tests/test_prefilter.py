@@ -0,0 +1,39 @@
+import pytest
+from libs.shared.src.text_matching import KeywordAutomaton
+from src.prefilter import PreFilter, competitor_aliases
+from tests.test_pipeline import SlowLLMClient, make_doc, make_pipeline
+
+COMPETITORS = [{"id": "comp-1", "name": "Bristol-Myers Squibb"}, {"id": "comp-2", "name": "Pfizer Inc."}]
+
+def test_keyword_automaton_matches_on_word_boundaries():
+    automaton = KeywordAutomaton([("fda", "fda"), ("phase 3", "p3"), ("he", "he"), ("she", "she")])
+
+    matches = automaton.find_all("FDA accepts Phase 3 data; she said the fdanews piece was wrong")
+
+    assert [value for _, _, _, value in matches] == ["fda", "p3", "she"]
+
+def test_competitor_aliases_strip_suffixes_and_add_known_names():
+    assert "pfizer" in competitor_aliases("Pfizer Inc.")
+    assert {"bms", "bristol myers squibb"} <= set(competitor_aliases("Bristol-Myers Squibb"))
+
+def test_prefilter_separates_competitive_and_background_news():
+    prefilter = PreFilter(min_score=2)
+
+    assert prefilter.classify("BMS reports Phase 3 results", COMPETITORS).competitor_ids == ["comp-1"]
+    assert prefilter.classify("Study NCT01234567 opens enrolment", COMPETITORS).relevant
+    assert prefilter.classify("AZD9291 approved in Japan", COMPETITORS).relevant
+    assert not prefilter.classify("Honeybees count landmarks on the way to food", COMPETITORS).relevant
+    assert prefilter.stats()["triaged"] == 1
+
+@pytest.mark.asyncio
+async def test_triaged_documents_skip_the_llm():
+    llm = SlowLLMClient()
+    pipeline = make_pipeline(llm, concurrency=2)
+    pipeline.prefilter = PreFilter()
+    docs = [make_doc("doc-relevant", "Pfizer wins FDA approval"), make_doc("doc-noise", "Coral reefs recover")]
+
+    processed = await pipeline.run_batch(docs, COMPETITORS, {})
+
+    assert processed == 2
+    assert llm.peak == 1
+    assert pipeline.prefilter.stats()["triaged"] == 1
@@ -0,0 +1,36 @@
+import httpx
+import pytest
+from libs.shared.src.http_client import ServiceClient
+from libs.shared.src.logger import correlation_id_ctx
+
+def make_client(responses, seen, **kwargs):
+    def handler(request):
+        seen.append(request)
+        return responses.pop(0)
+
+    return ServiceClient(transport=httpx.MockTransport(handler), backoff_base=0, **kwargs)
+
+@pytest.mark.asyncio
+async def test_get_retries_on_503_and_propagates_headers():
+    seen = []
+    client = make_client([httpx.Response(503), httpx.Response(200, json={"ok": True})], seen, auth_provider=lambda: "tok")
+    token = correlation_id_ctx.set("corr-123")
+    try:
+        response = await client.get("http://svc/api/things")
+    finally:
+        correlation_id_ctx.reset(token)
+
+    assert response.json() == {"ok": True}
+    assert len(seen) == 2
+    assert seen[1].headers["x-correlation-id"] == "corr-123"
+    assert seen[1].headers["authorization"] == "Bearer tok"
+    assert client.stats()["retries"] == 1
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried_unless_requested():
+    seen = []
+    client = make_client([httpx.Response(503), httpx.Response(503), httpx.Response(201)], seen)
+
+    assert (await client.post("http://svc/api/things", json={})).status_code == 503
+    assert (await client.post("http://svc/api/things", json={}, retry=True)).status_code == 201
+    assert len(seen) == 3